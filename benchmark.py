@@ -0,0 +1,594 @@
+"""
+Benchmarks
+Measures latency, memory and accuracy of detection settings on a fixed set
+of screenshots, so each deployment can pick what suits its hardware
+
+Commands:
+    ocr-precision  EasyOCR fp32 vs dynamic vs int8 (latency, RSS, match accuracy)
+    tune           Pick torch threads, OCR batch size and scale for this machine
+    grounding-cpu  GroundingDINO stock fp32 vs optimized CPU mode (latency, RSS, box agreement)
+    shape-colors   Full-frame vs bounding-box masks for shape / circle color sampling
+    hough-pyramid  Full-resolution vs coarse-to-fine Hough circle search (latency, circle agreement)
+"""
+import sys
+import json
+import os
+import statistics
+import subprocess
+import time
+
+def rss_mb():
+    """Resident memory of this process in MB (None if it can't be measured)"""
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 1e6, 1)
+    except ImportError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is KB on Linux (peak, close enough for a fresh process)
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3, 1)
+    except ImportError:
+        return None
+
+def timed(fn, repeat=3):
+    """
+    Run fn repeat times
+
+    Returns:
+        (last result, median milliseconds)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, round(statistics.median(timings), 1)
+
+def _iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def text_agreement(reference, candidate, min_iou=0.5):
+    """
+    How well candidate OCR boxes reproduce reference boxes
+
+    Returns:
+        Dict with "box_recall" (reference boxes found at the same place) and
+        "text_accuracy" (of those, same text ignoring case)
+    """
+    if not reference:
+        return {"box_recall": 1.0, "text_accuracy": 1.0}
+
+    located = same_text = 0
+    for ref in reference:
+        best = max(candidate, key=lambda c: _iou(ref["bbox"], c["bbox"]), default=None)
+        if best is not None and _iou(ref["bbox"], best["bbox"]) >= min_iou:
+            located += 1
+            if best["text"].strip().lower() == ref["text"].strip().lower():
+                same_text += 1
+
+    return {
+        "box_recall": round(located / len(reference), 3),
+        "text_accuracy": round(same_text / located, 3) if located else 0.0
+    }
+
+def box_agreement(reference, candidate, min_iou=0.5):
+    """
+    How well candidate detections reproduce reference detections
+
+    Returns:
+        Dict with "box_recall" (reference boxes found again), "box_precision"
+        (candidate boxes that match a reference box), "mean_iou" and
+        "confidence_delta" (mean absolute score change) of the matched pairs
+    """
+    matched = []
+    for ref in reference:
+        best = max(candidate, key=lambda c: _iou(ref["bbox"], c["bbox"]), default=None)
+        if best is not None and _iou(ref["bbox"], best["bbox"]) >= min_iou:
+            matched.append((ref, best))
+
+    precise = sum(
+        1 for c in candidate
+        if any(_iou(c["bbox"], ref["bbox"]) >= min_iou for ref in reference)
+    )
+
+    return {
+        "box_recall": round(len(matched) / len(reference), 3) if reference else 1.0,
+        "box_precision": round(precise / len(candidate), 3) if candidate else 1.0,
+        "mean_iou": round(statistics.mean(_iou(r["bbox"], c["bbox"]) for r, c in matched), 3) if matched else None,
+        "confidence_delta": round(statistics.mean(abs(r["confidence"] - c["confidence"]) for r, c in matched), 4) if matched else None
+    }
+
+def run_worker(command, args):
+    """Run a benchmark worker in a fresh interpreter (clean memory, cold models)"""
+    output = subprocess.run(
+        [sys.executable, "-X", "utf8", os.path.abspath(__file__), command] + list(args),
+        capture_output=True,
+        text=True
+    )
+    try:
+        return json.loads(output.stdout)
+    except ValueError:
+        return {"error": output.stderr.strip().splitlines()[-1] if output.stderr.strip() else "worker failed"}
+
+def _ocr_precision_worker(precision, images, repeat=3):
+    """One precision mode: load the reader, OCR every image with the cache off"""
+    import easy_ocr_vision as ocr
+
+    ocr.set_cache(enabled=False)
+    ocr.set_precision(precision)
+
+    base_mb = rss_mb()
+    start = time.perf_counter()
+    ocr.get_reader()
+    load_ms = round((time.perf_counter() - start) * 1000, 1)
+    loaded_mb = rss_mb()
+
+    per_image = {}
+    for image in images:
+        # First call warms up allocator / thread pools
+        ocr.find_all_text(image, 0.0)
+        result, ms = timed(lambda: ocr.find_all_text(image, 0.0), repeat)
+        if "error" in result:
+            return result
+        per_image[image] = {"ms": ms, "texts": result["texts"]}
+
+    return {
+        "precision": precision,
+        "detector": type(ocr.get_reader().detector).__name__,
+        "reader": ocr.reader_info(),
+        "load_ms": load_ms,
+        "model_mb": round(loaded_mb - base_mb, 1) if base_mb is not None else None,
+        "rss_mb": rss_mb(),
+        "images": per_image
+    }
+
+def ocr_precision(images, precisions=("fp32", "dynamic", "int8"), repeat=3):
+    """
+    Compare EasyOCR precision modes on the same screenshots
+    Accuracy is measured against fp32 output
+
+    Returns:
+        Dict with one entry per precision: latency, memory, accuracy vs fp32
+    """
+    runs = {}
+    for precision in precisions:
+        runs[precision] = run_worker("_ocr-precision", [precision, str(repeat)] + list(images))
+        if "error" in runs[precision]:
+            return {"error": f"{precision}: {runs[precision]['error']}"}
+
+    reference = runs.get("fp32")
+    report = {}
+    for precision, run in runs.items():
+        latencies = [entry["ms"] for entry in run["images"].values()]
+        summary = {
+            "detector": run["detector"],
+            "load_ms": run["load_ms"],
+            "model_mb": run["model_mb"],
+            "rss_mb": run["rss_mb"],
+            "median_ms": round(statistics.median(latencies), 1)
+        }
+        if reference is not None:
+            agreements = [
+                text_agreement(reference["images"][image]["texts"], entry["texts"])
+                for image, entry in run["images"].items()
+            ]
+            summary["box_recall"] = round(statistics.mean(a["box_recall"] for a in agreements), 3)
+            summary["text_accuracy"] = round(statistics.mean(a["text_accuracy"] for a in agreements), 3)
+        report[precision] = summary
+
+    return {"images": len(images), "repeat": repeat, "results": report}
+
+# Generic prompts with hits on most UI screenshots
+GROUNDING_PROMPTS = ("button", "icon", "text input field")
+
+def _grounding_cpu_worker(mode, prompts, images, repeat=3):
+    """One GroundingDINO mode: load, then detect every prompt on every image with caches off"""
+    import detect_ui_grounding as grounding
+
+    grounding.set_mode(mode)
+    grounding.set_feature_cache(enabled=False)
+    grounding.set_text_cache(enabled=False)
+
+    base_mb = rss_mb()
+    start = time.perf_counter()
+    model, _ = grounding.get_model()
+    if model is None:
+        return {"error": "Failed to load model"}
+    load_ms = round((time.perf_counter() - start) * 1000, 1)
+    loaded_mb = rss_mb()
+
+    per_image = {}
+    for image in images:
+        # First call includes compilation / warm-up - reported separately
+        start = time.perf_counter()
+        grounding.detect_ui_elements_multi(image, prompts)
+        first_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        result, ms = timed(lambda: grounding.detect_ui_elements_multi(image, prompts), repeat)
+        if "error" in result:
+            return result
+        per_image[image] = {
+            "first_ms": first_ms,
+            "ms": ms,
+            "detections": {prompt: r["detections"] for prompt, r in result["results"].items()}
+        }
+
+    return {
+        "mode": mode,
+        "load_ms": load_ms,
+        "model_mb": round(loaded_mb - base_mb, 1) if base_mb is not None else None,
+        "rss_mb": rss_mb(),
+        "images": per_image
+    }
+
+def grounding_cpu(images, prompts=GROUNDING_PROMPTS, repeat=3):
+    """
+    Compare GroundingDINO's stock fp32 model with the optimized CPU mode
+    (grounding_optimize.py) on the same screenshots and prompts
+    Agreement is measured per image and prompt against the stock detections
+
+    Returns:
+        Dict with one entry per mode: load time, first-call and median latency,
+        memory, and box agreement vs stock
+    """
+    runs = {}
+    for mode in ("stock", "optimized"):
+        runs[mode] = run_worker("_grounding-cpu", [mode, ",".join(prompts), str(repeat)] + list(images))
+        if "error" in runs[mode]:
+            return {"error": f"{mode}: {runs[mode]['error']}"}
+
+    reference = runs["stock"]
+    report = {}
+    for mode, run in runs.items():
+        summary = {
+            "load_ms": run["load_ms"],
+            "model_mb": run["model_mb"],
+            "rss_mb": run["rss_mb"],
+            "first_ms": round(statistics.median(e["first_ms"] for e in run["images"].values()), 1),
+            "median_ms": round(statistics.median(e["ms"] for e in run["images"].values()), 1)
+        }
+        agreements = [
+            box_agreement(reference["images"][image]["detections"][prompt], detections)
+            for image, entry in run["images"].items()
+            for prompt, detections in entry["detections"].items()
+        ]
+        summary["box_recall"] = round(statistics.mean(a["box_recall"] for a in agreements), 3)
+        summary["box_precision"] = round(statistics.mean(a["box_precision"] for a in agreements), 3)
+        ious = [a["mean_iou"] for a in agreements if a["mean_iou"] is not None]
+        summary["mean_iou"] = round(statistics.mean(ious), 3) if ious else None
+        report[mode] = summary
+
+    report["optimized"]["speedup"] = round(report["stock"]["median_ms"] / report["optimized"]["median_ms"], 2)
+    return {"images": len(images), "prompts": list(prompts), "repeat": repeat, "results": report}
+
+def dense_ui_frame(width=1920, height=1080, elements=600, seed=0):
+    """Synthetic busy screen: filled rectangles, circles and text on a light background"""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 235, dtype=np.uint8)
+    for i in range(elements):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        x, y = int(rng.integers(0, width - 20)), int(rng.integers(0, height - 20))
+        if i % 3 == 0:
+            cv2.circle(frame, (x, y), int(rng.integers(6, 28)), color, -1)
+        elif i % 3 == 1:
+            cv2.rectangle(frame, (x, y), (x + int(rng.integers(20, 160)), y + int(rng.integers(12, 44))), color, -1)
+        else:
+            cv2.putText(frame, "Label", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    return frame
+
+def shape_colors(images, repeat=3, min_area=100):
+    """
+    Time the per-element color sampling of detect_shapes / detect_circular_buttons_all_colors:
+    the previous full-frame mask per element vs the bounding-box masks now used
+
+    Args:
+        images: Screenshots; empty = one synthetic dense_ui_frame
+
+    Returns:
+        Dict with per-image element counts, both timings and the largest color difference
+    """
+    import cv2
+    import numpy as np
+    from vision_frame import load_bgr
+    from detect_ui_advanced import contour_mean_color, circle_mean_color
+
+    def full_frame_contours(img, contours):
+        colors = []
+        for contour in contours:
+            mask = np.zeros(img.shape[:2], dtype=np.uint8)
+            cv2.drawContours(mask, [contour], -1, 255, -1)
+            colors.append(cv2.mean(img, mask=mask)[:3])
+        return colors
+
+    def full_frame_circles(img, circles):
+        colors = []
+        for x, y, r in circles:
+            mask = np.zeros(img.shape[:2], dtype=np.uint8)
+            cv2.circle(mask, (x, y), r, 255, -1)
+            colors.append(cv2.mean(img, mask=mask)[:3])
+        return colors
+
+    frames = {image: load_bgr(image) for image in images} if images else {"synthetic": dense_ui_frame()}
+    report = {}
+    for name, img in frames.items():
+        if img is None:
+            return {"error": f"Could not load image: {name}"}
+
+        # Same element extraction as the detectors
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = [c for c in contours if cv2.contourArea(c) >= min_area]
+        boxes = [cv2.boundingRect(c) for c in contours]
+
+        found = cv2.HoughCircles(
+            cv2.GaussianBlur(gray, (9, 9), 2), cv2.HOUGH_GRADIENT,
+            dp=1, minDist=20, param1=50, param2=30, minRadius=5, maxRadius=30
+        )
+        circles = [tuple(int(v) for v in c) for c in np.uint16(np.around(found))[0]] if found is not None else []
+
+        full_shapes, full_shapes_ms = timed(lambda: full_frame_contours(img, contours), repeat)
+        local_shapes, local_shapes_ms = timed(lambda: [contour_mean_color(img, c, b) for c, b in zip(contours, boxes)], repeat)
+        full_circles, full_circles_ms = timed(lambda: full_frame_circles(img, circles), repeat)
+        local_circles, local_circles_ms = timed(lambda: [circle_mean_color(img, x, y, r) for x, y, r in circles], repeat)
+
+        differences = [
+            abs(a - b)
+            for full, local in ((full_shapes, local_shapes), (full_circles, local_circles))
+            for pair in zip(full, local)
+            for a, b in zip(*pair)
+        ]
+        report[name] = {
+            "size": [img.shape[1], img.shape[0]],
+            "contours": len(contours),
+            "circles": len(circles),
+            "shapes_ms": {"full_frame": full_shapes_ms, "bbox": local_shapes_ms},
+            "circles_ms": {"full_frame": full_circles_ms, "bbox": local_circles_ms},
+            "speedup": round((full_shapes_ms + full_circles_ms) / max(local_shapes_ms + local_circles_ms, 0.1), 1),
+            "max_color_diff": round(max(differences, default=0.0), 6)
+        }
+
+    return {"repeat": repeat, "results": report}
+
+def circle_agreement(reference, candidate, max_error=2):
+    """
+    How closely candidate circles reproduce reference circles
+
+    Args:
+        reference / candidate: Lists of (x, y, radius)
+        max_error: Largest center / radius difference in pixels that still counts as a match
+
+    Returns:
+        Dict with recall, precision and the worst error among matched circles
+    """
+    errors = []
+    for x, y, r in reference:
+        distances = [max(abs(x - cx), abs(y - cy), abs(r - cr)) for cx, cy, cr in candidate]
+        if distances and min(distances) <= max_error:
+            errors.append(min(distances))
+
+    return {
+        "recall": round(len(errors) / len(reference), 3) if reference else None,
+        "precision": round(len(errors) / len(candidate), 3) if candidate else None,
+        "max_error": max(errors, default=0)
+    }
+
+def hough_pyramid(images, repeat=3, min_radius=5, max_radius=30):
+    """
+    Full-resolution HoughCircles vs the coarse-to-fine pyramid search of
+    detect_circular_buttons / detect_circular_buttons_all_colors
+    (a fresh Frame per run, so blurring and downsampling are included)
+    """
+    from circle_pyramid import find_circles, coarse_level
+    from vision_frame import Frame, load_bgr
+
+    if images:
+        frames = {image: load_bgr(image) for image in images}
+    else:
+        frames = {
+            "synthetic_1080p": dense_ui_frame(),
+            "synthetic_4k": dense_ui_frame(3840, 2160)
+        }
+
+    report = {}
+    for name, img in frames.items():
+        if img is None:
+            return {"error": f"Could not load image: {name}"}
+
+        full, full_ms = timed(lambda: find_circles(Frame(img), min_radius, max_radius, pyramid=False), repeat)
+        coarse, coarse_ms = timed(lambda: find_circles(Frame(img), min_radius, max_radius, pyramid=True), repeat)
+        report[name] = {
+            "size": [img.shape[1], img.shape[0]],
+            "circles": {"full": len(full), "pyramid": len(coarse)},
+            "ms": {"full": full_ms, "pyramid": coarse_ms},
+            "speedup": round(full_ms / max(coarse_ms, 0.1), 1),
+            **circle_agreement(full, coarse)
+        }
+
+    return {"repeat": repeat, "level": coarse_level(min_radius), "radius": [min_radius, max_radius], "results": report}
+
+def thread_candidates(cpus=None):
+    """Powers of two up to the core count, plus the core count itself"""
+    cpus = cpus or os.cpu_count() or 1
+    candidates = []
+    threads = 1
+    while threads < cpus:
+        candidates.append(threads)
+        threads *= 2
+    candidates.append(cpus)
+    return candidates
+
+def _tune_worker(threads, interop, combos, images, repeat=3):
+    """One thread configuration: time every (batch_size, scale) combo on every image"""
+    from tuning import apply_torch_threads
+    apply_torch_threads({"torch_threads": threads, "interop_threads": interop})
+
+    import easy_ocr_vision as ocr
+    ocr.set_cache(enabled=False)
+    ocr.get_reader()
+
+    # Warm up allocator / thread pools once
+    for image in images:
+        ocr.find_all_text(image, 0.0)
+
+    runs = []
+    for batch_size, scale in combos:
+        ocr.READER_CONFIG["batch_size"] = batch_size
+        ocr.READER_CONFIG["scale"] = scale
+
+        total_ms = 0.0
+        texts = {}
+        for image in images:
+            result, ms = timed(lambda: ocr.find_all_text(image, 0.0), repeat)
+            if "error" in result:
+                return result
+            total_ms += ms
+            texts[image] = result["texts"]
+
+        runs.append({"batch_size": batch_size, "scale": scale, "ms": round(total_ms, 1), "texts": texts})
+
+    return {"threads": threads, "interop": interop, "runs": runs}
+
+def tune(images, max_loss=0.02, repeat=3, batch_sizes=(1, 4, 8, 16), scales=(1.0, 0.75, 0.5), save=True):
+    """
+    Find the fastest OCR settings for this machine whose output stays within
+    max_loss of the full-resolution result, and persist them (tuning.py)
+
+    1. torch threads (and inter-op threads) - one fresh process each
+    2. batch size x input scale with the fastest threads
+
+    Returns:
+        Dict with the chosen "settings" and the measurements behind them
+    """
+    from tuning import save_tuning
+
+    def run(threads, interop, combos):
+        return run_worker("_tune", [str(threads), str(interop), json.dumps(combos), str(repeat)] + list(images))
+
+    # Phase 1: threads (outputs don't depend on them - speed only)
+    thread_runs = []
+    for threads in thread_candidates():
+        for interop in ((1, 2) if threads >= 4 else (1,)):
+            result = run(threads, interop, [[1, 1.0]])
+            if "error" in result:
+                return result
+            thread_runs.append({"threads": threads, "interop": interop, "ms": result["runs"][0]["ms"]})
+    best_threads = min(thread_runs, key=lambda r: r["ms"])
+
+    # Phase 2: batch size x scale, accuracy against batch 1 / full resolution
+    combos = [[batch_size, scale] for scale in scales for batch_size in batch_sizes]
+    if [1, 1.0] not in combos:
+        combos.insert(0, [1, 1.0])
+    result = run(best_threads["threads"], best_threads["interop"], combos)
+    if "error" in result:
+        return result
+
+    reference = next(r for r in result["runs"] if r["batch_size"] == 1 and r["scale"] == 1.0)
+    combo_runs = []
+    for entry in result["runs"]:
+        agreements = [text_agreement(reference["texts"][image], entry["texts"][image]) for image in images]
+        accuracy = min(
+            statistics.mean(a["box_recall"] for a in agreements),
+            statistics.mean(a["text_accuracy"] for a in agreements)
+        )
+        combo_runs.append({
+            "batch_size": entry["batch_size"],
+            "scale": entry["scale"],
+            "ms": entry["ms"],
+            "accuracy": round(accuracy, 3),
+            "accepted": accuracy >= 1 - max_loss
+        })
+    best = min((r for r in combo_runs if r["accepted"]), key=lambda r: r["ms"])
+
+    settings = {
+        "torch_threads": best_threads["threads"],
+        "interop_threads": best_threads["interop"],
+        "ocr_batch_size": best["batch_size"],
+        "ocr_scale": best["scale"]
+    }
+    report = {"threads": thread_runs, "combos": combo_runs, "max_loss": max_loss, "images": len(images)}
+
+    output = {"settings": settings, "report": report}
+    if save:
+        from tuning import TUNING_FILE
+        save_tuning(settings, report)
+        output["saved"] = TUNING_FILE
+    return output
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "ocr-precision": "py benchmark.py ocr-precision IMAGE [IMAGE...] [--repeat N]",
+                "tune": "py benchmark.py tune IMAGE [IMAGE...] [--max-loss 0.02] [--repeat N] [--dry-run]",
+                "grounding-cpu": "py benchmark.py grounding-cpu IMAGE [IMAGE...] [--prompts 'p1,p2'] [--repeat N]",
+                "shape-colors": "py benchmark.py shape-colors IMAGE [IMAGE...] | synthetic [--repeat N]",
+                "hough-pyramid": "py benchmark.py hough-pyramid IMAGE [IMAGE...] | synthetic [--repeat N]"
+            },
+            "note": "Each configuration runs in a fresh process; accuracy is relative to fp32",
+            "grounding": "Run 'py grounding_optimize.py build SCREENSHOT' first so load / first-call times reflect a built cache"
+        }, indent=2))
+        sys.exit(1)
+
+    repeat = 3
+    if "--repeat" in sys.argv:
+        i = sys.argv.index("--repeat")
+        repeat = int(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+
+    max_loss = 0.02
+    if "--max-loss" in sys.argv:
+        i = sys.argv.index("--max-loss")
+        max_loss = float(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+
+    prompts = GROUNDING_PROMPTS
+    if "--prompts" in sys.argv:
+        i = sys.argv.index("--prompts")
+        prompts = [p.strip() for p in sys.argv[i + 1].split(",") if p.strip()]
+        del sys.argv[i:i + 2]
+
+    dry_run = "--dry-run" in sys.argv
+    if dry_run:
+        sys.argv.remove("--dry-run")
+
+    command = sys.argv[1].lower()
+
+    if command == "ocr-precision":
+        result = ocr_precision(sys.argv[2:], repeat=repeat)
+
+    elif command == "tune":
+        result = tune(sys.argv[2:], max_loss, repeat, save=not dry_run)
+
+    elif command == "grounding-cpu":
+        result = grounding_cpu(sys.argv[2:], prompts, repeat)
+
+    elif command == "shape-colors":
+        result = shape_colors([image for image in sys.argv[2:] if image != "synthetic"], repeat)
+
+    elif command == "hough-pyramid":
+        result = hough_pyramid([image for image in sys.argv[2:] if image != "synthetic"], repeat)
+
+    elif command == "_grounding-cpu":
+        result = _grounding_cpu_worker(sys.argv[2], sys.argv[3].split(","), sys.argv[5:], int(sys.argv[4]))
+
+    elif command == "_tune":
+        result = _tune_worker(int(sys.argv[2]), int(sys.argv[3]), json.loads(sys.argv[4]), sys.argv[6:], int(sys.argv[5]))
+
+    elif command == "_ocr-precision":
+        result = _ocr_precision_worker(sys.argv[2], sys.argv[4:], int(sys.argv[3]))
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
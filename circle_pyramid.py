@@ -0,0 +1,108 @@
+"""
+Coarse-to-Fine Hough Circles
+Full-resolution HoughCircles (dp=1) votes for every radius at every edge pixel
+of the frame, which dominates the OpenCV tier on 4K captures. Pyramid mode runs
+the transform on a downsampled copy of the same blurred plane to find
+candidates, then repeats it at full resolution only in a small window around
+each candidate with a narrow radius range - centers and radii come out of the
+same full-resolution transform, so they match the full-frame result within a
+pixel or two
+
+Enabled per call (pyramid=True) or for every detector with CLAUDE_HOUGH_PYRAMID=1
+Compare with full resolution:
+    py benchmark.py hough-pyramid IMAGE [IMAGE...] | synthetic
+"""
+import os
+
+import cv2
+import numpy as np
+
+PYRAMID = os.environ.get("CLAUDE_HOUGH_PYRAMID", "0") not in ("", "0")
+
+# Same transform settings the detectors always used
+BLUR = (9, 2)
+MIN_DIST = 20
+PARAM1 = 50
+PARAM2 = 30
+
+# Coarse level: downsample while min_radius stays at least this many pixels there
+MIN_COARSE_RADIUS = 2.5
+MAX_LEVEL = 3
+
+def coarse_level(min_radius):
+    """Deepest pyramid level where the smallest wanted circle is still detectable"""
+    level = 0
+    while level < MAX_LEVEL and min_radius / 2 ** (level + 1) >= MIN_COARSE_RADIUS:
+        level += 1
+    return level
+
+def _hough(plane, min_dist, param2, min_radius, max_radius):
+    circles = cv2.HoughCircles(
+        plane,
+        cv2.HOUGH_GRADIENT,
+        dp=1,
+        minDist=min_dist,
+        param1=PARAM1,
+        param2=param2,
+        minRadius=min_radius,
+        maxRadius=max_radius
+    )
+    return [] if circles is None else circles[0]
+
+def _rounded(circles):
+    return [tuple(int(v) for v in c) for c in np.uint16(np.around(circles))]
+
+def find_circles(frame, min_radius=5, max_radius=30, pyramid=None):
+    """
+    Hough circles on a Frame's 9x9 blurred gray plane
+
+    Args:
+        frame: vision_frame.Frame (usually an ROI view)
+        min_radius: Minimum circle radius
+        max_radius: Maximum circle radius
+        pyramid: Coarse-to-fine search (None = CLAUDE_HOUGH_PYRAMID)
+
+    Returns:
+        List of (x, y, radius) ints in frame coordinates, strongest first
+    """
+    if pyramid is None:
+        pyramid = PYRAMID
+    level = coarse_level(min_radius) if pyramid else 0
+    if level == 0:
+        return _rounded(_hough(frame.blurred(*BLUR), MIN_DIST, PARAM2, min_radius, max_radius))
+
+    planes = frame.pyramid(level, blur=BLUR)
+    level = len(planes) - 1
+    full, coarse = planes[0], planes[-1]
+    scale = 2 ** level
+
+    # Edge length (and so the accumulator votes) shrinks with the scale; a low
+    # coarse threshold keeps recall, false candidates fail the full-resolution check
+    candidates = _hough(
+        coarse, max(1.0, MIN_DIST / scale), max(8, PARAM2 / scale),
+        max(1, min_radius // scale - 1), -(-max_radius // scale) + 1
+    )
+
+    height, width = full.shape[:2]
+    found = []
+    for cx, cy, cr in candidates:
+        x, y, r = cx * scale, cy * scale, cr * scale
+        if any((x - fx) ** 2 + (y - fy) ** 2 < MIN_DIST ** 2 for fx, fy, _ in found):
+            # Already refined from a stronger candidate
+            continue
+
+        r_low = max(min_radius, int(r - scale - 2))
+        r_high = min(max_radius, int(np.ceil(r + scale + 2)))
+        if r_low > r_high:
+            continue
+
+        pad = r_high + scale + 4
+        x1, y1 = max(0, int(x - pad)), max(0, int(y - pad))
+        x2, y2 = min(width, int(x + pad) + 1), min(height, int(y + pad) + 1)
+        for fx, fy, fr in _hough(full[y1:y2, x1:x2], MIN_DIST, PARAM2, r_low, r_high):
+            fx, fy = fx + x1, fy + y1
+            if all((fx - ox) ** 2 + (fy - oy) ** 2 >= MIN_DIST ** 2 for ox, oy, _ in found):
+                found.append((fx, fy, fr))
+                break
+
+    return _rounded(found)
@@ -9,6 +9,14 @@ import json
 
 TEMP_FILE = "temp_screen.png"
 
+def capture_frame():
+    """
+    Capture screen straight to memory - no PNG encode, no disk
+    Returns an OpenCV BGR numpy frame accepted by every detector
+    """
+    from vision_frame import load_bgr
+    return load_bgr(pyautogui.screenshot())
+
 def capture_for_claude():
     """Capture screen to temp file for Claude to analyze"""
     screenshot = pyautogui.screenshot()
@@ -24,6 +32,83 @@ def capture_for_claude():
         }
     }
 
+def publish_frames(name, fps=5.0, frames=None):
+    """
+    Capture mode for multi-process setups: publish raw frames into a named
+    shared-memory buffer that detector processes attach to as 'shm://NAME'
+
+    Args:
+        name: Shared-memory block name
+        fps: Captures per second
+        frames: Stop after this many frames (None = until Ctrl+C)
+    """
+    import time
+    import cv2
+    import numpy as np
+    from shared_frame import SharedFramePublisher
+
+    shot = np.asarray(pyautogui.screenshot())
+    height, width = shot.shape[:2]
+    publisher = SharedFramePublisher(name, width, height)
+    print(f"Publishing {width}x{height} frames to shm://{name} at {fps} fps", file=sys.stderr)
+
+    interval = 1.0 / fps
+    count = 0
+    try:
+        while frames is None or count < frames:
+            start = time.perf_counter()
+            # RGB screenshot → BGR directly into the shared slot (single copy)
+            publisher.publish(shot, convert=cv2.COLOR_RGB2BGR)
+            count += 1
+            time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+            shot = np.asarray(pyautogui.screenshot())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+    return {
+        "status": "stopped",
+        "name": name,
+        "frames": count
+    }
+
+def record_frames(path="screen_ring.bin", fps=10.0, seconds=10.0, capacity=64):
+    """
+    Continuous capture into a memory-mapped ring buffer file
+    Readers use frame_ring.FrameRing.open(path) or 'ring://PATH' as an image
+
+    Args:
+        path: Ring buffer file
+        fps: Captures per second
+        seconds: Recording length (None = until Ctrl+C)
+        capacity: Frames kept (older ones are overwritten)
+    """
+    import time
+    from frame_ring import start_recording
+
+    ring, recorder = start_recording(path, fps, capacity)
+    print(f"Recording to {path} at {fps} fps ({capacity} frames kept)", file=sys.stderr)
+
+    try:
+        if seconds is None:
+            while recorder.is_alive():
+                time.sleep(0.5)
+        else:
+            time.sleep(seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.stop()
+
+    result = ring.info()
+    result["status"] = "stopped"
+    result["captured"] = recorder.frames
+    if recorder.error:
+        result["error"] = recorder.error
+    ring.close()
+    return result
+
 def click_at(x, y, duration=0.5):
     """Click at coordinates provided by Claude"""
     pyautogui.click(x, y, duration=duration)
@@ -48,6 +133,8 @@ if __name__ == "__main__":
             "error": "Usage:",
             "commands": {
                 "capture": "py claude_vision.py capture",
+                "publish": "py claude_vision.py publish NAME [fps] [frames]",
+                "record": "py claude_vision.py record [RING_FILE] [fps] [seconds] [capacity]",
                 "click": "py claude_vision.py click X Y [duration]",
                 "move": "py claude_vision.py move X Y [duration]"
             }
@@ -59,6 +146,19 @@ if __name__ == "__main__":
     if command == "capture":
         result = capture_for_claude()
 
+    elif command == "publish":
+        name = sys.argv[2] if len(sys.argv) > 2 else "claude_screen"
+        fps = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+        frames = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        result = publish_frames(name, fps, frames)
+
+    elif command == "record":
+        path = sys.argv[2] if len(sys.argv) > 2 else "screen_ring.bin"
+        fps = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+        seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+        capacity = int(sys.argv[5]) if len(sys.argv) > 5 else 64
+        result = record_frames(path, fps, seconds, capacity)
+
     elif command == "click":
         x = int(sys.argv[2])
         y = int(sys.argv[3])
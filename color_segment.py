@@ -0,0 +1,241 @@
+"""
+Color Segmentation
+Classifies every pixel of a frame into the project palette in one pass:
+HSV conversion, then per-channel lookup tables (cv2.LUT) that combine into a
+single 8-bit code, then one 256-entry table from code to palette label.
+Any number of color queries then reuse the same label image instead of each
+running its own cvtColor + inRange
+
+Hue bins and saturation / value tiers sit exactly on the thresholds the old
+per-color detectors used, so "red" and "green" masks are identical to their
+inRange masks
+"""
+import cv2
+import numpy as np
+import sys
+import json
+
+from vision_frame import Frame, pop_roi_arg
+
+PALETTE = ("red", "green", "blue", "yellow", "orange", "purple", "cyan", "white", "black", "gray")
+LABELS = {name: index for index, name in enumerate(PALETTE)}
+
+# OpenCV hue (0-179) -> palette color, inclusive upper bounds
+HUE_BINS = (
+    (10, "red"),
+    (22, "orange"),
+    (34, "yellow"),
+    (85, "green"),
+    (100, "cyan"),
+    (130, "blue"),
+    (159, "purple"),
+    (255, "red")
+)
+
+# Saturation / value tiers (lower bounds); tier 0 is below the first bound
+S_TIERS = (40, 50, 100)
+V_TIERS = (50, 100, 201)
+
+def _tier_lut(bounds, shift):
+    values = np.arange(256)
+    return (np.searchsorted(bounds, values, side="right") << shift).astype(np.uint8)
+
+def _build_tables():
+    """
+    Per-channel LUTs producing (hue bin << 4 | s tier << 2 | v tier) and the
+    code -> label table
+    """
+    hue_lut = np.zeros(256, dtype=np.uint8)
+    start = 0
+    for hue_bin, (upper, _) in enumerate(HUE_BINS):
+        hue_lut[start:upper + 1] = hue_bin << 4
+        start = upper + 1
+
+    s_lut = _tier_lut(S_TIERS, 2)
+    v_lut = _tier_lut(V_TIERS, 0)
+
+    labels = np.full(256, LABELS["gray"], dtype=np.uint8)
+    for hue_bin, (_, name) in enumerate(HUE_BINS):
+        for s_tier in range(4):
+            for v_tier in range(4):
+                code = hue_bin << 4 | s_tier << 2 | v_tier
+                if v_tier == 0:
+                    # V < 50
+                    labels[code] = LABELS["black"]
+                elif s_tier == 0 and v_tier == 3:
+                    # S < 40, V > 200
+                    labels[code] = LABELS["white"]
+                elif name == "red":
+                    # Same range as detect_red_buttons: S >= 100, V >= 100
+                    if s_tier == 3 and v_tier >= 2:
+                        labels[code] = LABELS["red"]
+                elif s_tier >= 2:
+                    # S >= 50, V >= 50 (detect_green_buttons' range)
+                    labels[code] = LABELS[name]
+
+    return hue_lut, s_lut, v_lut, labels
+
+HUE_LUT, S_LUT, V_LUT, CODE_LABELS = _build_tables()
+
+def classify(img):
+    """
+    Palette label (index into PALETTE) for every pixel of a BGR frame
+
+    Returns:
+        uint8 array with the frame's height and width
+    """
+    h, s, v = cv2.split(cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
+    code = cv2.bitwise_or(cv2.bitwise_or(cv2.LUT(h, HUE_LUT), cv2.LUT(s, S_LUT)), cv2.LUT(v, V_LUT))
+    return cv2.LUT(code, CODE_LABELS)
+
+class ColorSegmentation:
+    """
+    Label image of one frame plus connected components per color, computed on
+    first request and kept for later queries
+
+    Args:
+        img: BGR frame (already cropped to the region of interest)
+        offset: (x, y) added to every reported coordinate
+        labels: Precomputed classify() output (Frame.labels) instead of img
+    """
+
+    def __init__(self, img=None, offset=(0, 0), labels=None):
+        self.labels = labels if labels is not None else classify(img)
+        self.offset = offset
+        self._components = {}
+
+    def mask(self, color):
+        """255 where the pixel belongs to color"""
+        return cv2.compare(self.labels, LABELS[color], cv2.CMP_EQ)
+
+    def histogram(self):
+        """Pixel count per color"""
+        counts = np.bincount(self.labels.ravel(), minlength=len(PALETTE))
+        return {name: int(counts[index]) for index, name in enumerate(PALETTE)}
+
+    def components(self, color, min_area=1):
+        """
+        8-connected regions of one color, traced as external contours on the
+        shared label image (same regions and areas as findContours on an inRange mask)
+
+        Returns:
+            List of {"color", "bbox", "center", "centroid", "area", "size"} sorted left to right
+        """
+        if color not in self._components:
+            contours, _ = cv2.findContours(self.mask(color), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            offset_x, offset_y = self.offset
+            regions = []
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                moments = cv2.moments(contour)
+                x, y = x + offset_x, y + offset_y
+                if moments["m00"] > 0:
+                    centroid = [round(moments["m10"] / moments["m00"] + offset_x, 1), round(moments["m01"] / moments["m00"] + offset_y, 1)]
+                else:
+                    centroid = [x + w / 2, y + h / 2]
+                regions.append({
+                    "color": color,
+                    "bbox": [x, y, x + w, y + h],
+                    "center": [x + w // 2, y + h // 2],
+                    "centroid": centroid,
+                    # Polygon area, as cv2.contourArea
+                    "area": float(moments["m00"]),
+                    "size": [w, h]
+                })
+            regions.sort(key=lambda r: r["center"][0])
+            self._components[color] = regions
+
+        return [r for r in self._components[color] if r["area"] >= min_area]
+
+    def all_components(self, min_area=1, colors=None):
+        """Components of every palette color (or the given ones) from the same label image"""
+        return {color: self.components(color, min_area) for color in (colors or PALETTE)}
+
+def segment(image, roi=None, target_y=None, tolerance=20):
+    """
+    Label a frame's region of interest (memoized on the Frame, so every
+    color query on the same Frame shares one labeling pass)
+
+    Returns:
+        (ColorSegmentation, resolved roi) - raises ValueError for unusable input
+    """
+    frame = Frame.load(image)
+    if frame is None:
+        raise ValueError("Could not load image")
+    view, roi = frame.crop(roi, target_y, tolerance)
+    return view.segmentation, roi
+
+def find_color_regions(image_path, colors=None, min_area=50, target_y=None, tolerance=20, roi=None):
+    """
+    Connected regions of one or more palette colors
+
+    Args:
+        image_path: Path to screenshot, numpy BGR frame or PIL image
+        colors: Palette colors to report (None = all)
+        min_area: Minimum region size in pixels
+        target_y: Optional Y coordinate filter
+        tolerance: Y tolerance
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+
+    Returns:
+        Dict with per-color "regions" and the pixel "histogram"
+    """
+    colors = colors or list(PALETTE)
+    unknown = [c for c in colors if c not in LABELS]
+    if unknown:
+        return {"error": f"Unknown colors: {unknown}", "palette": list(PALETTE)}
+
+    try:
+        seg, roi = segment(image_path, roi, target_y, tolerance)
+    except ValueError as e:
+        return {"error": str(e), "regions": {}}
+
+    regions = {}
+    for color, found in seg.all_components(min_area, colors).items():
+        if target_y is not None:
+            found = [r for r in found if abs(r["center"][1] - target_y) <= tolerance]
+        regions[color] = found
+
+    return {
+        "found": any(regions.values()),
+        "count": sum(len(r) for r in regions.values()),
+        "regions": regions,
+        "histogram": seg.histogram(),
+        "target_y": target_y,
+        "roi": roi
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "regions": "py color_segment.py regions IMAGE [color,color...] [min_area] [target_y]",
+                "histogram": "py color_segment.py histogram IMAGE"
+            },
+            "palette": list(PALETTE),
+            "roi": "Add --band (only rows near target_y) or --roi X1,Y1,X2,Y2 to skip the rest of the screen"
+        }, indent=2))
+        sys.exit(1)
+
+    roi = pop_roi_arg(sys.argv)
+    command = sys.argv[1].lower()
+
+    if command == "regions":
+        image = sys.argv[2]
+        colors = [c.strip() for c in sys.argv[3].split(",") if c.strip()] if len(sys.argv) > 3 and sys.argv[3] != "all" else None
+        min_area = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+        target_y = int(sys.argv[5]) if len(sys.argv) > 5 else None
+        result = find_color_regions(image, colors, min_area, target_y, roi=roi)
+
+    elif command == "histogram":
+        try:
+            seg, roi = segment(sys.argv[2], roi)
+            result = {"histogram": seg.histogram(), "roi": roi}
+        except ValueError as e:
+            result = {"error": str(e)}
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
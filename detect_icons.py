@@ -2,66 +2,60 @@
 Icon Detection using OpenCV
 Detects circular buttons, play icons, etc. by shape and color
 """
-import cv2
-import numpy as np
 import sys
 import json
 
-def detect_circular_buttons(image_path, target_y=None, tolerance=20, min_radius=5, max_radius=30):
+from vision_frame import Frame, pop_roi_arg
+from circle_pyramid import find_circles
+from color_segment import PALETTE, segment
+
+def detect_circular_buttons(image_path, target_y=None, tolerance=20, min_radius=5, max_radius=30, roi=None, pyramid=None):
     """
     Detect circular buttons (like play icons) in screenshot
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         target_y: Y coordinate to search near (e.g., text line Y position)
         tolerance: Y coordinate tolerance in pixels
         min_radius: Minimum circle radius
         max_radius: Maximum circle radius
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+        pyramid: Coarse-to-fine Hough search (None = CLAUDE_HOUGH_PYRAMID)
 
     Returns:
         List of detected circles with positions
     """
-    # Load image
-    img = cv2.imread(image_path)
-    if img is None:
+    # Load image (decoded once per Frame)
+    frame = Frame.load(image_path)
+    if frame is None:
         return {"error": "Could not load image", "circles": []}
 
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (9, 9), 2)
+    # Only process the region of interest (coordinates mapped back below)
+    try:
+        view, roi = frame.crop(roi, target_y, tolerance, margin=max_radius)
+    except ValueError as e:
+        return {"error": str(e), "circles": []}
+    offset_x, offset_y = view.offset
 
-    # Detect circles using Hough Circle Transform
-    circles = cv2.HoughCircles(
-        blurred,
-        cv2.HOUGH_GRADIENT,
-        dp=1,
-        minDist=20,
-        param1=50,
-        param2=30,
-        minRadius=min_radius,
-        maxRadius=max_radius
-    )
+    # Detect circles using Hough Circle Transform on the shared 9x9 blurred plane
+    # (coarse-to-fine in pyramid mode)
+    circles = find_circles(view, min_radius, max_radius, pyramid)
 
     results = []
 
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
+    for local_x, local_y, r in circles:
+        x, y = local_x + offset_x, local_y + offset_y
 
-        for circle in circles[0, :]:
-            x, y, r = int(circle[0]), int(circle[1]), int(circle[2])
-
-            # If target_y specified, only return circles near that Y coordinate
-            if target_y is not None:
-                if abs(y - target_y) > tolerance:
-                    continue
+        # If target_y specified, only return circles near that Y coordinate
+        if target_y is not None:
+            if abs(y - target_y) > tolerance:
+                continue
 
-            results.append({
-                "center": [x, y],
-                "radius": r,
-                "bbox": [x-r, y-r, x+r, y+r]
-            })
+        results.append({
+            "center": [x, y],
+            "radius": r,
+            "bbox": [x-r, y-r, x+r, y+r]
+        })
 
     # Sort by X coordinate (left to right)
     results.sort(key=lambda c: c["center"][0])
@@ -70,57 +64,40 @@ def detect_circular_buttons(image_path, target_y=None, tolerance=20, min_radius=
         "found": len(results) > 0,
         "count": len(results),
         "circles": results,
-        "target_y": target_y
+        "target_y": target_y,
+        "roi": roi
     }
 
-def detect_red_buttons(image_path, target_y=None, tolerance=20, min_area=50):
+def detect_color_buttons(image_path, color, target_y=None, tolerance=20, min_area=50, roi=None):
     """
-    Detect red circular buttons specifically
+    Detect roughly circular / square buttons of one palette color
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
+        color: Palette color (see color_segment.PALETTE)
         target_y: Y coordinate to search near
         tolerance: Y coordinate tolerance
         min_area: Minimum button area in pixels
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
-        List of detected red buttons with positions
+        List of detected buttons with positions
     """
-    # Load image
-    img = cv2.imread(image_path)
-    if img is None:
-        return {"error": "Could not load image", "buttons": []}
-
-    # Convert BGR to HSV for better color detection
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-
-    # Define range for red color (red wraps around in HSV)
-    # Lower red range
-    lower_red1 = np.array([0, 100, 100])
-    upper_red1 = np.array([10, 255, 255])
-    # Upper red range
-    lower_red2 = np.array([160, 100, 100])
-    upper_red2 = np.array([180, 255, 255])
-
-    # Create masks for red color
-    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    mask = cv2.bitwise_or(mask1, mask2)
-
-    # Find contours
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if color not in PALETTE:
+        return {"error": f"Unknown color: {color}", "palette": list(PALETTE), "buttons": []}
 
-    results = []
+    # One labeling pass over the region of interest (coordinates come back in screen space)
+    try:
+        seg, roi = segment(image_path, roi, target_y, tolerance)
+    except ValueError as e:
+        return {"error": str(e), "buttons": []}
 
-    for contour in contours:
-        area = cv2.contourArea(contour)
-        if area < min_area:
-            continue
+    results = []
 
-        # Get bounding box
-        x, y, w, h = cv2.boundingRect(contour)
-        center_x = x + w // 2
-        center_y = y + h // 2
+    for region in seg.components(color, min_area):
+        x1, y1, x2, y2 = region["bbox"]
+        w, h = region["size"]
+        center_x, center_y = region["center"]
 
         # Filter by target Y if specified
         if target_y is not None:
@@ -132,8 +109,8 @@ def detect_red_buttons(image_path, target_y=None, tolerance=20, min_area=50):
         if 0.7 < aspect_ratio < 1.3:  # Roughly square/circular
             results.append({
                 "center": [center_x, center_y],
-                "bbox": [x, y, x+w, y+h],
-                "area": int(area),
+                "bbox": [x1, y1, x2, y2],
+                "area": int(region["area"]),
                 "size": [w, h]
             })
 
@@ -144,76 +121,44 @@ def detect_red_buttons(image_path, target_y=None, tolerance=20, min_area=50):
         "found": len(results) > 0,
         "count": len(results),
         "buttons": results,
-        "target_y": target_y
+        "color": color,
+        "target_y": target_y,
+        "roi": roi
     }
 
-def detect_green_buttons(image_path, target_y=None, tolerance=20, min_area=50):
+def detect_red_buttons(image_path, target_y=None, tolerance=20, min_area=50, roi=None):
     """
-    Detect green circular buttons specifically
+    Detect red circular buttons specifically
+    (HSV hue 0-10 / 160-179, saturation and value >= 100)
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         target_y: Y coordinate to search near
         tolerance: Y coordinate tolerance
         min_area: Minimum button area in pixels
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
-        List of detected green buttons with positions
+        List of detected red buttons with positions
     """
-    # Load image
-    img = cv2.imread(image_path)
-    if img is None:
-        return {"error": "Could not load image", "buttons": []}
-
-    # Convert BGR to HSV for better color detection
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-
-    # Define range for green color in HSV
-    lower_green = np.array([35, 50, 50])
-    upper_green = np.array([85, 255, 255])
-
-    # Create mask for green color
-    mask = cv2.inRange(hsv, lower_green, upper_green)
-
-    # Find contours
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    results = []
+    return detect_color_buttons(image_path, "red", target_y, tolerance, min_area, roi)
 
-    for contour in contours:
-        area = cv2.contourArea(contour)
-        if area < min_area:
-            continue
-
-        # Get bounding box
-        x, y, w, h = cv2.boundingRect(contour)
-        center_x = x + w // 2
-        center_y = y + h // 2
-
-        # Filter by target Y if specified
-        if target_y is not None:
-            if abs(center_y - target_y) > tolerance:
-                continue
-
-        # Check if roughly circular (aspect ratio close to 1)
-        aspect_ratio = float(w) / h if h > 0 else 0
-        if 0.7 < aspect_ratio < 1.3:  # Roughly square/circular
-            results.append({
-                "center": [center_x, center_y],
-                "bbox": [x, y, x+w, y+h],
-                "area": int(area),
-                "size": [w, h]
-            })
+def detect_green_buttons(image_path, target_y=None, tolerance=20, min_area=50, roi=None):
+    """
+    Detect green circular buttons specifically
+    (HSV hue 35-85, saturation and value >= 50)
 
-    # Sort by X coordinate (left to right)
-    results.sort(key=lambda b: b["center"][0])
+    Args:
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
+        target_y: Y coordinate to search near
+        tolerance: Y coordinate tolerance
+        min_area: Minimum button area in pixels
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
-    return {
-        "found": len(results) > 0,
-        "count": len(results),
-        "buttons": results,
-        "target_y": target_y
-    }
+    Returns:
+        List of detected green buttons with positions
+    """
+    return detect_color_buttons(image_path, "green", target_y, tolerance, min_area, roi)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -222,31 +167,47 @@ if __name__ == "__main__":
             "commands": {
                 "circles": "py detect_icons.py circles IMAGE [target_y] [tolerance]",
                 "red": "py detect_icons.py red IMAGE [target_y] [tolerance]",
-                "green": "py detect_icons.py green IMAGE [target_y] [tolerance]"
+                "green": "py detect_icons.py green IMAGE [target_y] [tolerance]",
+                "color": "py detect_icons.py color IMAGE COLOR [target_y] [tolerance]"
             },
+            "colors": list(PALETTE),
+            "roi": "Add --band (only rows near target_y) or --roi X1,Y1,X2,Y2 to skip the rest of the screen",
+            "pyramid": "Add --pyramid to circles for the coarse-to-fine Hough search (faster on large screens)",
             "note": "Detects icon buttons by shape and color"
         }, indent=2))
         sys.exit(1)
 
+    roi = pop_roi_arg(sys.argv)
+    pyramid = None
+    if "--pyramid" in sys.argv:
+        sys.argv.remove("--pyramid")
+        pyramid = True
     command = sys.argv[1].lower()
 
     if command == "circles":
         image = sys.argv[2]
         target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
         tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
-        result = detect_circular_buttons(image, target_y, tolerance)
+        result = detect_circular_buttons(image, target_y, tolerance, roi=roi, pyramid=pyramid)
 
     elif command == "red":
         image = sys.argv[2]
         target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
         tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
-        result = detect_red_buttons(image, target_y, tolerance)
+        result = detect_red_buttons(image, target_y, tolerance, roi=roi)
 
     elif command == "green":
         image = sys.argv[2]
         target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
         tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
-        result = detect_green_buttons(image, target_y, tolerance)
+        result = detect_green_buttons(image, target_y, tolerance, roi=roi)
+
+    elif command == "color":
+        image = sys.argv[2]
+        color = sys.argv[3].lower()
+        target_y = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        tolerance = int(sys.argv[5]) if len(sys.argv) > 5 else 20
+        result = detect_color_buttons(image, color, target_y, tolerance, roi=roi)
 
     else:
         result = {"error": f"Unknown command: {command}"}
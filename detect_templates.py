@@ -0,0 +1,456 @@
+"""
+Icon Detection by Template Matching
+Finds arbitrary icons (gear, close, a specific game item...) from an on-disk
+icon library - much faster than GroundingDINO, and works for shapes that
+Hough circles and contour heuristics can't describe
+
+Library layout (./icons, override with CLAUDE_ICON_DIR):
+    icons/gear.png                 one template named "gear"
+    icons/close/light.png          several variants of "close"
+    icons/close/dark.png
+Underscores in names match spaces in descriptions ("play_store" <- "play store icon")
+
+Search is coarse-to-fine: every template variant (at each UI scale) keeps a
+precomputed Gaussian pyramid, matched first on a downsampled screen; only
+peaks that survive are refined level by level in small windows, and a
+template whose coarse score is too low is rejected without touching full resolution
+"""
+import cv2
+import numpy as np
+import sys
+import json
+import os
+
+from vision_frame import Frame, load_bgr, pop_roi_arg
+
+ICON_DIR = os.environ.get("CLAUDE_ICON_DIR", "icons")
+ICON_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# UI scale factors tried for every template (icons captured at 100% DPI)
+SCALES = (0.75, 1.0, 1.25, 1.5)
+
+# Coarsest level keeps templates at least this many pixels on their short side
+MIN_TEMPLATE_SIDE = 12
+MAX_LEVELS = 3
+
+# Score allowance per pyramid level below the final threshold (downsampling blurs detail)
+LEVEL_SLACK = 0.12
+
+# Peaks followed from the coarsest level per template variant
+MAX_CANDIDATES = 8
+
+# Search radius (pixels at the finer level) around an upsampled peak
+REFINE_MARGIN = 3
+
+class Template:
+    """
+    One icon image at one scale with its Gaussian pyramid
+
+    Args:
+        name: Icon name in the library
+        image: BGR template
+        scale: UI scale it was resized to
+        source: File it came from
+    """
+
+    def __init__(self, name, image, scale=1.0, source=None):
+        self.name = name
+        self.scale = scale
+        self.source = source
+        self.color = image
+        self.height, self.width = image.shape[:2]
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.levels = [gray]
+        while (
+            len(self.levels) <= MAX_LEVELS
+            and min(self.levels[-1].shape) // 2 >= MIN_TEMPLATE_SIDE
+        ):
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+
+        # A flat template has no correlation signal (normalized score is undefined)
+        self.flat = float(gray.std()) < 1.0
+
+class IconLibrary:
+    """
+    Templates loaded from icon_dir, reloaded when files change
+
+    Args:
+        icon_dir: Library directory
+        scales: UI scales precomputed for every template
+    """
+
+    def __init__(self, icon_dir=ICON_DIR, scales=SCALES):
+        self.icon_dir = icon_dir
+        self.scales = tuple(scales)
+        self._templates = {}
+        self._stamp = None
+
+    def _files(self):
+        """{name: [paths]} for every image in the library"""
+        files = {}
+        if not os.path.isdir(self.icon_dir):
+            return files
+        for entry in sorted(os.listdir(self.icon_dir)):
+            path = os.path.join(self.icon_dir, entry)
+            if os.path.isdir(path):
+                variants = [
+                    os.path.join(path, f) for f in sorted(os.listdir(path))
+                    if f.lower().endswith(ICON_EXTENSIONS)
+                ]
+                if variants:
+                    files[entry.lower()] = variants
+            elif entry.lower().endswith(ICON_EXTENSIONS):
+                files.setdefault(os.path.splitext(entry)[0].lower(), []).append(path)
+        return files
+
+    def _refresh(self):
+        files = self._files()
+        stamp = tuple(
+            (name, path, os.path.getmtime(path))
+            for name, paths in sorted(files.items()) for path in paths
+        )
+        if stamp == self._stamp:
+            return
+
+        templates = {}
+        for name, paths in files.items():
+            for path in paths:
+                image = load_bgr(path)
+                if image is None:
+                    continue
+                for scale in self.scales:
+                    size = (round(image.shape[1] * scale), round(image.shape[0] * scale))
+                    if min(size) < MIN_TEMPLATE_SIDE // 2:
+                        continue
+                    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+                    resized = image if scale == 1.0 else cv2.resize(image, size, interpolation=interpolation)
+                    templates.setdefault(name, []).append(Template(name, resized, scale, path))
+
+        self._templates = templates
+        self._stamp = stamp
+
+    def names(self):
+        self._refresh()
+        return sorted(self._templates)
+
+    def templates(self, name):
+        self._refresh()
+        return self._templates.get(name.lower().replace(" ", "_"), [])
+
+    def names_in(self, description):
+        """
+        Library icons mentioned in a description, longest name first
+        ("close icon top right" -> ["close"])
+        """
+        words = set(description.lower().replace("-", " ").split())
+        matches = [name for name in self.names() if set(name.split("_")) <= words]
+        return sorted(matches, key=lambda n: len(n), reverse=True)
+
+    def add(self, name, image, bbox=None):
+        """
+        Save a template (optionally cropped from a screenshot) into the library
+
+        Args:
+            name: Icon name (a second template with the same name becomes a variant)
+            image: Path, numpy BGR frame or PIL image
+            bbox: Optional [x1, y1, x2, y2] crop
+
+        Returns:
+            Path of the saved file
+        """
+        pixels = load_bgr(image)
+        if pixels is None:
+            raise ValueError("Could not load image")
+        if bbox is not None:
+            x1, y1, x2, y2 = [int(v) for v in bbox]
+            pixels = pixels[max(0, y1):y2, max(0, x1):x2]
+        if min(pixels.shape[:2]) < MIN_TEMPLATE_SIDE // 2:
+            raise ValueError(f"Template too small: {pixels.shape[1]}x{pixels.shape[0]}")
+
+        name = name.lower().replace(" ", "_")
+        single = os.path.join(self.icon_dir, f"{name}.png")
+        folder = os.path.join(self.icon_dir, name)
+
+        if os.path.exists(single):
+            # Second variant - move both into a folder named after the icon
+            os.makedirs(folder, exist_ok=True)
+            os.replace(single, _next_variant(folder))
+        if os.path.isdir(folder):
+            path = _next_variant(folder)
+        else:
+            os.makedirs(self.icon_dir, exist_ok=True)
+            path = single
+
+        cv2.imwrite(path, pixels)
+        return path
+
+def _next_variant(folder):
+    """First unused N.png in a variant folder (gaps and non-numeric names are kept)"""
+    used = {
+        int(os.path.splitext(name)[0])
+        for name in os.listdir(folder)
+        if os.path.splitext(name)[0].isdigit()
+    }
+    number = 1
+    while number in used:
+        number += 1
+    return os.path.join(folder, f"{number}.png")
+
+# Library shared by every call in this process
+_library = None
+
+def get_library():
+    global _library
+    if _library is None:
+        _library = IconLibrary()
+    return _library
+
+def _scores(image, template):
+    scores = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    # Flat image patches give NaN / inf
+    return np.nan_to_num(scores, nan=-1.0, posinf=-1.0, neginf=-1.0)
+
+def _peaks(scores, min_score, suppress_w, suppress_h, limit):
+    """Best locations above min_score, each suppressing its template-sized neighbourhood"""
+    scores = scores.copy()
+    peaks = []
+    while len(peaks) < limit:
+        _, best, _, (x, y) = cv2.minMaxLoc(scores)
+        if best < min_score:
+            break
+        peaks.append((x, y, best))
+        scores[max(0, y - suppress_h):y + suppress_h + 1, max(0, x - suppress_w):x + suppress_w + 1] = -1.0
+    return peaks
+
+def match_template(frame, pyramid, template, threshold=0.8):
+    """
+    Coarse-to-fine search of one template variant
+
+    Args:
+        frame: BGR image (level 0, used for the final color score)
+        pyramid: Frame.pyramid of the same image (grayscale levels)
+        template: Template
+        threshold: Final normalized correlation (0-1)
+
+    Returns:
+        List of (x, y, score) top-left corners at full resolution
+    """
+    if template.flat or template.height > frame.shape[0] or template.width > frame.shape[1]:
+        return []
+
+    top = min(len(template.levels), len(pyramid)) - 1
+    while top > 0 and (
+        pyramid[top].shape[0] < template.levels[top].shape[0]
+        or pyramid[top].shape[1] < template.levels[top].shape[1]
+    ):
+        top -= 1
+
+    # Coarse pass over the whole (downsampled) frame - early rejection of the variant
+    level_template = template.levels[top]
+    peaks = _peaks(
+        _scores(pyramid[top], level_template),
+        threshold - LEVEL_SLACK * top,
+        level_template.shape[1] // 2,
+        level_template.shape[0] // 2,
+        MAX_CANDIDATES
+    )
+
+    matches = []
+    for x, y, score in peaks:
+        # Refine level by level in small windows around the upsampled peak
+        for level in range(top - 1, -1, -1):
+            level_template = template.levels[level]
+            th, tw = level_template.shape[:2]
+            image = pyramid[level] if level > 0 else frame
+            x, y = x * 2, y * 2
+
+            x1, y1 = max(0, x - REFINE_MARGIN), max(0, y - REFINE_MARGIN)
+            x2 = min(image.shape[1], x + tw + REFINE_MARGIN)
+            y2 = min(image.shape[0], y + th + REFINE_MARGIN)
+            if x2 - x1 < tw or y2 - y1 < th:
+                score = -1.0
+                break
+
+            if level == 0:
+                # Full resolution in color - hue differences lower the score too
+                scores = _scores(image[y1:y2, x1:x2], template.color)
+            else:
+                scores = _scores(image[y1:y2, x1:x2], level_template)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+            x, y = x1 + dx, y1 + dy
+
+            if score < threshold - LEVEL_SLACK * level:
+                break
+
+        if top == 0:
+            # Matched directly at full resolution - confirm in color like the refinement
+            window = frame[y:y + template.height, x:x + template.width]
+            score = float(_scores(window, template.color).max())
+
+        if score >= threshold:
+            matches.append((x, y, float(score)))
+
+    return matches
+
+def _iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def find_icon(image_path, name, threshold=0.8, target_y=None, tolerance=20, roi=None, max_results=10, library=None):
+    """
+    Find a library icon in a screenshot
+
+    Args:
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
+        name: Icon name in the library (spaces or underscores)
+        threshold: Minimum normalized correlation (0-1)
+        target_y: Optional Y coordinate filter
+        tolerance: Y tolerance
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+        max_results: Best matches kept after overlap suppression
+
+    Returns:
+        Dict with "matches" in the same format as detect_ui_advanced.find_button
+    """
+    library = library or get_library()
+    templates = library.templates(name)
+    if not templates:
+        return {
+            "error": f"No icon named '{name}' in {library.icon_dir}",
+            "found": False,
+            "matches": [],
+            "icons": library.names()
+        }
+
+    frame = Frame.load(image_path)
+    if frame is None:
+        return {"error": "Could not load image", "found": False, "matches": []}
+
+    # Only process the region of interest (coordinates mapped back below)
+    margin = max(t.height for t in templates)
+    try:
+        view, roi = frame.crop(roi, target_y, tolerance, margin=margin)
+    except ValueError as e:
+        return {"error": str(e), "found": False, "matches": []}
+    img = view.bgr
+    offset_x, offset_y = view.offset
+
+    # Screen pyramid is memoized on the Frame - shared by every icon searched on it
+    pyramid = view.pyramid(max(len(t.levels) for t in templates) - 1)
+
+    candidates = []
+    for template in templates:
+        for x, y, score in match_template(img, pyramid, template, threshold):
+            x, y = x + offset_x, y + offset_y
+            candidates.append({
+                "shape": "icon",
+                "icon": template.name,
+                "center": [x + template.width // 2, y + template.height // 2],
+                "bbox": [x, y, x + template.width, y + template.height],
+                "size": [template.width, template.height],
+                "confidence": round(score, 4),
+                "scale": template.scale,
+                "template": os.path.basename(template.source) if template.source else None
+            })
+
+    # Overlap suppression across variants and scales (best score wins)
+    results = []
+    for candidate in sorted(candidates, key=lambda c: c["confidence"], reverse=True):
+        if target_y is not None and abs(candidate["center"][1] - target_y) > tolerance:
+            continue
+        if all(_iou(candidate["bbox"], kept["bbox"]) < 0.3 for kept in results):
+            results.append(candidate)
+        if len(results) >= max_results:
+            break
+
+    return {
+        "found": len(results) > 0,
+        "count": len(results),
+        "matches": results,
+        "filter": {
+            "icon": name,
+            "threshold": threshold,
+            "target_y": target_y,
+            "roi": roi
+        }
+    }
+
+def detect_icon_description(image_path, description, threshold=0.8, target_y=None, tolerance=20, roi=None):
+    """
+    Template tier for unified_detect: search the library icons a description mentions
+
+    Returns:
+        find_icon result for the first mentioned icon that is found, or found=False
+        with "icons" empty when the description names no library icon
+    """
+    library = get_library()
+    names = library.names_in(description)
+    result = {"found": False, "count": 0, "matches": [], "icons": names}
+    if names:
+        image_path = Frame.load(image_path)
+    for name in names:
+        result = find_icon(image_path, name, threshold, target_y, tolerance, roi, library=library)
+        result["icons"] = names
+        if result.get("found"):
+            break
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "find": "py detect_templates.py find IMAGE NAME [threshold] [target_y] [tolerance]",
+                "describe": "py detect_templates.py describe IMAGE 'close icon top right' [threshold]",
+                "add": "py detect_templates.py add NAME IMAGE [X1,Y1,X2,Y2]",
+                "list": "py detect_templates.py list"
+            },
+            "examples": {
+                "add": "py detect_templates.py add gear temp.png 1840,20,1872,52",
+                "find": "py detect_templates.py find temp.png gear 0.8"
+            },
+            "library": ICON_DIR,
+            "roi": "Add --band (only rows near target_y) or --roi X1,Y1,X2,Y2 to skip the rest of the screen",
+            "note": "Multi-scale template matching (scales " + ", ".join(str(s) for s in SCALES) + ")"
+        }, indent=2))
+        sys.exit(1)
+
+    roi = pop_roi_arg(sys.argv)
+    command = sys.argv[1].lower()
+
+    if command == "find":
+        image = sys.argv[2]
+        name = sys.argv[3]
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.8
+        target_y = int(sys.argv[5]) if len(sys.argv) > 5 else None
+        tolerance = int(sys.argv[6]) if len(sys.argv) > 6 else 20
+        result = find_icon(image, name, threshold, target_y, tolerance, roi)
+
+    elif command == "describe":
+        image = sys.argv[2]
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.8
+        result = detect_icon_description(image, sys.argv[3], threshold, roi=roi)
+
+    elif command == "add":
+        bbox = [int(v) for v in sys.argv[4].split(",")] if len(sys.argv) > 4 else None
+        try:
+            path = get_library().add(sys.argv[2], sys.argv[3], bbox)
+            result = {"saved": path, "icons": get_library().names()}
+        except ValueError as e:
+            result = {"error": str(e)}
+
+    elif command == "list":
+        library = get_library()
+        result = {
+            "library": library.icon_dir,
+            "icons": {name: len({t.source for t in library.templates(name)}) for name in library.names()}
+        }
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
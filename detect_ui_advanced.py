@@ -8,68 +8,62 @@ import numpy as np
 import sys
 import json
 
-def detect_circular_buttons_all_colors(image_path, target_y=None, tolerance=20, min_radius=5, max_radius=30):
+from vision_frame import Frame, pop_roi_arg
+from circle_pyramid import find_circles
+
+def detect_circular_buttons_all_colors(image_path, target_y=None, tolerance=20, min_radius=5, max_radius=30, roi=None, pyramid=None):
     """
     Detect ALL circular buttons regardless of color using edge detection
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         target_y: Y coordinate to search near
         tolerance: Y coordinate tolerance
         min_radius: Minimum circle radius
         max_radius: Maximum circle radius
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+        pyramid: Coarse-to-fine Hough search (None = CLAUDE_HOUGH_PYRAMID)
 
     Returns:
         List of detected circles with colors
     """
-    img = cv2.imread(image_path)
-    if img is None:
+    frame = Frame.load(image_path)
+    if frame is None:
         return {"error": "Could not load image", "buttons": []}
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (9, 9), 2)
-
-    # Detect circles using Hough Transform
-    circles = cv2.HoughCircles(
-        blurred,
-        cv2.HOUGH_GRADIENT,
-        dp=1,
-        minDist=20,
-        param1=50,
-        param2=30,
-        minRadius=min_radius,
-        maxRadius=max_radius
-    )
-
-    results = []
+    # Only process the region of interest (coordinates mapped back below)
+    try:
+        view, roi = frame.crop(roi, target_y, tolerance, margin=max_radius)
+    except ValueError as e:
+        return {"error": str(e), "buttons": []}
+    img = view.bgr
+    offset_x, offset_y = view.offset
 
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
+    # Detect circles using Hough Transform on the shared 9x9 blurred plane
+    # (coarse-to-fine in pyramid mode)
+    circles = find_circles(view, min_radius, max_radius, pyramid)
 
-        for circle in circles[0, :]:
-            x, y, r = int(circle[0]), int(circle[1]), int(circle[2])
+    results = []
 
-            # Filter by target Y if specified
-            if target_y is not None:
-                if abs(y - target_y) > tolerance:
-                    continue
+    for local_x, local_y, r in circles:
+        x, y = local_x + offset_x, local_y + offset_y
 
-            # Extract dominant color in circle
-            mask = np.zeros(gray.shape, dtype=np.uint8)
-            cv2.circle(mask, (x, y), r, 255, -1)
-            mean_color = cv2.mean(img, mask=mask)[:3]
+        # Filter by target Y if specified
+        if target_y is not None:
+            if abs(y - target_y) > tolerance:
+                continue
 
-            # Determine color name
-            b, g, r_val = mean_color
-            color_name = get_color_name(r_val, g, b)
+        # Extract dominant color in circle
+        b, g, r_val = circle_mean_color(img, local_x, local_y, r)
+        color_name = get_color_name(r_val, g, b)
 
-            results.append({
-                "center": [x, y],
-                "radius": r,
-                "bbox": [x-r, y-r, x+r, y+r],
-                "color": color_name,
-                "rgb": [int(r_val), int(g), int(b)]
-            })
+        results.append({
+            "center": [x, y],
+            "radius": r,
+            "bbox": [x-r, y-r, x+r, y+r],
+            "color": color_name,
+            "rgb": [int(r_val), int(g), int(b)]
+        })
 
     results.sort(key=lambda c: c["center"][0])
 
@@ -77,9 +71,43 @@ def detect_circular_buttons_all_colors(image_path, target_y=None, tolerance=20,
         "found": len(results) > 0,
         "count": len(results),
         "buttons": results,
-        "target_y": target_y
+        "target_y": target_y,
+        "roi": roi
     }
 
+def contour_mean_color(img, contour, bbox):
+    """
+    Mean BGR color inside a filled contour
+
+    The mask only covers the contour's bounding box, so the cost scales with
+    the element's area instead of the whole frame
+
+    Args:
+        img: BGR frame the contour was found in
+        contour: Contour in img coordinates
+        bbox: cv2.boundingRect(contour) as (x, y, w, h)
+
+    Returns:
+        (b, g, r) floats
+    """
+    x, y, w, h = bbox
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.drawContours(mask, [contour], -1, 255, -1, offset=(-x, -y))
+    return cv2.mean(img[y:y + h, x:x + w], mask=mask)[:3]
+
+def circle_mean_color(img, x, y, r):
+    """
+    Mean BGR color inside a filled circle, sampled from its (clipped) bounding box
+
+    Returns:
+        (b, g, r) floats
+    """
+    x1, y1 = max(0, x - r), max(0, y - r)
+    x2, y2 = min(img.shape[1], x + r + 1), min(img.shape[0], y + r + 1)
+    mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+    cv2.circle(mask, (x - x1, y - y1), r, 255, -1)
+    return cv2.mean(img[y1:y2, x1:x2], mask=mask)[:3]
+
 def get_color_name(r, g, b):
     """Determine color name from RGB values"""
     # Normalize
@@ -121,26 +149,34 @@ def get_color_name(r, g, b):
     else:
         return "gray"
 
-def detect_shapes(image_path, target_y=None, tolerance=20, min_area=100):
+def detect_shapes(image_path, target_y=None, tolerance=20, min_area=100, roi=None):
     """
     Detect common UI shapes: circles, rectangles, triangles
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         target_y: Y coordinate filter
         tolerance: Y tolerance
         min_area: Minimum shape area
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
         Dict with detected shapes and their properties
     """
-    img = cv2.imread(image_path)
-    if img is None:
+    frame = Frame.load(image_path)
+    if frame is None:
         return {"error": "Could not load image", "shapes": []}
 
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blurred, 50, 150)
+    # Only process the region of interest (coordinates mapped back below)
+    try:
+        view, roi = frame.crop(roi, target_y, tolerance)
+    except ValueError as e:
+        return {"error": str(e), "shapes": []}
+    img = view.bgr
+    offset_x, offset_y = view.offset
+
+    # Gray -> 5x5 blur -> Canny (memoized on the Frame)
+    edges = view.edges(50, 150, blur=5)
 
     # Find contours
     contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -152,8 +188,10 @@ def detect_shapes(image_path, target_y=None, tolerance=20, min_area=100):
         if area < min_area:
             continue
 
-        # Get bounding box
-        x, y, w, h = cv2.boundingRect(contour)
+        # Get bounding box (contour stays in ROI coordinates for the color mask)
+        local_bbox = cv2.boundingRect(contour)
+        x, y, w, h = local_bbox
+        x, y = x + offset_x, y + offset_y
         center_x = x + w // 2
         center_y = y + h // 2
 
@@ -178,11 +216,8 @@ def detect_shapes(image_path, target_y=None, tolerance=20, min_area=100):
         else:
             shape_type = f"polygon-{vertices}"
 
-        # Get dominant color
-        mask = np.zeros(gray.shape, dtype=np.uint8)
-        cv2.drawContours(mask, [contour], -1, 255, -1)
-        mean_color = cv2.mean(img, mask=mask)[:3]
-        b, g, r = mean_color
+        # Get dominant color (mask limited to the contour's bounding box)
+        b, g, r = contour_mean_color(img, contour, local_bbox)
         color_name = get_color_name(r, g, b)
 
         results.append({
@@ -202,31 +237,43 @@ def detect_shapes(image_path, target_y=None, tolerance=20, min_area=100):
         "found": len(results) > 0,
         "count": len(results),
         "shapes": results,
-        "target_y": target_y
+        "target_y": target_y,
+        "roi": roi
     }
 
-def find_button(image_path, color=None, shape=None, target_y=None, tolerance=20):
+def find_button(image_path, color=None, shape=None, target_y=None, tolerance=20, roi=None):
     """
     Find button matching criteria (color and/or shape)
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         color: Target color ("red", "green", "blue", etc.) or None for any
         shape: Target shape ("circle", "triangle", "rectangle") or None for any
         target_y: Y coordinate filter
         tolerance: Y tolerance
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
         Dict with matching buttons
     """
+    # Decode once - the detectors below share the Frame's planes
+    frame = Frame.load(image_path)
+    if frame is None:
+        return {"error": "Could not load image", "found": False, "count": 0, "matches": []}
+    image_path = frame
+
     # Detect by shape if specified
     if shape == "circle":
-        result = detect_circular_buttons_all_colors(image_path, target_y, tolerance)
+        result = detect_circular_buttons_all_colors(image_path, target_y, tolerance, roi=roi)
         buttons = result.get("buttons", [])
     else:
-        result = detect_shapes(image_path, target_y, tolerance)
+        result = detect_shapes(image_path, target_y, tolerance, roi=roi)
         buttons = result.get("shapes", [])
 
+    if "error" in result:
+        # Unusable ROI - same error shape as a failed load
+        return {"error": result["error"], "found": False, "count": 0, "matches": []}
+
     # Filter by color if specified
     if color:
         buttons = [b for b in buttons if b.get("color", "").lower() == color.lower()]
@@ -242,20 +289,22 @@ def find_button(image_path, color=None, shape=None, target_y=None, tolerance=20)
         "filter": {
             "color": color,
             "shape": shape,
-            "target_y": target_y
+            "target_y": target_y,
+            "roi": result.get("roi")
         }
     }
 
-def smart_detect(image_path, description, target_y=None, tolerance=20):
+def smart_detect(image_path, description, target_y=None, tolerance=20, roi=None):
     """
     Smart detection based on natural language description
     Parses description to extract color and shape hints
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         description: Natural description like "green circular play button"
         target_y: Y coordinate filter
         tolerance: Y tolerance
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
         Dict with best matching elements
@@ -279,7 +328,7 @@ def smart_detect(image_path, description, target_y=None, tolerance=20):
         shape = "rectangle"
 
     # Find matching buttons
-    result = find_button(image_path, color, shape, target_y, tolerance)
+    result = find_button(image_path, color, shape, target_y, tolerance, roi=roi)
     result["description"] = description
     result["parsed"] = {"color": color, "shape": shape}
 
@@ -301,23 +350,30 @@ if __name__ == "__main__":
                 "find": "py detect_ui_advanced.py find temp.png green circle 556",
                 "smart": "py detect_ui_advanced.py smart temp.png 'green circular play button' 556"
             },
+            "roi": "Add --band (only rows near target_y) or --roi X1,Y1,X2,Y2 to skip the rest of the screen",
+            "pyramid": "Add --pyramid to circles for the coarse-to-fine Hough search (faster on large screens)",
             "note": "Fast OpenCV-based detection - no model download required"
         }, indent=2))
         sys.exit(1)
 
+    roi = pop_roi_arg(sys.argv)
+    pyramid = None
+    if "--pyramid" in sys.argv:
+        sys.argv.remove("--pyramid")
+        pyramid = True
     command = sys.argv[1].lower()
 
     if command == "circles":
         image = sys.argv[2]
         target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
         tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
-        result = detect_circular_buttons_all_colors(image, target_y, tolerance)
+        result = detect_circular_buttons_all_colors(image, target_y, tolerance, roi=roi, pyramid=pyramid)
 
     elif command == "shapes":
         image = sys.argv[2]
         target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
         tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
-        result = detect_shapes(image, target_y, tolerance)
+        result = detect_shapes(image, target_y, tolerance, roi=roi)
 
     elif command == "find":
         image = sys.argv[2]
@@ -325,14 +381,14 @@ if __name__ == "__main__":
         shape = sys.argv[4] if len(sys.argv) > 4 and not sys.argv[4].isdigit() else None
         target_y = int(sys.argv[5]) if len(sys.argv) > 5 else None
         tolerance = int(sys.argv[6]) if len(sys.argv) > 6 else 20
-        result = find_button(image, color, shape, target_y, tolerance)
+        result = find_button(image, color, shape, target_y, tolerance, roi=roi)
 
     elif command == "smart":
         image = sys.argv[2]
         description = sys.argv[3]
         target_y = int(sys.argv[4]) if len(sys.argv) > 4 else None
         tolerance = int(sys.argv[5]) if len(sys.argv) > 5 else 20
-        result = smart_detect(image, description, target_y, tolerance)
+        result = smart_detect(image, description, target_y, tolerance, roi=roi)
 
     else:
         result = {"error": f"Unknown command: {command}"}
@@ -5,13 +5,22 @@ Superior to color-based detection - understands semantic meaning
 """
 import sys
 import json
+import os
 import cv2
 import numpy as np
-from pathlib import Path
+
+from vision_frame import is_path, to_pil, load_bgr, roi_view, pop_roi_arg, frame_hash
+from tuning import apply_torch_threads
+from grounding_cache import TensorLRU, TextEmbeddingCache
+from model_store import load_grounding_model, import_legacy, fetch, offline
+from grounding_optimize import MODES, grounding_mode, load_optimized_model
 
 # Check if GroundingDINO is available
 try:
-    from groundingdino.util.inference import load_model, load_image, predict
+    from groundingdino.util.inference import load_image
+    from groundingdino.util.utils import get_phrases_from_posmap
+    from groundingdino.util.misc import NestedTensor, nested_tensor_from_tensor_list, inverse_sigmoid
+    from groundingdino.models.GroundingDINO.bertwarper import generate_masks_with_special_tokens_and_transfer_map
     import groundingdino.datasets.transforms as T
     import torch
     HAS_GROUNDING_DINO = True
@@ -22,6 +31,28 @@ except ImportError:
 _model = None
 _device = None
 
+# "stock" fp32 or "optimized" int8 / compiled CPU model (CLAUDE_GROUNDING_MODE)
+_mode = grounding_mode()
+
+# Checkpoint the text cache file is tied to
+MODEL_ID = "IDEA-Research/grounding-dino-tiny/groundingdino_swint_ogc"
+
+def _cache_model_id():
+    # Quantized BERT gives slightly different text features - keep them apart
+    return MODEL_ID if _mode == "stock" else f"{MODEL_ID}:{_mode}"
+
+# Backbone features per frame hash, evicted by memory (CLAUDE_GROUNDING_FEATURE_MB)
+_feature_cache = TensorLRU(float(os.environ.get("CLAUDE_GROUNDING_FEATURE_MB", 256)))
+
+# Text features + token maps per caption (CLAUDE_GROUNDING_TEXT_CACHE = directory to persist them)
+_text_cache = TextEmbeddingCache(
+    path=os.environ.get("CLAUDE_GROUNDING_TEXT_CACHE"),
+    model_id=_cache_model_id()
+) if HAS_GROUNDING_DINO else None
+
+# Staged inference reuses GroundingDINO internals; falls back to model(...) if they change
+_staged = True
+
 def get_model():
     """Lazy load GroundingDINO model"""
     global _model, _device
@@ -31,84 +62,323 @@ def get_model():
 
     if _model is None:
         print("Initializing GroundingDINO (first time only)...", file=sys.stderr)
+        apply_torch_threads()
 
         # Detect device
         _device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {_device}", file=sys.stderr)
+        print(f"Using device: {_device} ({_mode} mode)", file=sys.stderr)
+        load = load_optimized_model if _mode == "optimized" else load_grounding_model
 
-        # Load model using groundingdino-py simplified API
+        # Local verified store first - no network on a normal cold start
         try:
-            # Try alternative HuggingFace repo
-            from huggingface_hub import hf_hub_download
-
-            # Use IDEA-Research repo
-            config_file = hf_hub_download(
-                repo_id="IDEA-Research/grounding-dino-tiny",
-                filename="GroundingDINO_SwinT_OGC.cfg.py",
-                local_dir="./models"
-            )
-            checkpoint = hf_hub_download(
-                repo_id="IDEA-Research/grounding-dino-tiny",
-                filename="groundingdino_swint_ogc.pth",
-                local_dir="./models"
-            )
-
-            _model = load_model(config_file, checkpoint, device=_device)
+            _model = load(_device)
+
+        except FileNotFoundError as e:
+            try:
+                # Checkpoint left in ./models by older versions - convert it, no download
+                if import_legacy() is None:
+                    if offline():
+                        print(f"{e} - offline mode, run 'py model_store.py import' or copy the store", file=sys.stderr)
+                        return None, None
+                    print(f"{e} - downloading into the model store (one time)...", file=sys.stderr)
+                    fetch()
+                _model = load(_device)
+            except Exception as e2:
+                print(f"Error loading GroundingDINO model: {e2}", file=sys.stderr)
+                return None, None
 
         except Exception as e:
             print(f"Error loading GroundingDINO model: {e}", file=sys.stderr)
-            print("Trying fallback method...", file=sys.stderr)
-            try:
-                # Fallback: download from alternative source
-                import urllib.request
-                import os
+            return None, None
 
-                model_dir = Path("./models")
-                model_dir.mkdir(exist_ok=True)
+    return _model, _device
 
-                config_url = "https://github.com/IDEA-Research/GroundingDINO/raw/main/groundingdino/config/GroundingDINO_SwinT_OGC.py"
-                checkpoint_url = "https://github.com/IDEA-Research/GroundingDINO/releases/download/v0.1.0-alpha/groundingdino_swint_ogc.pth"
+def prepare_image(image):
+    """
+    Load an image input the way groundingdino's load_image does
+    In-memory frames skip the PNG decode entirely
 
-                config_path = model_dir / "GroundingDINO_SwinT_OGC.py"
-                checkpoint_path = model_dir / "groundingdino_swint_ogc.pth"
+    Returns:
+        (RGB numpy source image, normalized tensor)
+    """
+    if is_path(image):
+        return load_image(str(image))
 
-                if not config_path.exists():
-                    print(f"Downloading config...", file=sys.stderr)
-                    urllib.request.urlretrieve(config_url, config_path)
+    image_pil = to_pil(image)
+    if image_pil is None:
+        raise ValueError("Could not load image")
 
-                if not checkpoint_path.exists():
-                    print(f"Downloading checkpoint (~700MB)...", file=sys.stderr)
-                    urllib.request.urlretrieve(checkpoint_url, checkpoint_path)
+    transform = T.Compose([
+        T.RandomResize([800], max_size=1333),
+        T.ToTensor(),
+        T.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
+    ])
+    image_tensor, _ = transform(image_pil, None)
+    return np.asarray(image_pil), image_tensor
 
-                _model = load_model(str(config_path), str(checkpoint_path), device=_device)
+# GroundingDINO's text branch holds at most this many caption tokens
+MAX_TEXT_LEN = 256
 
-            except Exception as e2:
-                print(f"Fallback also failed: {e2}", file=sys.stderr)
-                return None, None
+def build_caption(prompts):
+    """
+    Join prompts into one period-separated caption
 
-    return _model, _device
+    Returns:
+        (caption, [(start, end) character span of each prompt])
+    """
+    caption = ""
+    spans = []
+    for prompt in prompts:
+        phrase = " ".join(prompt.lower().split()).rstrip(".").strip()
+        spans.append((len(caption), len(caption) + len(phrase)))
+        caption += phrase + " . "
+    return caption.strip(), spans
+
+def prompt_token_masks(tokenizer, caption, spans):
+    """
+    Boolean mask over the MAX_TEXT_LEN logit positions for each prompt's tokens
 
-def detect_ui_elements(
+    Returns:
+        (tokenized caption, list of masks - None for prompts cut off by the token limit)
+    """
+    tokenized = tokenizer(caption)
+    masks = []
+    for start, end in spans:
+        tokens = {tokenized.char_to_token(i) for i in range(start, end) if not caption[i].isspace()}
+        tokens = [t for t in tokens if t is not None and t < MAX_TEXT_LEN]
+        if not tokens:
+            masks.append(None)
+            continue
+        mask = torch.zeros(MAX_TEXT_LEN, dtype=torch.bool)
+        mask[tokens] = True
+        masks.append(mask)
+    return tokenized, masks
+
+def _forward(model, image_tensor, caption, device):
+    """
+    One monolithic model pass (fallback when staged inference isn't available)
+
+    Returns:
+        (token logits after sigmoid (queries, MAX_TEXT_LEN), normalized cxcywh boxes (queries, 4))
+    """
+    with torch.no_grad():
+        outputs = model(image_tensor[None].to(device), captions=[caption])
+    return outputs["pred_logits"].cpu().sigmoid()[0], outputs["pred_boxes"].cpu()[0]
+
+def set_mode(mode):
+    """
+    Switch between "stock" and "optimized" execution (reloads the model on next use)
+
+    Returns:
+        The active mode
+    """
+    global _mode, _model, _text_cache
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r} - expected one of {MODES}")
+    if mode != _mode:
+        _mode = mode
+        _model = None
+        if _feature_cache is not None:
+            _feature_cache.clear()
+        if _text_cache is not None:
+            _text_cache = TextEmbeddingCache(_text_cache.max_bytes / (1024 * 1024), _text_cache.path, _cache_model_id())
+    return _mode
+
+def set_feature_cache(max_mb=256, enabled=True):
+    """Replace (or disable) the per-frame backbone feature cache"""
+    global _feature_cache
+    _feature_cache = TensorLRU(max_mb) if enabled else None
+    return _feature_cache
+
+def set_text_cache(max_mb=64, path=None, enabled=True):
+    """Replace (or disable) the caption feature cache; path loads / persists it"""
+    global _text_cache
+    _text_cache = TextEmbeddingCache(max_mb, path, _cache_model_id()) if enabled else None
+    return _text_cache
+
+def _disable_staging(error):
+    global _staged
+    print(f"Staged inference unavailable ({error}) - using full forward pass", file=sys.stderr)
+    _staged = False
+
+def encode_image(model, image_tensor, device):
+    """
+    Image stage: Swin backbone + input projections (same steps as GroundingDINO.forward)
+    Text-independent - the fusion encoder that follows is cross-modal and can't be cached
+
+    Returns:
+        Dict with per-level "srcs", "masks" and "poss"
+    """
+    with torch.no_grad():
+        samples = nested_tensor_from_tensor_list([image_tensor.to(device)])
+        if getattr(model, "channels_last", False):
+            samples.tensors = samples.tensors.contiguous(memory_format=torch.channels_last)
+        features, poss = model.backbone(samples)
+
+        srcs, masks = [], []
+        for level, feature in enumerate(features):
+            src, mask = feature.decompose()
+            srcs.append(model.input_proj[level](src))
+            masks.append(mask)
+
+        # Extra (downsampled) levels beyond what the backbone returns
+        for level in range(len(srcs), model.num_feature_levels):
+            if level == len(features):
+                src = model.input_proj[level](features[-1].tensors)
+            else:
+                src = model.input_proj[level](srcs[-1])
+            mask = torch.nn.functional.interpolate(samples.mask[None].float(), size=src.shape[-2:]).to(torch.bool)[0]
+            pos = model.backbone[1](NestedTensor(src, mask)).to(src.dtype)
+            srcs.append(src)
+            masks.append(mask)
+            poss.append(pos)
+
+    return {"srcs": srcs, "masks": masks, "poss": list(poss)}
+
+def encode_text(model, caption, device):
+    """
+    Text stage: tokenize + BERT + feature map (same steps as GroundingDINO.forward)
+
+    Returns:
+        text_dict as the transformer expects it
+    """
+    max_len = model.max_text_len
+    with torch.no_grad():
+        tokenized = model.tokenizer([caption], padding="longest", return_tensors="pt").to(device)
+        attention_masks, position_ids, _ = generate_masks_with_special_tokens_and_transfer_map(
+            tokenized, model.specical_tokens, model.tokenizer
+        )
+
+        if attention_masks.shape[1] > max_len:
+            attention_masks = attention_masks[:, :max_len, :max_len]
+            position_ids = position_ids[:, :max_len]
+            for name in ("input_ids", "attention_mask", "token_type_ids"):
+                tokenized[name] = tokenized[name][:, :max_len]
+
+        if model.sub_sentence_present:
+            encoder_inputs = {k: v for k, v in tokenized.items() if k != "attention_mask"}
+            encoder_inputs["attention_mask"] = attention_masks
+            encoder_inputs["position_ids"] = position_ids
+        else:
+            encoder_inputs = tokenized
+
+        bert_output = model.bert(**encoder_inputs)
+        encoded_text = model.feat_map(bert_output["last_hidden_state"])[:, :max_len, :]
+
+    return {
+        "encoded_text": encoded_text,
+        "text_token_mask": tokenized.attention_mask.bool()[:, :max_len],
+        "position_ids": position_ids,
+        "text_self_attention_masks": attention_masks
+    }
+
+def decode(model, image_features, text_dict):
+    """
+    Fusion encoder + decoder + heads
+
+    Returns:
+        (token logits after sigmoid (queries, MAX_TEXT_LEN), normalized cxcywh boxes (queries, 4))
+    """
+    # The transformer overwrites text_dict["encoded_text"] - keep cached inputs intact
+    text_dict = dict(text_dict)
+    with torch.no_grad():
+        hs, reference, _, _, _ = model.transformer(
+            list(image_features["srcs"]), list(image_features["masks"]), None,
+            list(image_features["poss"]), None, None, text_dict
+        )
+
+        # Last decoder layer only (the full forward stacks every layer)
+        layer_hs = hs[-1]
+        boxes = (model.bbox_embed[-1](layer_hs) + inverse_sigmoid(reference[-2])).sigmoid()
+        logits = model.class_embed[-1](layer_hs, text_dict)
+
+    return logits.cpu().sigmoid()[0], boxes.cpu()[0]
+
+def prepare_text(model, prompts, device):
+    """
+    Caption, token maps and (when staged) text features for a prompt list,
+    from the text cache when this caption was seen before
+
+    Returns:
+        Dict with "caption", "input_ids", per-prompt token "masks" and "text_dict" (CPU tensors)
+    """
+    caption, spans = build_caption(prompts)
+    key = json.dumps([caption, spans])
+
+    text = _text_cache.get(key) if _text_cache is not None else None
+    if text is not None:
+        return text
+
+    tokenized, masks = prompt_token_masks(model.tokenizer, caption, spans)
+    text = {"caption": caption, "input_ids": list(tokenized["input_ids"]), "masks": masks}
+
+    if _staged:
+        try:
+            text["text_dict"] = {k: v.cpu() for k, v in encode_text(model, caption, device).items()}
+        except AttributeError as e:
+            _disable_staging(e)
+
+    if _text_cache is not None:
+        _text_cache.put(key, text)
+    return text
+
+def infer(model, frame, text, device):
+    """
+    Run GroundingDINO on a BGR frame, reusing cached backbone features for a
+    frame seen before and cached text features for a known caption
+
+    Args:
+        text: prepare_text result
+
+    Returns:
+        (token logits after sigmoid (queries, MAX_TEXT_LEN), normalized cxcywh boxes (queries, 4))
+    """
+    if _staged and "text_dict" in text:
+        try:
+            key = frame_hash(frame, {"device": device})
+            image_features = _feature_cache.get(key) if _feature_cache is not None else None
+            if image_features is None:
+                _, image_tensor = prepare_image(frame)
+                image_features = encode_image(model, image_tensor, device)
+                if _feature_cache is not None:
+                    _feature_cache.put(key, image_features)
+
+            text_dict = {k: v.to(device) for k, v in text["text_dict"].items()}
+            return decode(model, image_features, text_dict)
+
+        except AttributeError as e:
+            _disable_staging(e)
+
+    _, image_tensor = prepare_image(frame)
+    return _forward(model, image_tensor, text["caption"], device)
+
+def detect_ui_elements_multi(
     image_path,
-    text_prompt,
+    prompts,
     box_threshold=0.35,
     text_threshold=0.25,
+    thresholds=None,
     target_y=None,
-    y_tolerance=20
+    y_tolerance=20,
+    roi=None
 ):
     """
-    Detect UI elements using natural language description
+    Detect several kinds of UI elements with a single inference
+    All prompts share one caption ("play button . settings gear . close icon"),
+    so the image backbone runs once; each box goes to the prompt it matches best
 
     Args:
-        image_path: Path to screenshot
-        text_prompt: Natural language description (e.g., "green play button")
-        box_threshold: Detection confidence threshold (0-1)
-        text_threshold: Text matching threshold (0-1)
+        image_path: Path to screenshot, numpy BGR frame or PIL image
+        prompts: List of descriptions (e.g., ["play button", "settings gear"])
+        box_threshold: Default detection confidence threshold (0-1)
+        text_threshold: Token threshold for the reported phrase (0-1)
+        thresholds: Optional {prompt: box_threshold} overrides
         target_y: Optional Y coordinate to filter results
         y_tolerance: Tolerance for Y filtering
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
-        Dict with detected elements and their positions
+        Dict with per-prompt {"found", "count", "detections"} under "results"
     """
     if not HAS_GROUNDING_DINO:
         return {
@@ -117,36 +387,52 @@ def detect_ui_elements(
             "install": "pip install groundingdino-py"
         }
 
+    prompts = list(dict.fromkeys(prompts))
+    thresholds = thresholds or {}
+
     try:
         model, device = get_model()
         if model is None:
             return {"error": "Failed to load model", "found": False}
 
-        # Load and transform image
-        image_source, image_tensor = load_image(image_path)
-
-        # Run inference
-        boxes, logits, phrases = predict(
-            model=model,
-            image=image_tensor,
-            caption=text_prompt,
-            box_threshold=box_threshold,
-            text_threshold=text_threshold,
-            device=device
-        )
+        # Decode once (only the ROI crop is fed to the model when requested)
+        frame = load_bgr(image_path)
+        if frame is None:
+            return {"error": "Could not load image", "found": False}
 
-        # Convert boxes to pixel coordinates
-        h, w, _ = image_source.shape
-        boxes = boxes * torch.Tensor([w, h, w, h])
+        offset_x, offset_y = 0, 0
+        if roi is not None:
+            frame, offset_x, offset_y, roi = roi_view(frame, roi, target_y, y_tolerance)
+
+        text = prepare_text(model, prompts, device)
+        masks = text["masks"]
 
-        # Convert to xyxy format
-        boxes = boxes.cpu().numpy()
-        logits = logits.cpu().numpy()
+        # Run inference (once for every prompt; backbone skipped for a known frame)
+        logits, boxes = infer(model, frame, text, device)
 
-        results = []
+        # Per-prompt score of every query: best logit over that prompt's tokens
+        scores = torch.stack([
+            logits[:, mask].max(dim=1)[0] if mask is not None else torch.zeros(len(logits))
+            for mask in masks
+        ], dim=1)
+        best_scores, best_prompt = scores.max(dim=1)
 
-        for box, score, phrase in zip(boxes, logits, phrases):
-            x1, y1, x2, y2 = box
+        # Boxes are normalized (cx, cy, w, h) - convert to pixel xyxy
+        h, w = frame.shape[:2]
+        boxes = boxes * torch.Tensor([w, h, w, h])
+        xyxy = torch.cat([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], dim=1).numpy()
+
+        per_prompt = {prompt: [] for prompt in prompts}
+        for query in range(len(logits)):
+            index = int(best_prompt[query])
+            prompt = prompts[index]
+            score = float(best_scores[query])
+            if masks[index] is None or score <= thresholds.get(prompt, box_threshold):
+                continue
+
+            x1, y1, x2, y2 = xyxy[query]
+            x1, x2 = x1 + offset_x, x2 + offset_x
+            y1, y2 = y1 + offset_y, y2 + offset_y
             center_x = int((x1 + x2) / 2)
             center_y = int((y1 + y2) / 2)
 
@@ -155,22 +441,34 @@ def detect_ui_elements(
                 if abs(center_y - target_y) > y_tolerance:
                     continue
 
-            results.append({
-                "phrase": phrase,
+            posmap = (logits[query] > text_threshold) & masks[index]
+            phrase = get_phrases_from_posmap(posmap, text, model.tokenizer).replace(".", "").strip()
+
+            per_prompt[prompt].append({
+                "phrase": phrase or prompt,
                 "bbox": [int(x1), int(y1), int(x2), int(y2)],
                 "center": [center_x, center_y],
-                "confidence": float(score)
+                "confidence": score
             })
 
-        # Sort by confidence (highest first)
-        results.sort(key=lambda x: x["confidence"], reverse=True)
+        results = {}
+        for prompt, mask in zip(prompts, masks):
+            detections = sorted(per_prompt[prompt], key=lambda d: d["confidence"], reverse=True)
+            results[prompt] = {
+                "found": len(detections) > 0,
+                "count": len(detections),
+                "detections": detections
+            }
+            if mask is None:
+                results[prompt]["error"] = f"Prompt beyond the {MAX_TEXT_LEN}-token caption limit"
 
         return {
-            "found": len(results) > 0,
-            "count": len(results),
-            "prompt": text_prompt,
-            "detections": results,
-            "target_y": target_y
+            "found": any(r["found"] for r in results.values()),
+            "prompts": list(prompts),
+            "caption": text["caption"],
+            "results": results,
+            "target_y": target_y,
+            "roi": roi
         }
 
     except Exception as e:
@@ -179,24 +477,69 @@ def detect_ui_elements(
             "found": False
         }
 
+def detect_ui_elements(
+    image_path,
+    text_prompt,
+    box_threshold=0.35,
+    text_threshold=0.25,
+    target_y=None,
+    y_tolerance=20,
+    roi=None
+):
+    """
+    Detect UI elements using natural language description
+
+    Args:
+        image_path: Path to screenshot, numpy BGR frame or PIL image
+        text_prompt: Natural language description (e.g., "green play button")
+        box_threshold: Detection confidence threshold (0-1)
+        text_threshold: Text matching threshold (0-1)
+        target_y: Optional Y coordinate to filter results
+        y_tolerance: Tolerance for Y filtering
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+
+    Returns:
+        Dict with detected elements and their positions
+    """
+    result = detect_ui_elements_multi(
+        image_path,
+        [text_prompt],
+        box_threshold,
+        text_threshold,
+        target_y=target_y,
+        y_tolerance=y_tolerance,
+        roi=roi
+    )
+    if "results" not in result:
+        return result
+
+    return {
+        **result["results"][text_prompt],
+        "prompt": text_prompt,
+        "target_y": target_y,
+        "roi": result["roi"]
+    }
+
 def click_ui_element(
     image_path,
     text_prompt,
     box_threshold=0.35,
     text_threshold=0.25,
     target_y=None,
-    y_tolerance=20
+    y_tolerance=20,
+    roi=None
 ):
     """
     Detect UI element and return click coordinates
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame or PIL image
         text_prompt: Description of element to click
         box_threshold: Detection confidence threshold
         text_threshold: Text matching threshold
         target_y: Optional Y coordinate filter
         y_tolerance: Y tolerance
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
         Dict with detection info + click coordinates
@@ -207,7 +550,8 @@ def click_ui_element(
         box_threshold,
         text_threshold,
         target_y,
-        y_tolerance
+        y_tolerance,
+        roi
     )
 
     if result.get("found"):
@@ -226,18 +570,26 @@ if __name__ == "__main__":
             "error": "Usage:",
             "commands": {
                 "detect": "py detect_ui_grounding.py detect IMAGE 'text prompt' [box_thresh] [text_thresh]",
+                "multi": "py detect_ui_grounding.py multi IMAGE 'prompt1,prompt2:thresh,...' [box_thresh] [text_thresh]",
                 "click": "py detect_ui_grounding.py click IMAGE 'text prompt' [box_thresh] [text_thresh]",
-                "filter": "py detect_ui_grounding.py filter IMAGE 'text prompt' target_y [y_tolerance]"
+                "filter": "py detect_ui_grounding.py filter IMAGE 'text prompt' target_y [y_tolerance]",
+                "encode": "py detect_ui_grounding.py encode 'close button,OK,green play button'",
+                "text-cache": "py detect_ui_grounding.py text-cache [clear]"
             },
+            "text_cache": "Set CLAUDE_GROUNDING_TEXT_CACHE=DIR to keep encoded prompts across runs",
+            "mode": "Set CLAUDE_GROUNDING_MODE=optimized for the int8 / compiled CPU model (see grounding_optimize.py)",
             "examples": {
                 "detect": "py detect_ui_grounding.py detect temp.png 'green play button'",
+                "multi": "py detect_ui_grounding.py multi temp.png 'play button,settings gear:0.3,close icon'",
                 "click": "py detect_ui_grounding.py click temp.png 'circular play icon'",
                 "filter": "py detect_ui_grounding.py filter temp.png 'play button' 556 15"
             },
+            "roi": "Add --band (filter: only rows near target_y) or --roi X1,Y1,X2,Y2 to skip the rest of the screen",
             "note": "Uses GroundingDINO for semantic UI element detection"
         }, indent=2))
         sys.exit(1)
 
+    roi = pop_roi_arg(sys.argv)
     command = sys.argv[1].lower()
 
     if command == "detect":
@@ -245,21 +597,53 @@ if __name__ == "__main__":
         prompt = sys.argv[3]
         box_thresh = float(sys.argv[4]) if len(sys.argv) > 4 else 0.35
         text_thresh = float(sys.argv[5]) if len(sys.argv) > 5 else 0.25
-        result = detect_ui_elements(image, prompt, box_thresh, text_thresh)
+        result = detect_ui_elements(image, prompt, box_thresh, text_thresh, roi=roi)
+
+    elif command == "multi":
+        image = sys.argv[2]
+        prompts, thresholds = [], {}
+        for item in sys.argv[3].split(","):
+            prompt, _, thresh = item.partition(":")
+            if prompt.strip():
+                prompts.append(prompt.strip())
+                if thresh:
+                    thresholds[prompt.strip()] = float(thresh)
+        box_thresh = float(sys.argv[4]) if len(sys.argv) > 4 else 0.35
+        text_thresh = float(sys.argv[5]) if len(sys.argv) > 5 else 0.25
+        result = detect_ui_elements_multi(image, prompts, box_thresh, text_thresh, thresholds, roi=roi)
 
     elif command == "click":
         image = sys.argv[2]
         prompt = sys.argv[3]
         box_thresh = float(sys.argv[4]) if len(sys.argv) > 4 else 0.35
         text_thresh = float(sys.argv[5]) if len(sys.argv) > 5 else 0.25
-        result = click_ui_element(image, prompt, box_thresh, text_thresh)
+        result = click_ui_element(image, prompt, box_thresh, text_thresh, roi=roi)
 
     elif command == "filter":
         image = sys.argv[2]
         prompt = sys.argv[3]
         target_y = int(sys.argv[4]) if len(sys.argv) > 4 else None
         y_tolerance = int(sys.argv[5]) if len(sys.argv) > 5 else 20
-        result = click_ui_element(image, prompt, target_y=target_y, y_tolerance=y_tolerance)
+        result = click_ui_element(image, prompt, target_y=target_y, y_tolerance=y_tolerance, roi=roi)
+
+    elif command in ("encode", "text-cache"):
+        if _text_cache is None:
+            result = {"error": "GroundingDINO not installed"}
+        elif command == "text-cache":
+            if len(sys.argv) > 2 and sys.argv[2] == "clear":
+                _text_cache.clear(disk=True)
+            result = _text_cache.stats()
+        elif not _text_cache.path:
+            result = {"error": "Set CLAUDE_GROUNDING_TEXT_CACHE to a directory to persist encoded prompts"}
+        else:
+            # Pre-encode single prompts so later runs skip BERT for them
+            model, device = get_model()
+            if model is None:
+                result = {"error": "Failed to load model"}
+            else:
+                for prompt in [p for p in sys.argv[2].split(",") if p.strip()]:
+                    prepare_text(model, [prompt], device)
+                result = _text_cache.stats()
 
     else:
         result = {"error": f"Unknown command: {command}"}
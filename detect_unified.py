@@ -1,12 +1,14 @@
 """
 Unified UI Detection System
-Hierarchical detection: GroundingDINO → EasyOCR → OpenCV
+Hierarchical detection: Icon templates → GroundingDINO → EasyOCR → OpenCV
 Uses best available method automatically
 """
 import sys
 import json
 from pathlib import Path
 
+from vision_frame import Frame, resolve_roi
+
 # Import all detection methods
 try:
     from detect_ui_grounding import detect_ui_elements as grounding_detect
@@ -15,32 +17,41 @@ except:
     HAS_GROUNDING_DINO = False
 
 try:
-    from easy_ocr_vision import find_text as ocr_find
+    from easy_ocr_vision import find_texts as ocr_find_many
     HAS_EASYOCR = True
 except:
     HAS_EASYOCR = False
 
+try:
+    from detect_templates import detect_icon_description as template_detect
+    HAS_TEMPLATES = True
+except:
+    HAS_TEMPLATES = False
+
 try:
     from detect_ui_advanced import smart_detect as opencv_detect
     HAS_OPENCV = True
 except:
     HAS_OPENCV = False
 
-def unified_detect(image_path, description, target_y=None, y_tolerance=20, confidence=0.5):
+def unified_detect(image_path, description, target_y=None, y_tolerance=20, confidence=0.5, roi=None):
     """
     Unified detection with automatic fallback
 
     Hierarchy:
+    0. Icon templates (if the description names a library icon) - Fast, exact icons
     1. GroundingDINO (if available) - Best for UI elements
     2. EasyOCR (if text in description) - Best for text
     3. OpenCV Advanced (fallback) - Fast, always works
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame, PIL image or Frame
         description: Natural language description
         target_y: Optional Y coordinate filter
         y_tolerance: Y coordinate tolerance
         confidence: Minimum confidence threshold
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+             Every backend then processes only that region
 
     Returns:
         Dict with detection results + method used
@@ -52,6 +63,52 @@ def unified_detect(image_path, description, target_y=None, y_tolerance=20, confi
         "found": False
     }
 
+    # Decode once for all backends; the OpenCV tiers share the Frame's gray / blur /
+    # edge / color planes, the model backends get its pixels
+    frame = Frame.load(image_path)
+    if frame is None:
+        results["error"] = "Could not load image"
+        return results
+    pixels = frame.bgr
+
+    # Resolve the ROI once
+    if roi is not None:
+        try:
+            roi = resolve_roi(frame.shape, roi, target_y, y_tolerance)
+        except ValueError as e:
+            results["error"] = str(e)
+            return results
+        results["roi"] = roi
+
+    # Method 0: Icon library (only when the description names a saved icon)
+    if HAS_TEMPLATES:
+        try:
+            template_result = template_detect(
+                frame,
+                description,
+                target_y=target_y,
+                tolerance=y_tolerance,
+                roi=roi
+            )
+
+            if template_result.get("icons"):
+                print("Trying icon templates...", file=sys.stderr)
+                results["methods_tried"].append("Template")
+
+            if template_result.get("found"):
+                match = template_result["matches"][0]
+                results["found"] = True
+                results["method"] = "Template"
+                results["center"] = match["center"]
+                results["bbox"] = match["bbox"]
+                results["confidence"] = match["confidence"]
+                results["icon"] = match["icon"]
+                results["details"] = match
+                return results
+
+        except Exception as e:
+            print(f"Icon templates failed: {e}", file=sys.stderr)
+
     # Method 1: GroundingDINO (Priority #1)
     if HAS_GROUNDING_DINO:
         print("Trying GroundingDINO...", file=sys.stderr)
@@ -59,12 +116,13 @@ def unified_detect(image_path, description, target_y=None, y_tolerance=20, confi
 
         try:
             grounding_result = grounding_detect(
-                image_path,
+                pixels,
                 description,
                 box_threshold=0.30,
                 text_threshold=0.20,
                 target_y=target_y,
-                y_tolerance=y_tolerance
+                y_tolerance=y_tolerance,
+                roi=roi
             )
 
             if grounding_result.get("found"):
@@ -95,13 +153,14 @@ def unified_detect(image_path, description, target_y=None, y_tolerance=20, confi
         results["methods_tried"].append("EasyOCR")
 
         try:
-            # Try each potential text word
-            for search_word in potential_text:
-                ocr_result = ocr_find(image_path, search_word, confidence)
-
-                if ocr_result.get("found"):
-                    match = ocr_result["matches"][0]
+            # One OCR pass answers every candidate word (cost doesn't scale with words)
+            ocr_result = ocr_find_many(pixels, potential_text, confidence, roi=roi) if potential_text else {"results": {}}
+            if "error" in ocr_result:
+                raise RuntimeError(ocr_result["error"])
 
+            # Try each potential text word in description order
+            for search_word in potential_text:
+                for match in ocr_result["results"][search_word]["matches"]:
                     # Filter by Y if specified
                     if target_y is not None:
                         if abs(match["center"][1] - target_y) > y_tolerance:
@@ -126,10 +185,11 @@ def unified_detect(image_path, description, target_y=None, y_tolerance=20, confi
 
         try:
             opencv_result = opencv_detect(
-                image_path,
+                frame,
                 description,
                 target_y=target_y,
-                tolerance=y_tolerance
+                tolerance=y_tolerance,
+                roi=roi
             )
 
             if opencv_result.get("found"):
@@ -150,21 +210,22 @@ def unified_detect(image_path, description, target_y=None, y_tolerance=20, confi
     results["error"] = "No detection method succeeded"
     return results
 
-def click_unified(image_path, description, target_y=None, y_tolerance=20, confidence=0.5):
+def click_unified(image_path, description, target_y=None, y_tolerance=20, confidence=0.5, roi=None):
     """
     Detect and return click coordinates using unified detection
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame or PIL image
         description: Natural description of element to click
         target_y: Optional Y filter
         y_tolerance: Y tolerance
         confidence: Minimum confidence
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
 
     Returns:
         Dict with detection + click coordinates
     """
-    result = unified_detect(image_path, description, target_y, y_tolerance, confidence)
+    result = unified_detect(image_path, description, target_y, y_tolerance, confidence, roi)
 
     if result["found"]:
         result["should_click"] = True
@@ -174,24 +235,58 @@ def click_unified(image_path, description, target_y=None, y_tolerance=20, confid
 
     return result
 
+def capture_and_detect(description, target_y=None, y_tolerance=20, confidence=0.5, debug_path=None, roi=None):
+    """
+    Capture the screen and run unified detection on the in-memory frame
+    Never touches disk unless debug_path is given
+
+    Args:
+        description: Natural description of element to find
+        target_y: Optional Y filter
+        y_tolerance: Y tolerance
+        confidence: Minimum confidence
+        debug_path: Optional path to also save the captured frame
+        roi: None (full frame), "band" (only rows near target_y) or [x1, y1, x2, y2]
+
+    Returns:
+        unified_detect result
+    """
+    from claude_vision import capture_frame
+
+    frame = capture_frame()
+    if debug_path:
+        import cv2
+        cv2.imwrite(debug_path, frame)
+
+    result = unified_detect(frame, description, target_y, y_tolerance, confidence, roi)
+    result["screen"] = {"width": frame.shape[1], "height": frame.shape[0]}
+    if debug_path:
+        result["debug_file"] = debug_path
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({
             "error": "Usage:",
             "commands": {
                 "detect": "py detect_unified.py detect IMAGE 'description' [target_y] [tolerance] [conf]",
-                "click": "py detect_unified.py click IMAGE 'description' [target_y] [tolerance] [conf]"
+                "click": "py detect_unified.py click IMAGE 'description' [target_y] [tolerance] [conf]",
+                "live": "py detect_unified.py live 'description' [target_y] [tolerance] [conf]"
             },
             "examples": {
                 "detect": "py detect_unified.py detect temp.png 'green play button' 556 15",
-                "click": "py detect_unified.py click temp.png 'Solo button' 0.5"
+                "click": "py detect_unified.py click temp.png 'Solo button' 0.5",
+                "live": "py detect_unified.py live 'Solo button'"
             },
+            "roi": "Add --band (only rows near target_y) or --roi X1,Y1,X2,Y2 so every backend skips the rest of the screen",
             "hierarchy": [
+                "0. Icon templates (library icons named in the description, fast)",
                 "1. GroundingDINO (semantic understanding, best accuracy)",
                 "2. EasyOCR (text detection, 99% accuracy)",
                 "3. OpenCV Advanced (color+shape, fast fallback)"
             ],
             "available": {
+                "Templates": HAS_TEMPLATES,
                 "GroundingDINO": HAS_GROUNDING_DINO,
                 "EasyOCR": HAS_EASYOCR,
                 "OpenCV": HAS_OPENCV
@@ -199,6 +294,8 @@ if __name__ == "__main__":
         }, indent=2))
         sys.exit(1)
 
+    from vision_frame import pop_roi_arg
+    roi = pop_roi_arg(sys.argv)
     command = sys.argv[1].lower()
 
     if command == "detect":
@@ -207,7 +304,7 @@ if __name__ == "__main__":
         target_y = int(sys.argv[4]) if len(sys.argv) > 4 else None
         tolerance = int(sys.argv[5]) if len(sys.argv) > 5 else 20
         conf = float(sys.argv[6]) if len(sys.argv) > 6 else 0.5
-        result = unified_detect(image, description, target_y, tolerance, conf)
+        result = unified_detect(image, description, target_y, tolerance, conf, roi)
 
     elif command == "click":
         image = sys.argv[2]
@@ -215,7 +312,15 @@ if __name__ == "__main__":
         target_y = int(sys.argv[4]) if len(sys.argv) > 4 else None
         tolerance = int(sys.argv[5]) if len(sys.argv) > 5 else 20
         conf = float(sys.argv[6]) if len(sys.argv) > 6 else 0.5
-        result = click_unified(image, description, target_y, tolerance, conf)
+        result = click_unified(image, description, target_y, tolerance, conf, roi)
+
+    elif command == "live":
+        # Capture + detect in memory (no temp_screen.png round trip)
+        description = sys.argv[2]
+        target_y = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        tolerance = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+        conf = float(sys.argv[5]) if len(sys.argv) > 5 else 0.5
+        result = capture_and_detect(description, target_y, tolerance, conf, roi=roi)
 
     else:
         result = {"error": f"Unknown command: {command}"}
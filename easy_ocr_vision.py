@@ -7,51 +7,284 @@ import sys
 import json
 import os
 
+from tuning import load_tuning, apply_torch_threads
+
 try:
     import easyocr
     import cv2
     import numpy as np
     from PIL import Image
+    from vision_frame import is_path, load_bgr, roi_view, pop_roi_arg
+    from ocr_cache import OCRCache
+    from text_index import TextIndex
     HAS_EASYOCR = True
 except ImportError:
     HAS_EASYOCR = False
 
+# Host-specific threads / batch size / scale from 'py benchmark.py tune'
+_tuning = load_tuning()
+
+# Reader settings - also part of the OCR cache key
+# precision: fp32, dynamic (EasyOCR default) or int8 - see ocr_quantize.py
+# scale: frames are resized by this factor before OCR (boxes mapped back)
+READER_CONFIG = {
+    "languages": ["en"],
+    "gpu": False,
+    "precision": os.environ.get("CLAUDE_OCR_PRECISION", "dynamic"),
+    "batch_size": _tuning["ocr_batch_size"],
+    "scale": _tuning["ocr_scale"]
+}
+
 # Initialize EasyOCR reader (lazy loading)
 _reader = None
+# What the reader actually runs (int8 can fall back to an fp32 detector)
+_reader_status = {}
+
+# Fast search mode: text detection runs on a frame downscaled by this factor
+FAST_DETECT_SCALE = 0.5
+# Narrowest plausible glyph as a fraction of line height ('i', 'l', '1')
+MIN_CHAR_ASPECT = 0.25
+
+# Raw readtext results keyed by pixel hash (CLAUDE_OCR_CACHE_DIR adds a disk store)
+_cache = OCRCache(disk_dir=os.environ.get("CLAUDE_OCR_CACHE_DIR")) if HAS_EASYOCR else None
+
+def build_reader(precision="dynamic"):
+    """
+    Create an EasyOCR reader at the given precision (fp32, dynamic, int8)
+    int8 swaps in the static int8 detector (quantized and cached on first use)
+    """
+    # English only, CPU mode, no progress bar
+    reader = easyocr.Reader(
+        READER_CONFIG["languages"],
+        gpu=READER_CONFIG["gpu"],
+        quantize=precision != "fp32",
+        verbose=False
+    )
+
+    _reader_status.clear()
+    _reader_status["precision"] = precision
+
+    if precision == "int8":
+        from ocr_quantize import load_or_build_detector
+        detector, status = load_or_build_detector(reader)
+        _reader_status.update(status)
+        if detector is None:
+            print(f"int8 detector unavailable ({status['error']}) - detector stays fp32", file=sys.stderr)
+        else:
+            reader.detector = detector
+
+    return reader
+
+def reader_info():
+    """Precision the loaded reader runs at ("error" if int8 fell back to fp32)"""
+    return dict(_reader_status)
+
+def _with_reader_warning(result):
+    """Flag results produced by a reader that couldn't run at the requested precision"""
+    if "error" in _reader_status:
+        result["reader_warning"] = f"{_reader_status['precision']} requested, detector is fp32: {_reader_status['error']}"
+    return result
 
 def get_reader():
     """Lazy load EasyOCR reader"""
     global _reader
     if _reader is None:
         print("Initializing EasyOCR (first time only)...", file=sys.stderr)
-        _reader = easyocr.Reader(['en'], gpu=False, verbose=False)  # English only, CPU mode, no progress bar
+        apply_torch_threads(_tuning)
+        _reader = build_reader(READER_CONFIG["precision"])
     return _reader
 
-def find_text(image_path, search_text, confidence=0.5):
+def set_precision(precision):
+    """Switch reader precision (the reader is rebuilt on next use)"""
+    global _reader
+    if precision not in ("fp32", "dynamic", "int8"):
+        raise ValueError(f"Unknown precision: {precision}")
+    READER_CONFIG["precision"] = precision
+    _reader = None
+
+def set_cache(max_entries=64, disk_dir=None, enabled=True):
+    """Replace (or disable) the OCR result cache"""
+    global _cache
+    _cache = OCRCache(max_entries, disk_dir) if enabled else None
+    return _cache
+
+def readtext(pixels):
+    """reader.readtext with the tuned batch size and input scale (boxes in input coordinates)"""
+    scale = READER_CONFIG["scale"]
+    batch_size = READER_CONFIG["batch_size"]
+    if scale == 1 or not isinstance(pixels, np.ndarray):
+        return get_reader().readtext(pixels, batch_size=batch_size)
+
+    small = cv2.resize(pixels, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return [
+        ([[point[0] / scale, point[1] / scale] for point in bbox], text, conf)
+        for (bbox, text, conf) in get_reader().readtext(small, batch_size=batch_size)
+    ]
+
+def readtext_cached(pixels):
+    """
+    reader.readtext on a BGR array, answered from the cache when these exact
+    pixels were already read with the same reader configuration
+    """
+    if _cache is None:
+        return readtext(pixels)
+
+    key = OCRCache.key(pixels, READER_CONFIG)
+    results = _cache.get(key)
+    if results is None:
+        results = _cache.put(key, readtext(pixels))
+    return results
+
+def ocr_input(image):
+    """
+    Convert any image input to something reader.readtext accepts
+    Paths are passed through; frames are decoded once to BGR (EasyOCR's ndarray convention)
+    """
+    if is_path(image):
+        return os.fspath(image)
+
+    img = load_bgr(image)
+    if img is None:
+        raise ValueError("Could not load image")
+    return img
+
+def run_readtext(image_path, roi=None):
+    """
+    Run reader.readtext on the whole image or only its ROI rectangle
+
+    Returns:
+        (readtext results with bbox points in screen coordinates, resolved ROI or None)
+    """
+    if roi is None and _cache is None and READER_CONFIG["scale"] == 1:
+        return readtext(ocr_input(image_path)), None
+
+    img = load_bgr(image_path)
+    if img is None:
+        raise ValueError("Could not load image")
+
+    view, offset_x, offset_y, roi = roi_view(img, roi)
+    results = readtext_cached(view)
+    if offset_x or offset_y:
+        results = [
+            ([[point[0] + offset_x, point[1] + offset_y] for point in bbox], text, conf)
+            for (bbox, text, conf) in results
+        ]
+    return results, roi
+
+def run_readtext_fast(image_path, search_texts, roi=None, scale=FAST_DETECT_SCALE):
+    """
+    Coarse-to-fine OCR for searches: detect text boxes on a downscaled frame,
+    drop boxes too narrow to hold the shortest query, and recognize only the
+    remaining boxes at full resolution
+
+    Returns:
+        (readtext-style results in screen coordinates, resolved ROI or None, stats dict)
+    """
+    img = load_bgr(image_path)
+    if img is None:
+        raise ValueError("Could not load image")
+
+    view, offset_x, offset_y, roi = roi_view(img, roi)
+    reader = get_reader()
+
+    small = cv2.resize(view, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale != 1 else view
+    horizontal_list, free_list = reader.detect(small, min_size=max(4, int(20 * scale)))
+    horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+    # A box can only contain the query if it is at least this many line heights wide
+    min_chars = min(len(text.strip()) for text in search_texts)
+    min_ratio = min_chars * MIN_CHAR_ASPECT
+
+    candidates = []
+    for x_min, x_max, y_min, y_max in horizontal_list:
+        width, height = x_max - x_min, y_max - y_min
+        if height > 0 and width >= height * min_ratio:
+            candidates.append([int(x_min / scale), int(x_max / scale), int(y_min / scale), int(y_max / scale)])
+
+    # Rotated boxes are rare on UIs - keep them all
+    free_candidates = [[[int(x / scale), int(y / scale)] for x, y in box] for box in free_list]
+
+    results = []
+    if candidates or free_candidates:
+        results = reader.recognize(
+            view,
+            horizontal_list=candidates,
+            free_list=free_candidates,
+            batch_size=READER_CONFIG["batch_size"]
+        )
+
+    if offset_x or offset_y:
+        results = [
+            ([[point[0] + offset_x, point[1] + offset_y] for point in bbox], text, conf)
+            for (bbox, text, conf) in results
+        ]
+
+    stats = {
+        "detected": len(horizontal_list) + len(free_list),
+        "recognized": len(candidates) + len(free_candidates)
+    }
+    return results, roi, stats
+
+def find_text(image_path, search_text, confidence=0.5, roi=None, fast=False, fuzzy=False):
     """
     Find text on screen using EasyOCR
     Returns exact coordinates of bounding boxes
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame or PIL image
         search_text: Text to find (e.g., "Solo", "Play")
         confidence: Minimum OCR confidence (0.0-1.0)
+        roi: Optional [x1, y1, x2, y2] - only OCR this rectangle
+        fast: Coarse-to-fine search (recognize only boxes that could hold the text)
+        fuzzy: Typo-tolerant match (OCR confusions like "So1o", small edit distance)
 
     Returns:
         Dict with matches and exact coordinates
     """
+    result = find_texts(image_path, [search_text], confidence, roi, fast, fuzzy)
+    if "error" in result:
+        return result
+
+    found = {
+        **result["results"][search_text],
+        "search": search_text,
+        "roi": result["roi"]
+    }
+    for key in ("fast", "reader_warning"):
+        if key in result:
+            found[key] = result[key]
+    return found
+
+def find_texts(image_path, search_texts, confidence=0.5, roi=None, fast=False, fuzzy=False):
+    """
+    Find several texts with a single OCR pass
+    Recognition runs once; each query is just a scan of the recognized boxes
+
+    Args:
+        image_path: Path to screenshot, numpy BGR frame or PIL image
+        search_texts: List of texts to find (e.g., ["Solo", "Play", "Quit"])
+        confidence: Minimum OCR confidence (0.0-1.0)
+        roi: Optional [x1, y1, x2, y2] - only OCR this rectangle
+        fast: Coarse-to-fine search (low-res detection, recognize candidates only)
+        fuzzy: Rank matches by edit distance through a TextIndex (best first)
+
+    Returns:
+        Dict with per-query {"found", "count", "matches"} under "results"
+    """
     if not HAS_EASYOCR:
         return {"error": "easyocr not installed", "found": False}
 
     try:
-        reader = get_reader()
-
-        # Read text from image
-        results = reader.readtext(image_path)
-
-        matches = []
+        # Read text from image (once for every query)
+        stats = None
+        if fast and search_texts:
+            results, roi, stats = run_readtext_fast(image_path, search_texts, roi)
+        else:
+            results, roi = run_readtext(image_path, roi)
+
+        boxes = []
         for (bbox, text, conf) in results:
-            if search_text.lower() in text.lower() and conf >= confidence:
+            if conf >= confidence:
                 # bbox is [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
                 # Convert to [x1, y1, x2, y2] format
                 x_coords = [point[0] for point in bbox]
@@ -60,34 +293,52 @@ def find_text(image_path, search_text, confidence=0.5):
                 x1, x2 = int(min(x_coords)), int(max(x_coords))
                 y1, y2 = int(min(y_coords)), int(max(y_coords))
 
-                matches.append({
+                boxes.append((text.lower(), {
                     "text": text,
                     "bbox": [x1, y1, x2, y2],
                     "center": [(x1 + x2) // 2, (y1 + y2) // 2],
                     "confidence": round(conf, 3)
-                })
-
-        return {
-            "found": len(matches) > 0,
-            "count": len(matches),
-            "matches": matches,
-            "search": search_text
+                }))
+
+        index = TextIndex([match for _, match in boxes]) if fuzzy else None
+
+        per_query = {}
+        for search_text in search_texts:
+            if index is not None:
+                matches = index.search(search_text)
+            else:
+                needle = search_text.lower()
+                matches = [match for text, match in boxes if needle in text]
+            per_query[search_text] = {
+                "found": len(matches) > 0,
+                "count": len(matches),
+                "matches": matches
+            }
+
+        result = {
+            "found": any(r["found"] for r in per_query.values()),
+            "searches": list(search_texts),
+            "results": per_query,
+            "roi": roi
         }
+        if stats is not None:
+            result["fast"] = stats
+        return _with_reader_warning(result)
 
     except Exception as e:
         return {"error": str(e), "found": False}
 
-def find_all_text(image_path, min_confidence=0.5):
+def find_all_text(image_path, min_confidence=0.5, roi=None):
     """
     Extract ALL text from screen with positions
     Useful for debugging/exploration
+    Pass roi=[x1, y1, x2, y2] to only OCR that rectangle
     """
     if not HAS_EASYOCR:
         return {"error": "easyocr not installed"}
 
     try:
-        reader = get_reader()
-        results = reader.readtext(image_path)
+        results, roi = run_readtext(image_path, roi)
 
         texts = []
         for (bbox, text, conf) in results:
@@ -105,48 +356,74 @@ def find_all_text(image_path, min_confidence=0.5):
                     "confidence": round(conf, 3)
                 })
 
-        return {
+        return _with_reader_warning({
             "count": len(texts),
-            "texts": texts
-        }
+            "texts": texts,
+            "roi": roi
+        })
 
     except Exception as e:
         return {"error": str(e)}
 
-def click_text(image_path, search_text, confidence=0.5, move_duration=0.5, click_delay=0.25):
+def compare_search(image_path, search_texts, confidence=0.5, roi=None):
+    """
+    Run the fast and exhaustive search paths on the same image
+    Reports timings and whether both found the same matches
+    """
+    import time
+
+    if not search_texts:
+        return {"error": "compare needs at least one search text"}
+
+    timings = {}
+    outputs = {}
+    for mode, fast in (("exhaustive", False), ("fast", True)):
+        start = time.perf_counter()
+        outputs[mode] = find_texts(image_path, search_texts, confidence, roi, fast=fast)
+        timings[mode] = round((time.perf_counter() - start) * 1000, 1)
+        if "error" in outputs[mode]:
+            return outputs[mode]
+
+    queries = {}
+    for search_text in search_texts:
+        expected = {tuple(m["bbox"]) for m in outputs["exhaustive"]["results"][search_text]["matches"]}
+        got = {tuple(m["bbox"]) for m in outputs["fast"]["results"][search_text]["matches"]}
+        queries[search_text] = {
+            "exhaustive": len(expected),
+            "fast": len(got),
+            "missed": len(expected - got)
+        }
+
+    return {
+        "ms": timings,
+        "speedup": round(timings["exhaustive"] / max(timings["fast"], 0.1), 2),
+        "fast": outputs["fast"].get("fast"),
+        "queries": queries,
+        "same": all(q["exhaustive"] == q["fast"] and q["missed"] == 0 for q in queries.values())
+    }
+
+def click_text(image_path, search_text, confidence=0.5, move_duration=0.5, click_delay=0.25, roi=None, fast=False, fuzzy=False):
     """
     Find text and click on it automatically
     No coordinate estimation needed!
 
     Args:
-        image_path: Path to screenshot
+        image_path: Path to screenshot, numpy BGR frame or PIL image
         search_text: Text to find and click
         confidence: Minimum OCR confidence (0.0-1.0)
         move_duration: Time in seconds for smooth mouse movement (default 0.5s)
         click_delay: Delay in seconds between arrival and click (default 0.25s)
+        roi: Optional [x1, y1, x2, y2] - only OCR this rectangle
+        fast: Coarse-to-fine search (see run_readtext_fast)
+        fuzzy: Typo-tolerant match - clicks the closest match
     """
-    result = find_text(image_path, search_text, confidence)
+    result = find_text(image_path, search_text, confidence, roi=roi, fast=fast, fuzzy=fuzzy)
+    return click_result(result, move_duration, click_delay)
 
-    if result.get("found"):
-        import pyautogui
-        import time
-
-        match = result["matches"][0]
-        x, y = match["center"]
-
-        # Smooth movement to destination (lerp)
-        pyautogui.moveTo(x, y, duration=move_duration)
-
-        # Wait before clicking (more human-like)
-        time.sleep(click_delay)
-
-        # Click
-        pyautogui.click()
-
-        result["clicked"] = True
-        result["clicked_at"] = {"x": x, "y": y}
-
-    return result
+def click_result(result, move_duration=0.5, click_delay=0.25):
+    """Click the first match of a find_text result (see mouse_control.click_result)"""
+    from mouse_control import click_result as click
+    return click(result, move_duration, click_delay)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -154,32 +431,73 @@ if __name__ == "__main__":
             "error": "Usage:",
             "commands": {
                 "text": "py easy_ocr_vision.py text IMAGE 'Search Text' [conf]",
+                "texts": "py easy_ocr_vision.py texts IMAGE 'Solo,Play,Quit' [conf]",
                 "all": "py easy_ocr_vision.py all IMAGE [conf]",
-                "click": "py easy_ocr_vision.py click IMAGE 'Text' [conf]"
+                "click": "py easy_ocr_vision.py click IMAGE 'Text' [conf]",
+                "compare": "py easy_ocr_vision.py compare IMAGE 'Solo,Play' [conf]",
+                "cache": "py easy_ocr_vision.py cache [clear]"
             },
+            "fast": "Add --fast to text/texts/click: low-res detection, recognize only plausible boxes",
+            "fuzzy": "Add --fuzzy to text/texts/click: tolerate OCR typos (So1o, Se7tings), best match first",
+            "cache": "Set CLAUDE_OCR_CACHE_DIR to reuse OCR results across runs; --no-cache disables",
+            "roi": "Add --roi X1,Y1,X2,Y2 to only OCR that rectangle",
             "note": "Pure Python OCR - no external dependencies!",
             "first_run": "First run downloads OCR models (~100MB)"
         }, indent=2))
         sys.exit(1)
 
+    roi = pop_roi_arg(sys.argv) if HAS_EASYOCR else None
+    if roi == "band":
+        # OCR commands have no target_y to center a band on
+        print(json.dumps({"error": "--band is not supported by OCR commands - use --roi X1,Y1,X2,Y2"}, indent=2))
+        sys.exit(1)
+    if "--no-cache" in sys.argv:
+        sys.argv.remove("--no-cache")
+        set_cache(enabled=False)
+    fast = "--fast" in sys.argv
+    if fast:
+        sys.argv.remove("--fast")
+    fuzzy = "--fuzzy" in sys.argv
+    if fuzzy:
+        sys.argv.remove("--fuzzy")
     command = sys.argv[1].lower()
 
     if command == "text":
         image = sys.argv[2]
         search = sys.argv[3]
         conf = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
-        result = find_text(image, search, conf)
+        result = find_text(image, search, conf, roi=roi, fast=fast, fuzzy=fuzzy)
+
+    elif command == "texts":
+        image = sys.argv[2]
+        searches = [t for t in sys.argv[3].split(",") if t]
+        conf = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+        result = find_texts(image, searches, conf, roi=roi, fast=fast, fuzzy=fuzzy)
 
     elif command == "all":
         image = sys.argv[2]
         conf = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
-        result = find_all_text(image, conf)
+        result = find_all_text(image, conf, roi=roi)
 
     elif command == "click":
         image = sys.argv[2]
         search = sys.argv[3]
         conf = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
-        result = click_text(image, search, conf)
+        result = click_text(image, search, conf, roi=roi, fast=fast, fuzzy=fuzzy)
+
+    elif command == "compare":
+        image = sys.argv[2]
+        searches = [t for t in sys.argv[3].split(",") if t]
+        conf = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+        result = compare_search(image, searches, conf, roi=roi)
+
+    elif command == "cache":
+        if _cache is None:
+            result = {"error": "OCR cache disabled"}
+        else:
+            if len(sys.argv) > 2 and sys.argv[2] == "clear":
+                _cache.clear(disk=True)
+            result = _cache.stats()
 
     else:
         result = {"error": f"Unknown command: {command}"}
@@ -0,0 +1,356 @@
+"""
+Capture Ring Buffer
+Background thread writes timestamped frames at a fixed FPS into a ring
+buffer backed by a memory-mapped file:
+- memory stays bounded (capacity frames, no growth)
+- another process - or a post-mortem after a crash - can open the file and read it
+- "latest frame", "frame at time t" and "frames since seq N" without re-capturing
+
+File layout:
+    64-byte header: magic, version, width, height, channels, capacity,
+                    slot_size, latest_seq, fps
+    index: capacity x (seq, timestamp)
+    slots: capacity x raw BGR frame
+"""
+import sys
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+MAGIC = b"CVRB"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIIQQd")
+HEADER_SIZE = 64
+LATEST_SEQ_OFFSET = struct.calcsize("<4sIIIIIQ")
+INDEX_DTYPE = np.dtype([("seq", "<u8"), ("timestamp", "<f8")])
+
+DEFAULT_RING_FILE = "screen_ring.bin"
+
+class FrameRing:
+    """
+    Fixed-size frame ring in a memory-mapped file
+
+    Create with FrameRing.create(...) (writer) or FrameRing.open(...) (reader)
+    Frame views returned by readers alias the file: a slot is reused after
+    `capacity` more frames, so pass copy=True to keep a frame longer
+    """
+
+    def __init__(self, path, mm, fileobj, writable):
+        self.path = path
+        self._mm = mm
+        self._file = fileobj
+        self.writable = writable
+
+        if len(mm) < HEADER.size:
+            raise ValueError(f"{path} is not a frame ring file")
+        magic, version, width, height, channels, capacity, slot_size, _, fps = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame ring file")
+        if len(mm) < _data_offset(capacity) + capacity * slot_size:
+            raise ValueError(f"{path} is truncated")
+
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.fps = fps
+
+        self._index = np.frombuffer(mm, dtype=INDEX_DTYPE, count=capacity, offset=HEADER_SIZE)
+        self._data_offset = _data_offset(capacity)
+
+    @classmethod
+    def create(cls, path, width, height, capacity=64, channels=3, fps=0.0):
+        """Create (or overwrite) a ring file sized for capacity frames"""
+        slot_size = width * height * channels
+        size = _data_offset(capacity) + capacity * slot_size
+
+        fileobj = open(path, "w+b")
+        fileobj.truncate(size)
+        mm = mmap.mmap(fileobj.fileno(), size)
+        HEADER.pack_into(mm, 0, MAGIC, VERSION, width, height, channels, capacity, slot_size, 0, fps)
+        return cls(path, mm, fileobj, writable=True)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open an existing ring file read-only (live or left behind by a crash)
+
+        Raises:
+            OSError if the file can't be read, ValueError if it isn't a complete ring file
+        """
+        fileobj = open(path, "rb")
+        try:
+            mm = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(path, mm, fileobj, writable=False)
+        except Exception:
+            fileobj.close()
+            raise
+
+    @property
+    def latest_seq(self):
+        return HEADER.unpack_from(self._mm, 0)[7]
+
+    def _slot(self, seq):
+        return (seq - 1) % self.capacity
+
+    def _view(self, slot):
+        shape = (self.height, self.width, self.channels) if self.channels > 1 else (self.height, self.width)
+        return np.frombuffer(
+            self._mm,
+            dtype=np.uint8,
+            count=self.slot_size,
+            offset=self._data_offset + slot * self.slot_size
+        ).reshape(shape)
+
+    def write(self, frame, convert=None, timestamp=None):
+        """
+        Append a frame (overwriting the oldest once full)
+
+        Args:
+            frame: uint8 numpy image of the ring's size
+            convert: Optional cv2 color conversion applied while copying in
+            timestamp: Capture time (defaults to now)
+
+        Returns:
+            Sequence number of the written frame
+        """
+        seq = self.latest_seq + 1
+        slot = self._slot(seq)
+
+        # Invalidate the slot first so readers never pair new pixels with old metadata
+        self._index["seq"][slot] = 0
+        view = self._view(slot)
+        if convert is not None:
+            cv2.cvtColor(frame, convert, dst=view)
+        else:
+            view[...] = frame
+
+        self._index["timestamp"][slot] = time.time() if timestamp is None else timestamp
+        self._index["seq"][slot] = seq
+        struct.pack_into("<Q", self._mm, LATEST_SEQ_OFFSET, seq)
+        return seq
+
+    def _read(self, slot, seq, copy):
+        frame = self._view(slot)
+        if copy:
+            frame = frame.copy()
+        # Writer lapped us while reading - slot now holds a different frame
+        if int(self._index[slot]["seq"]) != seq:
+            return None
+        return frame
+
+    def latest(self, copy=False):
+        """
+        Most recent frame
+
+        Returns:
+            (frame, seq, timestamp) or None if nothing was written yet
+        """
+        for _ in range(3):
+            seq = self.latest_seq
+            if seq == 0:
+                return None
+            slot = self._slot(seq)
+            timestamp = float(self._index[slot]["timestamp"])
+            frame = self._read(slot, seq, copy)
+            if frame is not None:
+                return frame, seq, timestamp
+        return None
+
+    def at(self, t, copy=False):
+        """
+        Frame that was on screen at time t (newest frame captured at or before t)
+
+        Args:
+            t: Unix timestamp (see ago() for relative times)
+
+        Returns:
+            (frame, seq, timestamp) or None if t is older than the buffer
+        """
+        index = self._index.copy()
+        valid = (index["seq"] > 0) & (index["timestamp"] <= t)
+        if not valid.any():
+            return None
+
+        slot = int(np.argmax(np.where(valid, index["timestamp"], -np.inf)))
+        seq = int(index[slot]["seq"])
+        frame = self._read(slot, seq, copy)
+        if frame is None:
+            return None
+        return frame, seq, float(index[slot]["timestamp"])
+
+    def since(self, seq, copy=False):
+        """
+        All frames still in the buffer with sequence number > seq, oldest first
+
+        Returns:
+            List of (frame, seq, timestamp)
+        """
+        index = self._index.copy()
+        slots = np.nonzero(index["seq"] > seq)[0]
+        slots = slots[np.argsort(index["seq"][slots])]
+
+        frames = []
+        for slot in slots:
+            entry_seq = int(index[slot]["seq"])
+            frame = self._read(int(slot), entry_seq, copy)
+            if frame is not None:
+                frames.append((frame, entry_seq, float(index[slot]["timestamp"])))
+        return frames
+
+    def info(self):
+        index = self._index.copy()
+        valid = index[index["seq"] > 0]
+        return {
+            "file": self.path,
+            "width": self.width,
+            "height": self.height,
+            "channels": self.channels,
+            "capacity": self.capacity,
+            "fps": self.fps,
+            "latest_seq": self.latest_seq,
+            "frames": int(len(valid)),
+            "oldest": float(valid["timestamp"].min()) if len(valid) else None,
+            "newest": float(valid["timestamp"].max()) if len(valid) else None
+        }
+
+    def close(self):
+        self._index = None
+        if self.writable:
+            self._mm.flush()
+        try:
+            self._mm.close()
+        except BufferError:
+            # Frame views still alive - the map is released when they are
+            pass
+        self._file.close()
+
+def _data_offset(capacity):
+    # Keep frame slots 64-byte aligned after the index table
+    end = HEADER_SIZE + capacity * INDEX_DTYPE.itemsize
+    return (end + 63) // 64 * 64
+
+def ago(seconds):
+    """Timestamp for 'seconds ago' - use with FrameRing.at"""
+    return time.time() - seconds
+
+class RingRecorder(threading.Thread):
+    """
+    Background capture thread feeding a FrameRing at a fixed FPS
+
+    Args:
+        ring: Writable FrameRing
+        fps: Target captures per second
+        grab: Callable returning an RGB numpy screenshot (defaults to pyautogui)
+    """
+
+    def __init__(self, ring, fps=10.0, grab=None):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.fps = fps
+        self.grab = grab or _grab_screen
+        self.frames = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        interval = 1.0 / self.fps
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                timestamp = time.time()
+                self.ring.write(self.grab(), convert=cv2.COLOR_RGB2BGR, timestamp=timestamp)
+                self.frames += 1
+                self._stop_event.wait(max(0.0, interval - (time.perf_counter() - start)))
+        except Exception as e:
+            self.error = str(e)
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self.join(timeout)
+
+def _grab_screen():
+    import pyautogui
+    return np.asarray(pyautogui.screenshot())
+
+def start_recording(path=DEFAULT_RING_FILE, fps=10.0, capacity=64):
+    """
+    Create a ring file sized for the current screen and start capturing into it
+
+    Returns:
+        (FrameRing, RingRecorder) - call recorder.stop() then ring.close()
+    """
+    first = _grab_screen()
+    height, width = first.shape[:2]
+
+    ring = FrameRing.create(path, width, height, capacity, fps=fps)
+    recorder = RingRecorder(ring, fps)
+    recorder.start()
+    return ring, recorder
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "info": "py frame_ring.py info RING_FILE",
+                "latest": "py frame_ring.py latest RING_FILE OUT.png",
+                "at": "py frame_ring.py at RING_FILE SECONDS_AGO OUT.png",
+                "since": "py frame_ring.py since RING_FILE SEQ [OUT_DIR]"
+            },
+            "record": "py claude_vision.py record [RING_FILE] [fps] [seconds] [capacity]",
+            "note": "Ring files stay readable after the recording process exits or crashes"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+    try:
+        ring = FrameRing.open(sys.argv[2])
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": str(e)}, indent=2))
+        sys.exit(1)
+
+    if command == "info":
+        result = ring.info()
+
+    elif command in ("latest", "at"):
+        if command == "latest":
+            entry = ring.latest(copy=True)
+            out = sys.argv[3] if len(sys.argv) > 3 else "ring_latest.png"
+        else:
+            entry = ring.at(ago(float(sys.argv[3])), copy=True)
+            out = sys.argv[4] if len(sys.argv) > 4 else "ring_at.png"
+
+        if entry is None:
+            result = {"error": "No frame available"}
+        else:
+            frame, seq, timestamp = entry
+            cv2.imwrite(out, frame)
+            result = {"file": out, "seq": seq, "timestamp": timestamp, "age_s": round(time.time() - timestamp, 3)}
+
+    elif command == "since":
+        seq = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        out_dir = sys.argv[4] if len(sys.argv) > 4 else None
+
+        frames = []
+        for frame, frame_seq, timestamp in ring.since(seq):
+            entry = {"seq": frame_seq, "timestamp": timestamp}
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+                entry["file"] = os.path.join(out_dir, f"frame_{frame_seq:06d}.png")
+                cv2.imwrite(entry["file"], frame)
+            frames.append(entry)
+        result = {"count": len(frames), "frames": frames}
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    ring.close()
+    print(json.dumps(result, indent=2))
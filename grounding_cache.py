@@ -0,0 +1,174 @@
+"""
+GroundingDINO Stage Caches
+The model splits into stages with different inputs:
+- image: Swin backbone + input projections - depends on the frame only
+- text:  BERT + feature map               - depends on the caption only
+- fusion encoder + decoder                - needs both, always runs
+Caching the first two lets a new prompt on an unchanged screen skip the backbone,
+and a recurring prompt skip BERT (the text cache can be kept on disk)
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+def tensor_bytes(value):
+    """Memory held by the tensors in a (nested) dict / list / tuple"""
+    if hasattr(value, "element_size") and hasattr(value, "nelement"):
+        return value.element_size() * value.nelement()
+    if isinstance(value, dict):
+        return sum(tensor_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(tensor_bytes(v) for v in value)
+    return 0
+
+class TensorLRU:
+    """
+    LRU of tensor bundles evicted by memory, not entry count
+    (one 1080p frame's image features are ~40MB, a caption's text features ~1MB)
+
+    Args:
+        max_mb: Memory budget for cached tensors
+    """
+
+    def __init__(self, max_mb=256):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        size = tensor_bytes(value)
+        if size > self.max_bytes:
+            # Would evict everything and still not fit
+            return value
+
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.bytes += size
+
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "mb": round(self.bytes / (1024 * 1024), 1),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+class TextEmbeddingCache(TensorLRU):
+    """
+    TensorLRU for caption-side features, optionally persisted to a directory
+    (one file per caption) so a fresh process starts with every known prompt
+    already encoded; adding a caption writes only that caption's file
+
+    Args:
+        max_mb: Memory budget
+        path: Optional directory - loaded on creation, one file written per new caption
+        model_id: Entries written for another model are ignored
+    """
+
+    def __init__(self, max_mb=64, path=None, model_id=None):
+        super().__init__(max_mb)
+        self.path = path
+        self.model_id = model_id
+        if path and os.path.isfile(path):
+            self._migrate(path)
+        if path and os.path.isdir(path):
+            self.load(path)
+
+    @staticmethod
+    def _torch_load(path):
+        import torch
+
+        try:
+            return torch.load(path, map_location="cpu", weights_only=True)
+        except TypeError:
+            # torch < 1.13 has no weights_only
+            return torch.load(path, map_location="cpu")
+
+    def entry_path(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+        return os.path.join(self.path, f"{digest}.pt")
+
+    def put(self, key, value):
+        value = super().put(key, value)
+        if self.path:
+            self.save_entry(key, value)
+        return value
+
+    def save_entry(self, key, value):
+        """Write one caption's features (write-then-rename)"""
+        import torch
+
+        os.makedirs(self.path, exist_ok=True)
+        path = self.entry_path(key)
+        tmp_path = path + ".tmp"
+        torch.save({"model_id": self.model_id, "key": key, "value": value}, tmp_path)
+        os.replace(tmp_path, path)
+
+    def save(self, path=None):
+        """Write every cached caption (e.g. after load() from another store)"""
+        previous, self.path = self.path, path or self.path
+        try:
+            for key, (value, _) in self._entries.items():
+                self.save_entry(key, value)
+        finally:
+            self.path = previous
+
+    def load(self, path):
+        """Add entries from a cache directory; returns how many were loaded"""
+        loaded = 0
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".pt"):
+                continue
+            try:
+                data = self._torch_load(os.path.join(path, name))
+            except Exception:
+                continue
+            if data.get("model_id") != self.model_id:
+                continue
+            TensorLRU.put(self, data["key"], data["value"])
+            loaded += 1
+        return loaded
+
+    def _migrate(self, path):
+        """Single-file cache from older versions -> per-caption directory at the same path"""
+        try:
+            data = self._torch_load(path)
+        except Exception:
+            data = {}
+        os.remove(path)
+        if data.get("model_id") == self.model_id:
+            for key, value in data.get("entries", {}).items():
+                TensorLRU.put(self, key, value)
+            self.save()
+
+    def clear(self, disk=False):
+        super().clear()
+        if disk and self.path and os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith(".pt"):
+                    os.remove(os.path.join(self.path, name))
+
+    def stats(self):
+        return {**super().stats(), "path": self.path}
@@ -0,0 +1,219 @@
+"""
+CPU-Optimized GroundingDINO
+Opt-in execution mode for detect_ui_grounding (CLAUDE_GROUNDING_MODE):
+- "stock":     fp32 model as stored (default)
+- "optimized": CPU only -
+    * dynamic int8 Linear layers in BERT, the fusion encoder and the decoder.
+      Deformable-attention sampling offsets and the box heads stay fp32 - small
+      errors there move boxes directly
+    * channels-last convolutions (patch embedding, input projections)
+    * the Swin backbone compiled with torch.compile; Inductor's cache lives next to
+      the int8 weights so only the first process pays for compilation
+      (CLAUDE_GROUNDING_COMPILE=0 quantizes the backbone instead)
+
+The quantized weights are written to models/optimized after the first build;
+later loads build the architecture and read that file instead of re-quantizing
+
+Build once (a screenshot also warms the compile cache):
+    py grounding_optimize.py build [SCREENSHOT]
+Compare with stock fp32:
+    py benchmark.py grounding-cpu SCREENSHOT [SCREENSHOT...]
+"""
+import sys
+import json
+import os
+import re
+
+from model_store import STORE_DIR, GROUNDING_MODEL, read_manifest, build_grounding_model, load_grounding_model
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+MODES = ("stock", "optimized")
+OPT_DIR = os.environ.get("CLAUDE_GROUNDING_OPT_DIR", os.path.join(STORE_DIR, "optimized"))
+COMPILE = os.environ.get("CLAUDE_GROUNDING_COMPILE", "1") not in ("", "0")
+
+# Linear layers kept in fp32 (module name substrings)
+FP32_LAYERS = ("sampling_offsets", "bbox_embed")
+
+def grounding_mode():
+    """Execution mode from CLAUDE_GROUNDING_MODE (unknown values fall back to stock)"""
+    mode = os.environ.get("CLAUDE_GROUNDING_MODE", "stock").lower()
+    return mode if mode in MODES else "stock"
+
+def optimized_path(entry, compile_swin=COMPILE, opt_dir=OPT_DIR, name=GROUNDING_MODEL):
+    """
+    Cache file for the int8 weights - tied to the stored checkpoint (by checksum),
+    the torch version and whether the backbone was quantized
+    """
+    layout = "int8" if compile_swin else "int8_qbackbone"
+    tag = re.sub(r"[^0-9A-Za-z.]+", "_", f"torch{torch.__version__}")
+    return os.path.join(opt_dir, f"{name}_{layout}_{entry['weights']['sha256'][:12]}_{tag}.pt")
+
+def _select_engine():
+    backends = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in backends:
+            torch.backends.quantized.engine = engine
+            return engine
+    return None
+
+def quantize_linear(model, quantize_backbone=False):
+    """
+    Swap Linear layers for dynamic int8 ones in place (weights int8, activations
+    quantized per call), skipping FP32_LAYERS and - unless asked - the backbone
+
+    Returns:
+        Number of quantized layers
+    """
+    from torch.ao.quantization import quantize_dynamic, default_dynamic_qconfig
+
+    _select_engine()
+    spec = {
+        name: default_dynamic_qconfig
+        for name, module in model.named_modules()
+        if isinstance(module, torch.nn.Linear)
+        and not any(layer in name for layer in FP32_LAYERS)
+        and (quantize_backbone or not name.startswith("backbone."))
+    }
+    quantize_dynamic(model, spec, dtype=torch.qint8, inplace=True)
+    return len(spec)
+
+def compile_backbone(model, opt_dir=OPT_DIR):
+    """
+    torch.compile the Swin backbone with Inductor's on-disk cache under opt_dir
+    Compilation happens on the first frame; without a working compiler toolchain
+    dynamo falls back to eager execution instead of raising
+
+    Returns:
+        True if the backbone was wrapped
+    """
+    if not hasattr(torch, "compile"):
+        return False
+
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(os.path.join(opt_dir, "inductor")))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    import torch._dynamo
+    torch._dynamo.config.suppress_errors = True
+
+    # backbone is a Joiner(Swin, position embedding) - only Swin does real work
+    model.backbone[0] = torch.compile(model.backbone[0], dynamic=False)
+    return True
+
+def build_optimized_model(compile_swin=COMPILE, opt_dir=OPT_DIR, store_dir=STORE_DIR):
+    """
+    Quantize the stored fp32 model and save the int8 weights
+
+    Returns:
+        (quantized model, path of the saved weights)
+    """
+    model = load_grounding_model("cpu", store_dir=store_dir)
+    quantize_linear(model, quantize_backbone=not compile_swin)
+
+    entry = read_manifest(store_dir)["models"][GROUNDING_MODEL]
+    path = optimized_path(entry, compile_swin, opt_dir)
+    os.makedirs(opt_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return model, path
+
+def load_optimized_model(device="cpu", compile_swin=COMPILE, opt_dir=OPT_DIR, store_dir=STORE_DIR):
+    """
+    GroundingDINO in the optimized CPU mode, from the int8 cache when it exists
+
+    Raises:
+        FileNotFoundError / ValueError from the model store like load_grounding_model
+    """
+    if device != "cpu":
+        print("Optimized GroundingDINO mode is CPU only - using the stock model", file=sys.stderr)
+        return load_grounding_model(device, store_dir=store_dir)
+
+    model, entry = build_grounding_model("cpu", store_dir=store_dir)
+    path = optimized_path(entry, compile_swin, opt_dir)
+
+    if os.path.exists(path):
+        try:
+            # Same layer swap as the build, then the saved int8 weights on top
+            quantize_linear(model, quantize_backbone=not compile_swin)
+            # Packed int8 params aren't plain tensors - weights_only can't read them (own file)
+            model.load_state_dict(torch.load(path, map_location="cpu", weights_only=False))
+        except (OSError, RuntimeError) as e:
+            print(f"Int8 GroundingDINO cache unusable ({e}) - rebuilding", file=sys.stderr)
+            model, path = build_optimized_model(compile_swin, opt_dir, store_dir)
+    else:
+        print("Building int8 GroundingDINO (first time only)...", file=sys.stderr)
+        model, path = build_optimized_model(compile_swin, opt_dir, store_dir)
+
+    model.eval()
+    model.to(memory_format=torch.channels_last)
+    # encode_image converts input frames to match
+    model.channels_last = True
+    if compile_swin:
+        compile_backbone(model, opt_dir)
+    return model
+
+def info(opt_dir=OPT_DIR, store_dir=STORE_DIR):
+    """Mode settings and what's already built"""
+    entry = read_manifest(store_dir)["models"].get(GROUNDING_MODEL)
+    result = {
+        "mode": grounding_mode(),
+        "compile": COMPILE,
+        "fp32_layers": list(FP32_LAYERS),
+        "opt_dir": opt_dir
+    }
+    if HAS_TORCH:
+        result["engines"] = list(torch.backends.quantized.supported_engines)
+        result["torch_compile"] = hasattr(torch, "compile")
+        if entry is not None:
+            path = optimized_path(entry, COMPILE, opt_dir)
+            result["int8_weights"] = path
+            result["built"] = os.path.exists(path)
+            if result["built"]:
+                result["size_mb"] = round(os.path.getsize(path) / 1e6, 1)
+    if entry is None:
+        result["error"] = f"{GROUNDING_MODEL} is not in the model store - run 'py model_store.py fetch'"
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "build": "py grounding_optimize.py build [SCREENSHOT]",
+                "info": "py grounding_optimize.py info"
+            },
+            "use": "set CLAUDE_GROUNDING_MODE=optimized (or stock)",
+            "compare": "py benchmark.py grounding-cpu SCREENSHOT [SCREENSHOT...] [--prompts 'p1,p2']"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if not HAS_TORCH:
+        result = {"error": "torch not installed"}
+
+    elif command == "build":
+        try:
+            _, path = build_optimized_model()
+            result = {"path": path, "size_mb": round(os.path.getsize(path) / 1e6, 1)}
+            if len(sys.argv) > 2:
+                # One detection compiles the backbone and fills the Inductor cache
+                os.environ["CLAUDE_GROUNDING_MODE"] = "optimized"
+                import detect_ui_grounding as grounding
+                grounding.set_mode("optimized")
+                warm = grounding.detect_ui_elements(sys.argv[2], "button")
+                result["warmup"] = {"error": warm["error"]} if "error" in warm else "ok"
+        except Exception as e:
+            result = {"error": str(e)}
+
+    elif command == "info":
+        result = info()
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
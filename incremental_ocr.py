@@ -0,0 +1,238 @@
+"""
+Incremental OCR
+Diffs each new frame against the previous one on a tile grid and
+re-runs EasyOCR only where pixels changed (plus text boxes crossing those tiles)
+Clean tiles keep their previous text - output matches find_all_text's "texts" format
+"""
+import sys
+import json
+
+import cv2
+import numpy as np
+
+from easy_ocr_vision import run_readtext, HAS_EASYOCR
+from vision_frame import Frame
+
+class IncrementalOCR:
+    """
+    Stateful OCR engine for automation loops
+
+    Args:
+        tile_size: Tile edge in pixels for change detection
+        diff_threshold: Gray-level difference that marks a pixel as changed
+        padding: Context pixels added around each re-OCR region
+        full_refresh_ratio: Above this dirty-tile fraction, just OCR the whole frame
+    """
+
+    def __init__(self, tile_size=64, diff_threshold=12, padding=8, full_refresh_ratio=0.5):
+        self.tile_size = tile_size
+        self.diff_threshold = diff_threshold
+        self.padding = padding
+        self.full_refresh_ratio = full_refresh_ratio
+        self.reset()
+
+    def reset(self):
+        """Forget the previous frame (next update does a full OCR pass)"""
+        self._prev_gray = None
+        # Raw boxes in screen coordinates: (text, [x1, y1, x2, y2], confidence)
+        self._boxes = []
+
+    def update(self, image, min_confidence=0.5):
+        """
+        OCR a new frame, re-reading only the regions that changed
+
+        Args:
+            image: Path, numpy BGR frame, PIL image or Frame
+            min_confidence: Minimum OCR confidence for returned texts
+
+        Returns:
+            Dict like find_all_text plus an "incremental" stats block
+        """
+        if not HAS_EASYOCR:
+            return {"error": "easyocr not installed"}
+
+        try:
+            loaded = Frame.load(image)
+            if loaded is None:
+                return {"error": "Could not load image"}
+
+            # A Frame shared with other detectors already has its gray plane
+            frame, gray = loaded.bgr, loaded.gray
+
+            if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+                stats = self._full_refresh(frame)
+            else:
+                dirty = self._dirty_tiles(gray)
+                if dirty.mean() > self.full_refresh_ratio:
+                    stats = self._full_refresh(frame)
+                else:
+                    stats = self._partial_refresh(frame, dirty)
+
+            self._prev_gray = gray
+            return self._result(min_confidence, stats)
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _full_refresh(self, frame):
+        self._boxes = self._read(frame, None)
+        tiles_y, tiles_x = self._grid_shape(frame.shape)
+        return {
+            "full_refresh": True,
+            "dirty_tiles": tiles_y * tiles_x,
+            "total_tiles": tiles_y * tiles_x,
+            "regions": []
+        }
+
+    def _partial_refresh(self, frame, dirty):
+        total = int(dirty.size)
+
+        if not dirty.any():
+            return {"full_refresh": False, "dirty_tiles": 0, "total_tiles": total, "regions": []}
+
+        # Text boxes crossing a dirty tile must be re-read whole, which can
+        # dirty further tiles - grow until stable
+        while True:
+            grown = dirty.copy()
+            for _, bbox, _ in self._boxes:
+                tx1, ty1, tx2, ty2 = self._tile_span(bbox)
+                if dirty[ty1:ty2, tx1:tx2].any():
+                    grown[ty1:ty2, tx1:tx2] = True
+            if (grown == dirty).all():
+                break
+            dirty = grown
+
+        # Drop cached text from dirty tiles, keep clean ones
+        self._boxes = [box for box in self._boxes if not self._touches(dirty, box[1])]
+
+        # Re-OCR each connected group of dirty tiles as one rectangle
+        count, _, tile_stats, _ = cv2.connectedComponentsWithStats(dirty.astype(np.uint8), connectivity=8)
+        height, width = frame.shape[:2]
+        regions = []
+
+        for label in range(1, count):
+            tx, ty, tw, th = [int(v) for v in tile_stats[label][:4]]
+            rect = [
+                max(0, tx * self.tile_size - self.padding),
+                max(0, ty * self.tile_size - self.padding),
+                min(width, (tx + tw) * self.tile_size + self.padding),
+                min(height, (ty + th) * self.tile_size + self.padding)
+            ]
+            regions.append(rect)
+
+            for text, bbox, conf in self._read(frame, rect):
+                # Padding can pick up text from clean tiles - those are already cached
+                tile_x = min(max(0, (bbox[0] + bbox[2]) // 2) // self.tile_size, dirty.shape[1] - 1)
+                tile_y = min(max(0, (bbox[1] + bbox[3]) // 2) // self.tile_size, dirty.shape[0] - 1)
+                if dirty[tile_y, tile_x]:
+                    self._boxes.append((text, bbox, conf))
+
+        return {
+            "full_refresh": False,
+            "dirty_tiles": int(dirty.sum()),
+            "total_tiles": total,
+            "regions": regions
+        }
+
+    def _read(self, frame, rect):
+        results, _ = run_readtext(frame, rect)
+
+        boxes = []
+        for (bbox, text, conf) in results:
+            x_coords = [point[0] for point in bbox]
+            y_coords = [point[1] for point in bbox]
+            boxes.append((
+                text,
+                [int(min(x_coords)), int(min(y_coords)), int(max(x_coords)), int(max(y_coords))],
+                float(conf)
+            ))
+        return boxes
+
+    def _grid_shape(self, shape):
+        height, width = shape[:2]
+        return -(-height // self.tile_size), -(-width // self.tile_size)
+
+    def _dirty_tiles(self, gray):
+        """Boolean tile grid: True where any pixel changed by more than diff_threshold"""
+        diff = cv2.absdiff(gray, self._prev_gray)
+
+        tiles_y, tiles_x = self._grid_shape(gray.shape)
+        padded = np.zeros((tiles_y * self.tile_size, tiles_x * self.tile_size), dtype=np.uint8)
+        padded[:diff.shape[0], :diff.shape[1]] = diff
+
+        tile_max = padded.reshape(tiles_y, self.tile_size, tiles_x, self.tile_size).max(axis=(1, 3))
+        return tile_max > self.diff_threshold
+
+    def _tile_span(self, bbox):
+        x1, y1, x2, y2 = bbox
+        return (
+            max(0, x1) // self.tile_size,
+            max(0, y1) // self.tile_size,
+            max(0, x2) // self.tile_size + 1,
+            max(0, y2) // self.tile_size + 1
+        )
+
+    def _touches(self, dirty, bbox):
+        tx1, ty1, tx2, ty2 = self._tile_span(bbox)
+        return bool(dirty[ty1:ty2, tx1:tx2].any())
+
+    def _result(self, min_confidence, stats):
+        texts = []
+        for text, (x1, y1, x2, y2), conf in sorted(self._boxes, key=lambda b: (b[1][1], b[1][0])):
+            if conf >= min_confidence:
+                texts.append({
+                    "text": text,
+                    "bbox": [x1, y1, x2, y2],
+                    "center": [(x1 + x2) // 2, (y1 + y2) // 2],
+                    "confidence": round(conf, 3)
+                })
+
+        return {
+            "count": len(texts),
+            "texts": texts,
+            "incremental": stats
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "run": "py incremental_ocr.py run IMAGE1 IMAGE2 [IMAGE3 ...] [--conf C]",
+                "live": "py incremental_ocr.py live [frames] [interval_s] [--conf C]"
+            },
+            "note": "Re-OCRs only the tiles that changed between consecutive frames"
+        }, indent=2))
+        sys.exit(1)
+
+    conf = 0.5
+    if "--conf" in sys.argv:
+        i = sys.argv.index("--conf")
+        conf = float(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+
+    command = sys.argv[1].lower()
+    engine = IncrementalOCR()
+
+    if command == "run":
+        # One JSON line per frame so each incremental step is visible
+        for image in sys.argv[2:]:
+            result = engine.update(image, conf)
+            result["image"] = image
+            print(json.dumps(result))
+
+    elif command == "live":
+        import time
+        from claude_vision import capture_frame
+
+        frames = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        interval = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        for _ in range(frames):
+            start = time.perf_counter()
+            result = engine.update(capture_frame(), conf)
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            print(json.dumps(result), flush=True)
+            time.sleep(interval)
+
+    else:
+        print(json.dumps({"error": f"Unknown command: {command}"}, indent=2))
@@ -0,0 +1,449 @@
+"""
+Spatial Layout Index
+Grid index over the boxes from find_all_text, detect_shapes and
+detect_circular_buttons_all_colors, with text grouped into lines and blocks
+Answers relational queries in one call, without re-running detection:
+- "green circle right of 'Level 3'"
+- "nearest button below 'Volume'"
+- "all text inside [x1, y1, x2, y2]"
+"""
+import sys
+import json
+from collections import defaultdict
+
+from text_index import TextIndex
+from vision_frame import Frame
+
+DEFAULT_CELL = 64
+RELATIONS = ("right_of", "left_of", "above", "below", "near", "inside")
+COLORS = ("red", "green", "blue", "yellow", "orange", "purple", "cyan", "white", "black", "gray")
+
+def _center(bbox):
+    return [(bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2]
+
+def _union(boxes):
+    return [
+        min(b[0] for b in boxes), min(b[1] for b in boxes),
+        max(b[2] for b in boxes), max(b[3] for b in boxes)
+    ]
+
+def _gap(a, b):
+    """Euclidean distance between two boxes (0 if they overlap)"""
+    dx = max(0, a[0] - b[2], b[0] - a[2])
+    dy = max(0, a[1] - b[3], b[1] - a[3])
+    return (dx * dx + dy * dy) ** 0.5
+
+def _height(element):
+    return element["bbox"][3] - element["bbox"][1]
+
+def _same_row(a, b):
+    """Vertical centers within half the taller box's height"""
+    return abs(a["center"][1] - b["center"][1]) <= max(_height(a), _height(b)) / 2
+
+class LayoutIndex:
+    """
+    Args:
+        cell: Grid cell size in pixels (about one UI element)
+    """
+
+    def __init__(self, cell=DEFAULT_CELL):
+        self.cell = cell
+        self.elements = []
+        self.grid = defaultdict(list)
+        self._lines = None
+        self._blocks = None
+
+    @classmethod
+    def from_results(cls, ocr=None, shapes=None, circles=None, cell=DEFAULT_CELL):
+        """Index existing detector results (any of them may be omitted)"""
+        index = cls(cell)
+        if ocr:
+            index.add_ocr(ocr)
+        if shapes:
+            index.add_shapes(shapes)
+        if circles:
+            index.add_circles(circles)
+        return index
+
+    def _cells(self, bbox):
+        for cy in range(int(bbox[1]) // self.cell, int(bbox[3]) // self.cell + 1):
+            for cx in range(int(bbox[0]) // self.cell, int(bbox[2]) // self.cell + 1):
+                yield cx, cy
+
+    def add(self, element, kind):
+        """Index one element dict (needs "bbox"); returns the stored copy"""
+        element = {**element, "kind": kind, "id": len(self.elements)}
+        element.setdefault("center", _center(element["bbox"]))
+        self.elements.append(element)
+        for key in self._cells(element["bbox"]):
+            self.grid[key].append(element["id"])
+        if kind == "text":
+            self._lines = self._blocks = None
+        return element
+
+    def add_ocr(self, result):
+        for entry in result.get("texts", []):
+            self.add(entry, "text")
+
+    def add_shapes(self, result):
+        for entry in result.get("shapes", []):
+            self.add(entry, "shape")
+
+    def add_circles(self, result):
+        for entry in result.get("buttons", []):
+            self.add({**entry, "shape": "circle"}, "circle")
+
+    def query(self, rect, fully=False):
+        """
+        Elements intersecting rect (or fully inside it with fully=True)
+
+        Args:
+            rect: [x1, y1, x2, y2]
+        """
+        seen = set()
+        found = []
+        for key in self._cells(rect):
+            for element_id in self.grid.get(key, ()):
+                if element_id in seen:
+                    continue
+                seen.add(element_id)
+                x1, y1, x2, y2 = self.elements[element_id]["bbox"]
+                if fully:
+                    hit = x1 >= rect[0] and y1 >= rect[1] and x2 <= rect[2] and y2 <= rect[3]
+                else:
+                    hit = x1 <= rect[2] and x2 >= rect[0] and y1 <= rect[3] and y2 >= rect[1]
+                if hit:
+                    found.append(self.elements[element_id])
+        return found
+
+    def bounds(self):
+        if not self.elements:
+            return [0, 0, 0, 0]
+        return _union([element["bbox"] for element in self.elements])
+
+    def lines(self):
+        """
+        Text grouped into lines: words overlapping vertically and separated by
+        less than ~1.5 line heights
+
+        Returns:
+            List of {"text", "bbox", "center", "words": [element ids]}, top to bottom
+        """
+        if self._lines is not None:
+            return self._lines
+
+        words = sorted(
+            (e for e in self.elements if e["kind"] == "text"),
+            key=lambda e: (e["center"][1], e["bbox"][0])
+        )
+
+        # Rows first (vertical overlap with any word already in the row) ...
+        rows = []
+        for word in words:
+            for row in rows:
+                if any(_same_row(word, other) for other in row):
+                    row.append(word)
+                    break
+            else:
+                rows.append([word])
+
+        # ... then split each row left to right wherever the gap is too wide,
+        # so "Name" and a value far across the screen stay separate lines
+        self._lines = []
+        for row in rows:
+            row.sort(key=lambda e: e["bbox"][0])
+            segments = [[row[0]]]
+            for word in row[1:]:
+                segment = segments[-1]
+                right = max(e["bbox"][2] for e in segment)
+                height = max(_height(word), max(_height(e) for e in segment))
+                if word["bbox"][0] - right <= 1.5 * height:
+                    segment.append(word)
+                else:
+                    segments.append([word])
+
+            for segment in segments:
+                bbox = _union([e["bbox"] for e in segment])
+                self._lines.append({
+                    "text": " ".join(e["text"] for e in segment),
+                    "bbox": bbox,
+                    "center": _center(bbox),
+                    "words": [e["id"] for e in segment]
+                })
+        self._lines.sort(key=lambda line: (line["bbox"][1], line["bbox"][0]))
+        return self._lines
+
+    def blocks(self):
+        """
+        Lines grouped into blocks (paragraphs, list groups): consecutive lines
+        overlapping horizontally with less than one line height between them
+
+        Returns:
+            List of {"text", "bbox", "center", "lines": [line indices]}
+        """
+        if self._blocks is not None:
+            return self._blocks
+
+        groups = []
+        for line_id, line in enumerate(self.lines()):
+            height = line["bbox"][3] - line["bbox"][1]
+            for group in groups:
+                last = self._lines[group[-1]]
+                overlaps = line["bbox"][0] <= last["bbox"][2] and line["bbox"][2] >= last["bbox"][0]
+                if overlaps and 0 <= line["bbox"][1] - last["bbox"][3] <= height:
+                    group.append(line_id)
+                    break
+            else:
+                groups.append([line_id])
+
+        self._blocks = []
+        for group in groups:
+            bbox = _union([self._lines[i]["bbox"] for i in group])
+            self._blocks.append({
+                "text": "\n".join(self._lines[i]["text"] for i in group),
+                "bbox": bbox,
+                "center": _center(bbox),
+                "lines": group
+            })
+        return self._blocks
+
+    def find_text(self, text, fuzzy=False):
+        """
+        Anchors for a label: matching lines (so multi-word labels split by OCR
+        still match), best first
+
+        Returns:
+            List of line dicts (with "distance" when fuzzy)
+        """
+        lines = self.lines()
+        if fuzzy:
+            return TextIndex(lines).search(text)
+        needle = text.lower()
+        return [line for line in lines if needle in line["text"].lower()]
+
+    def select(self, elements, subject=None):
+        """
+        Filter elements by a subject phrase: kind words (text, shape, circle,
+        button, rectangle, square, triangle) and/or a color
+        """
+        if not subject:
+            return list(elements)
+
+        words = subject.lower().split()
+        colors = [w for w in words if w in COLORS]
+        kinds = [w for w in words if w not in COLORS]
+
+        selected = []
+        for element in elements:
+            if colors and element.get("color") not in colors:
+                continue
+            if kinds and not any(self._is_kind(element, kind) for kind in kinds):
+                continue
+            selected.append(element)
+        return selected
+
+    @staticmethod
+    def _is_kind(element, kind):
+        if kind in ("text", "label"):
+            return element["kind"] == "text"
+        if kind in ("button", "icon", "element"):
+            return element["kind"] in ("shape", "circle")
+        return element.get("shape") == kind
+
+    def relate(self, anchor_bbox, relation, subject=None, max_distance=None, limit=None):
+        """
+        Elements in a spatial relation to an anchor box
+
+        Args:
+            anchor_bbox: [x1, y1, x2, y2] of the reference element
+            relation: right_of, left_of, above, below, near or inside
+            subject: Optional subject phrase (see select)
+            max_distance: Optional search distance in pixels
+            limit: Optional maximum number of results
+
+        Returns:
+            Elements sorted by distance to the anchor, each with "distance"
+        """
+        if relation not in RELATIONS:
+            raise ValueError(f"Unknown relation: {relation} (use {', '.join(RELATIONS)})")
+
+        ax1, ay1, ax2, ay2 = anchor_bbox
+        bx1, by1, bx2, by2 = self.bounds()
+        reach = max_distance if max_distance is not None else max(bx2 - bx1, by2 - by1)
+        # Same row / column: allow half the anchor size of misalignment
+        pad_y = (ay2 - ay1) // 2
+        pad_x = (ax2 - ax1) // 2
+
+        if relation == "inside":
+            candidates = self.query(anchor_bbox, fully=True)
+        else:
+            rect = {
+                "right_of": [ax2, ay1 - pad_y, ax2 + reach, ay2 + pad_y],
+                "left_of": [ax1 - reach, ay1 - pad_y, ax1, ay2 + pad_y],
+                "above": [ax1 - pad_x, ay1 - reach, ax2 + pad_x, ay1],
+                "below": [ax1 - pad_x, ay2, ax2 + pad_x, ay2 + reach],
+                "near": [ax1 - reach, ay1 - reach, ax2 + reach, ay2 + reach]
+            }[relation]
+            candidates = self.query(rect)
+
+        results = []
+        for element in self.select(candidates, subject):
+            bbox = element["bbox"]
+            if bbox == list(anchor_bbox):
+                continue
+            cx, cy = element["center"]
+            # Center must be on the requested side of the anchor
+            if relation == "right_of" and cx <= ax2:
+                continue
+            if relation == "left_of" and cx >= ax1:
+                continue
+            if relation == "above" and cy >= ay1:
+                continue
+            if relation == "below" and cy <= ay2:
+                continue
+
+            distance = _gap(anchor_bbox, bbox)
+            if max_distance is not None and distance > max_distance:
+                continue
+            results.append({**element, "distance": round(distance, 1)})
+
+        results.sort(key=lambda e: e["distance"])
+        return results[:limit] if limit else results
+
+    def nearest(self, point, subject=None, k=1):
+        """
+        k nearest elements to a point (grid rings grow until enough are found)
+        """
+        x, y = point
+        px, py = int(x) // self.cell, int(y) // self.cell
+        bx1, by1, bx2, by2 = self.bounds()
+        max_ring = max(bx2 - bx1, by2 - by1) // self.cell + 2
+
+        probe = [x, y, x, y]
+        found = {}
+        for ring in range(max_ring + 1):
+            for cy in range(py - ring, py + ring + 1):
+                for cx in range(px - ring, px + ring + 1):
+                    if max(abs(cx - px), abs(cy - py)) != ring:
+                        continue
+                    for element in self.select([self.elements[i] for i in self.grid.get((cx, cy), ())], subject):
+                        found.setdefault(element["id"], _gap(probe, element["bbox"]))
+            # Anything outside this ring is at least ring * cell away
+            within = [d for d in found.values() if d <= ring * self.cell]
+            if len(within) >= k:
+                break
+
+        ranked = sorted(found.items(), key=lambda item: item[1])[:k]
+        return [{**self.elements[i], "distance": round(d, 1)} for i, d in ranked]
+
+    def find(self, subject, relation, anchor, max_distance=None, limit=None, fuzzy=True):
+        """
+        One-call relational query
+
+        Args:
+            subject: What to return ("green circle", "button", "text")
+            relation: right_of, left_of, above, below, near or inside
+            anchor: Label text, or [x1, y1, x2, y2] (e.g. for "inside")
+
+        Returns:
+            Dict with "found", "anchor" and "matches"
+        """
+        if isinstance(anchor, str):
+            anchors = self.find_text(anchor, fuzzy=fuzzy)
+            if not anchors:
+                return {"found": False, "error": f"Anchor text not found: {anchor}", "matches": []}
+            anchor_entry = anchors[0]
+        else:
+            anchor_entry = {"bbox": list(anchor)}
+
+        matches = self.relate(anchor_entry["bbox"], relation, subject, max_distance, limit)
+        return {
+            "found": len(matches) > 0,
+            "count": len(matches),
+            "anchor": anchor_entry,
+            "relation": relation,
+            "subject": subject,
+            "matches": matches
+        }
+
+def build_layout(image_path, min_confidence=0.5, roi=None, cell=DEFAULT_CELL):
+    """
+    Run OCR, shape and circle detection once and index everything
+
+    Returns:
+        LayoutIndex, or a dict with "error"
+    """
+    from easy_ocr_vision import find_all_text
+    from detect_ui_advanced import detect_shapes, detect_circular_buttons_all_colors
+
+    # Decode once for all three detectors
+    frame = Frame.load(image_path)
+    if frame is None:
+        return {"error": "Could not load image"}
+
+    ocr = find_all_text(frame.bgr, min_confidence, roi=roi)
+    if "error" in ocr:
+        return ocr
+
+    shapes = detect_shapes(frame, roi=roi)
+    circles = detect_circular_buttons_all_colors(frame, roi=roi)
+    return LayoutIndex.from_results(ocr, shapes, circles, cell)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "lines": "py layout_index.py lines IMAGE [conf]",
+                "blocks": "py layout_index.py blocks IMAGE [conf]",
+                "find": "py layout_index.py find IMAGE 'subject' RELATION 'Anchor text' [max_distance]",
+                "inside": "py layout_index.py inside IMAGE X1,Y1,X2,Y2 ['subject']"
+            },
+            "examples": {
+                "find": "py layout_index.py find temp.png 'green circle' right_of 'Level 3'",
+                "below": "py layout_index.py find temp.png button below 'Volume' 200",
+                "inside": "py layout_index.py inside temp.png 400,300,800,600 text"
+            },
+            "relations": list(RELATIONS),
+            "roi": "Add --roi X1,Y1,X2,Y2 to only index that rectangle"
+        }, indent=2))
+        sys.exit(1)
+
+    from vision_frame import pop_roi_arg
+    roi = pop_roi_arg(sys.argv)
+    command = sys.argv[1].lower()
+    image = sys.argv[2]
+
+    if command in ("lines", "blocks"):
+        conf = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+        index = build_layout(image, conf, roi=roi)
+        if isinstance(index, dict):
+            result = index
+        else:
+            groups = index.lines() if command == "lines" else index.blocks()
+            result = {"count": len(groups), command: groups}
+
+    elif command == "find":
+        index = build_layout(image, roi=roi)
+        if isinstance(index, dict):
+            result = index
+        else:
+            max_distance = int(sys.argv[6]) if len(sys.argv) > 6 else None
+            try:
+                result = index.find(sys.argv[3], sys.argv[4].lower(), sys.argv[5], max_distance)
+            except ValueError as e:
+                result = {"error": str(e)}
+
+    elif command == "inside":
+        index = build_layout(image, roi=roi)
+        if isinstance(index, dict):
+            result = index
+        else:
+            rect = [int(v) for v in sys.argv[3].split(",")]
+            subject = sys.argv[4] if len(sys.argv) > 4 else None
+            result = index.find(subject, "inside", rect)
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
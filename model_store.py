@@ -0,0 +1,356 @@
+"""
+Offline Model Store
+Local, verified copy of the GroundingDINO weights:
+- manifest.json lists every file with its size and SHA-256
+- weights are converted once from the .pth pickle to safetensors (or a torch
+  zip loaded with mmap=True), so a cold start maps the file instead of
+  unpickling 700MB, and processes on the same machine share the page cache
+- loading never touches the network; 'fetch' is the only command that downloads
+
+Store directory: ./models (override with CLAUDE_MODEL_STORE)
+Set CLAUDE_VISION_OFFLINE=1 to forbid any download fallback in get_model()
+"""
+import sys
+import json
+import hashlib
+import os
+import time
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    from safetensors.torch import save_file as save_safetensors, load_file as load_safetensors
+    HAS_SAFETENSORS = True
+except ImportError:
+    HAS_SAFETENSORS = False
+
+STORE_DIR = os.environ.get("CLAUDE_MODEL_STORE", "models")
+MANIFEST_NAME = "manifest.json"
+GROUNDING_MODEL = "groundingdino-swint-ogc"
+# build_model() instantiates BERT + tokenizer by name (a HuggingFace download) -
+# the store keeps a local copy and points the config at it
+TEXT_ENCODER = "bert-base-uncased"
+
+# State-dict keys allowed to differ between the checkpoint and the architecture
+# (the upstream checkpoint carries an unused label embedding, and BERT's
+# position_ids buffer is persistent only in some transformers versions)
+BENIGN_KEYS = ("label_enc.weight", "bert.embeddings.position_ids")
+
+# Where 'fetch' downloads the original checkpoint from
+SOURCES = {
+    GROUNDING_MODEL: {
+        "hf_repo": "IDEA-Research/grounding-dino-tiny",
+        "hf_config": "GroundingDINO_SwinT_OGC.cfg.py",
+        "hf_checkpoint": "groundingdino_swint_ogc.pth",
+        "config_url": "https://github.com/IDEA-Research/GroundingDINO/raw/main/groundingdino/config/GroundingDINO_SwinT_OGC.py",
+        "checkpoint_url": "https://github.com/IDEA-Research/GroundingDINO/releases/download/v0.1.0-alpha/groundingdino_swint_ogc.pth"
+    }
+}
+
+def offline():
+    return os.environ.get("CLAUDE_VISION_OFFLINE", "") not in ("", "0") or os.environ.get("HF_HUB_OFFLINE") == "1"
+
+def sha256_file(path, chunk_size=8 * 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_manifest(store_dir=STORE_DIR):
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"models": {}}
+
+def write_manifest(manifest, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _file_entry(path):
+    stat = os.stat(path)
+    return {
+        "file": os.path.basename(path),
+        "size": stat.st_size,
+        "sha256": sha256_file(path),
+        # Stat stamp of the last full hash - lets loads skip re-hashing 700MB
+        "verified_mtime_ns": stat.st_mtime_ns
+    }
+
+def verify(name=GROUNDING_MODEL, store_dir=STORE_DIR, full=False):
+    """
+    Check a stored model against the manifest
+
+    Files whose size and mtime still match the last verified hash are trusted;
+    anything else (or full=True) is re-hashed
+
+    Returns:
+        Dict with "ok" and per-file status
+    """
+    manifest = read_manifest(store_dir)
+    entry = manifest["models"].get(name)
+    if entry is None:
+        return {"ok": False, "error": f"{name} is not in the store ({store_dir})"}
+
+    files = {}
+    changed = False
+    for role in ("config", "weights"):
+        record = entry[role]
+        path = os.path.join(store_dir, record["file"])
+        if not os.path.exists(path):
+            files[role] = "missing"
+            continue
+
+        stat = os.stat(path)
+        if stat.st_size != record["size"]:
+            files[role] = "size mismatch"
+            continue
+
+        if not full and stat.st_mtime_ns == record.get("verified_mtime_ns"):
+            files[role] = "ok"
+            continue
+
+        if sha256_file(path) == record["sha256"]:
+            files[role] = "ok"
+            record["verified_mtime_ns"] = stat.st_mtime_ns
+            changed = True
+        else:
+            files[role] = "checksum mismatch"
+
+    if changed:
+        write_manifest(manifest, store_dir)
+
+    return {"ok": all(status == "ok" for status in files.values()), "model": name, "files": files}
+
+def import_checkpoint(config_path, checkpoint_path, name=GROUNDING_MODEL, store_dir=STORE_DIR):
+    """
+    Convert a GroundingDINO .pth checkpoint into the store and record it in the manifest
+
+    Returns:
+        The manifest entry
+    """
+    if not HAS_TORCH:
+        raise RuntimeError("torch not installed")
+
+    os.makedirs(store_dir, exist_ok=True)
+
+    checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    state = checkpoint.get("model", checkpoint)
+    # Same cleanup as groundingdino's clean_state_dict (DataParallel prefix);
+    # tied weights (shared bbox heads) are split since safetensors forbids aliasing
+    clean = {}
+    seen = set()
+    for key, tensor in state.items():
+        if tensor.data_ptr() in seen:
+            tensor = tensor.clone()
+        seen.add(tensor.data_ptr())
+        clean[key[len("module."):] if key.startswith("module.") else key] = tensor.contiguous()
+    state = clean
+
+    if HAS_SAFETENSORS:
+        weights_format = "safetensors"
+        weights_path = os.path.join(store_dir, f"{name}.safetensors")
+        save_safetensors(state, weights_path + ".tmp")
+    else:
+        weights_format = "torch-mmap"
+        weights_path = os.path.join(store_dir, f"{name}.pt")
+        torch.save(state, weights_path + ".tmp")
+    os.replace(weights_path + ".tmp", weights_path)
+
+    stored_config = os.path.join(store_dir, f"{name}.cfg.py")
+    if os.path.abspath(config_path) != os.path.abspath(stored_config):
+        with open(config_path, "rb") as src, open(stored_config, "wb") as dst:
+            dst.write(src.read())
+
+    text_encoder = save_text_encoder(store_dir)
+
+    entry = {
+        "format": weights_format,
+        "text_encoder": text_encoder,
+        "config": _file_entry(stored_config),
+        "weights": _file_entry(weights_path),
+        "tensors": len(state),
+        "imported_from": os.path.basename(checkpoint_path),
+        "imported_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    manifest = read_manifest(store_dir)
+    manifest["models"][name] = entry
+    write_manifest(manifest, store_dir)
+    return entry
+
+def save_text_encoder(store_dir=STORE_DIR):
+    """
+    Copy BERT + tokenizer into the store (from the HuggingFace cache or hub)
+
+    Returns:
+        Directory name inside the store, or None if it couldn't be obtained
+    """
+    path = os.path.join(store_dir, TEXT_ENCODER)
+    if os.path.isdir(path):
+        return TEXT_ENCODER
+    try:
+        from transformers import AutoTokenizer, BertModel
+        AutoTokenizer.from_pretrained(TEXT_ENCODER).save_pretrained(path)
+        BertModel.from_pretrained(TEXT_ENCODER).save_pretrained(path)
+        return TEXT_ENCODER
+    except Exception as e:
+        print(f"Could not store {TEXT_ENCODER} ({e}) - loading will need the HuggingFace cache", file=sys.stderr)
+        return None
+
+def import_legacy(name=GROUNDING_MODEL, store_dir=STORE_DIR):
+    """
+    Import a checkpoint the old get_model() downloaded straight into ./models
+    (no network) - returns the manifest entry or None if there is none
+    """
+    source = SOURCES[name]
+    for config_name, checkpoint_name in (
+        (source["hf_config"], source["hf_checkpoint"]),
+        (os.path.basename(source["config_url"]), os.path.basename(source["checkpoint_url"]))
+    ):
+        config_path = os.path.join(store_dir, config_name)
+        checkpoint_path = os.path.join(store_dir, checkpoint_name)
+        if os.path.exists(config_path) and os.path.exists(checkpoint_path):
+            return import_checkpoint(config_path, checkpoint_path, name, store_dir)
+    return None
+
+def fetch(name=GROUNDING_MODEL, store_dir=STORE_DIR):
+    """
+    Download the original checkpoint (HuggingFace, then GitHub release) and import it
+    The only function in this module that uses the network
+    """
+    if offline():
+        raise RuntimeError("Offline mode (CLAUDE_VISION_OFFLINE) - copy the store or run 'import' instead")
+
+    source = SOURCES[name]
+    download_dir = os.path.join(store_dir, "download")
+    os.makedirs(download_dir, exist_ok=True)
+
+    try:
+        from huggingface_hub import hf_hub_download
+        config_path = hf_hub_download(repo_id=source["hf_repo"], filename=source["hf_config"], local_dir=download_dir)
+        checkpoint_path = hf_hub_download(repo_id=source["hf_repo"], filename=source["hf_checkpoint"], local_dir=download_dir)
+    except Exception as e:
+        print(f"HuggingFace download failed ({e}) - trying GitHub release...", file=sys.stderr)
+        import urllib.request
+
+        config_path = os.path.join(download_dir, os.path.basename(source["config_url"]))
+        checkpoint_path = os.path.join(download_dir, os.path.basename(source["checkpoint_url"]))
+        if not os.path.exists(config_path):
+            urllib.request.urlretrieve(source["config_url"], config_path)
+        if not os.path.exists(checkpoint_path):
+            print("Downloading checkpoint (~700MB)...", file=sys.stderr)
+            urllib.request.urlretrieve(source["checkpoint_url"], checkpoint_path)
+
+    return import_checkpoint(config_path, checkpoint_path, name, store_dir)
+
+def load_weights(path, weights_format):
+    """Memory-mapped state dict (file pages are shared, not copied, until written)"""
+    if weights_format == "safetensors":
+        return load_safetensors(path, device="cpu")
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+def build_grounding_model(device="cpu", name=GROUNDING_MODEL, store_dir=STORE_DIR):
+    """
+    GroundingDINO architecture from the stored config, without the checkpoint weights
+
+    Returns:
+        (model, manifest entry)
+
+    Raises:
+        FileNotFoundError if the model isn't in the store, ValueError if verification fails
+    """
+    from groundingdino.models import build_model
+    from groundingdino.util.slconfig import SLConfig
+
+    status = verify(name, store_dir)
+    if not status["ok"]:
+        if "error" in status:
+            raise FileNotFoundError(status["error"])
+        raise ValueError(f"Model store verification failed: {status['files']}")
+
+    entry = read_manifest(store_dir)["models"][name]
+    args = SLConfig.fromfile(os.path.join(store_dir, entry["config"]["file"]))
+    args.device = device
+    if entry.get("text_encoder") and os.path.isdir(os.path.join(store_dir, entry["text_encoder"])):
+        args.text_encoder_type = os.path.abspath(os.path.join(store_dir, entry["text_encoder"]))
+    return build_model(args), entry
+
+def load_grounding_model(device="cpu", name=GROUNDING_MODEL, store_dir=STORE_DIR):
+    """
+    Build GroundingDINO from the store without touching the network
+
+    Raises:
+        FileNotFoundError if the model isn't in the store, ValueError if verification fails
+        or the stored weights don't match the architecture (beyond BENIGN_KEYS)
+    """
+    model, entry = build_grounding_model(device, name, store_dir)
+
+    state = load_weights(os.path.join(store_dir, entry["weights"]["file"]), entry["format"])
+    try:
+        # assign=True keeps the mapped tensors as parameters instead of copying them
+        keys = model.load_state_dict(state, strict=False, assign=device == "cpu")
+    except TypeError:
+        # torch < 2.1
+        keys = model.load_state_dict(state, strict=False)
+
+    # strict=False only tolerates BENIGN_KEYS - anything else means the stored
+    # weights don't fit the model and it would run partly random
+    missing = [k for k in keys.missing_keys if not k.endswith(BENIGN_KEYS)]
+    unexpected = [k for k in keys.unexpected_keys if not k.endswith(BENIGN_KEYS)]
+    if missing or unexpected:
+        raise ValueError(
+            f"Stored weights don't match {name}: {len(missing)} missing keys {missing[:5]}, "
+            f"{len(unexpected)} unexpected keys {unexpected[:5]}"
+        )
+
+    model.eval()
+    return model.to(device)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "status": "py model_store.py status",
+                "verify": "py model_store.py verify [--full]",
+                "import": "py model_store.py import CONFIG.py CHECKPOINT.pth",
+                "fetch": "py model_store.py fetch"
+            },
+            "store": STORE_DIR,
+            "offline": "Set CLAUDE_VISION_OFFLINE=1 so detection never downloads",
+            "note": "Copy the store directory (manifest + files) to air-gapped machines"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    try:
+        if command == "status":
+            result = {"store": STORE_DIR, "offline": offline(), **read_manifest()}
+
+        elif command == "verify":
+            result = verify(full="--full" in sys.argv)
+
+        elif command == "import":
+            result = import_checkpoint(sys.argv[2], sys.argv[3])
+
+        elif command == "fetch":
+            result = fetch()
+
+        else:
+            result = {"error": f"Unknown command: {command}"}
+
+    except Exception as e:
+        result = {"error": str(e)}
+
+    print(json.dumps(result, indent=2))
@@ -59,6 +59,25 @@ def scroll(amount, x=None, y=None):
     print(f"Scrolling by {amount}")
     pyautogui.scroll(amount)
 
+def click_result(result, move_duration=0.5, click_delay=0.25):
+    """
+    Click the first match of a detection result ({"found", "matches": [{"center"}]})
+    Lives here so thin clients (vision_server.py click) can click locally
+    without importing easyocr / torch; prints nothing so JSON output stays clean
+    """
+    if result.get("found"):
+        x, y = result["matches"][0]["center"]
+
+        # Smooth movement to destination, short pause, then click
+        pyautogui.moveTo(x, y, duration=move_duration)
+        time.sleep(click_delay)
+        pyautogui.click()
+
+        result["clicked"] = True
+        result["clicked_at"] = {"x": x, "y": y}
+
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
@@ -0,0 +1,137 @@
+"""
+OCR Result Cache
+Content-addressed cache for raw reader.readtext output
+Key = hash(image pixels + reader configuration), so any number of text
+queries, thresholds or 'all' dumps on an unchanged screen cost a lookup
+Bounded in-memory LRU + optional on-disk store shared between CLI runs
+"""
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from vision_frame import frame_hash
+
+# Disk store cap - a changing screen writes a new file per frame
+DISK_MAX_ENTRIES = int(os.environ.get("CLAUDE_OCR_CACHE_MAX_FILES", "1024"))
+
+class OCRCache:
+    """
+    Args:
+        max_entries: In-memory LRU size (results are small - boxes and strings)
+        disk_dir: Optional directory for persistent entries (one JSON file per key)
+        max_disk_entries: Files kept in disk_dir; the least recently used are removed
+    """
+
+    def __init__(self, max_entries=64, disk_dir=None, max_disk_entries=DISK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(pixels, config):
+        """Hash of the pixel buffer, its shape and the reader configuration"""
+        return frame_hash(pixels, config)
+
+    def get(self, key):
+        """Cached readtext results or None"""
+        results = self._entries.get(key)
+        if results is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+        if self.disk_dir:
+            path = os.path.join(self.disk_dir, f"{key}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    results = [tuple(entry) for entry in json.load(f)]
+            except (OSError, ValueError):
+                results = None
+
+            if results is not None:
+                self.disk_hits += 1
+                try:
+                    # Mark as recently used for _evict_disk
+                    os.utime(path)
+                except OSError:
+                    pass
+                self._remember(key, results)
+                return results
+
+        self.misses += 1
+        return None
+
+    def put(self, key, results):
+        """
+        Store readtext results (converted to plain Python types)
+
+        Returns:
+            The normalized results
+        """
+        results = [
+            ([[float(x), float(y)] for x, y in bbox], str(text), float(conf))
+            for bbox, text, conf in results
+        ]
+        self._remember(key, results)
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # Write-then-rename so concurrent readers never see half a file
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(results, f)
+            os.replace(tmp_path, os.path.join(self.disk_dir, f"{key}.json"))
+            self._evict_disk()
+
+        return results
+
+    def _evict_disk(self):
+        """Remove the least recently used files beyond max_disk_entries"""
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    # Removed by another process meanwhile
+                    pass
+
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            return
+        files.sort()
+        for _, path in files[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, results):
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, disk=False):
+        self._entries.clear()
+        if disk and self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_dir": self.disk_dir,
+            "max_disk_entries": self.max_disk_entries
+        }
@@ -0,0 +1,226 @@
+"""
+Quantized EasyOCR (CPU)
+Precision modes for easy_ocr_vision.get_reader (CLAUDE_OCR_PRECISION):
+- "fp32":    plain float weights
+- "dynamic": EasyOCR's built-in dynamic int8 for the recognizer's LSTM/Linear
+             layers (easyocr.Reader default on CPU). CRAFT is all convolutions, so
+             dynamic quantization leaves the detector in fp32
+- "int8":    "dynamic" + a static int8 CRAFT detector (FX graph mode, calibrated
+             on real screenshots), saved as TorchScript and loaded from disk afterwards
+
+The int8 detector is built on first use in int8 mode and cached on disk.
+Calibration uses the screenshots in CLAUDE_OCR_CALIBRATION_DIR when set, otherwise
+generated UI text frames. Rebuild from your own screenshots:
+    py ocr_quantize.py build screenshot1.png screenshot2.png ...
+"""
+import sys
+import json
+import os
+import re
+
+try:
+    import torch
+    import easyocr
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+PRECISIONS = ("fp32", "dynamic", "int8")
+QUANT_DIR = os.environ.get("CLAUDE_OCR_QUANT_DIR", os.path.join("models", "quantized"))
+CALIBRATION_DIR = os.environ.get("CLAUDE_OCR_CALIBRATION_DIR")
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+def detector_path(quant_dir=QUANT_DIR):
+    """Cache file for the int8 detector (tied to the easyocr and torch versions)"""
+    tag = re.sub(r"[^0-9A-Za-z.]+", "_", f"easyocr{easyocr.__version__}_torch{torch.__version__}")
+    return os.path.join(quant_dir, f"craft_int8_{tag}.pt")
+
+def _qconfig_mapping():
+    from torch.ao.quantization import get_default_qconfig_mapping
+    backends = torch.backends.quantized.supported_engines
+    engine = "x86" if "x86" in backends else "fbgemm"
+    torch.backends.quantized.engine = engine
+    return get_default_qconfig_mapping(engine)
+
+def build_quantized_detector(reader, calibration_images, quant_dir=QUANT_DIR):
+    """
+    Static int8 quantization of the reader's CRAFT detector
+
+    Observers are calibrated by running reader.detect on real screenshots, so
+    activation ranges match what the detector sees in production
+
+    Args:
+        reader: fp32 or dynamic easyocr.Reader (its detector is left untouched)
+        calibration_images: Screenshots (paths or BGR arrays) - a handful is enough
+
+    Returns:
+        Dict with "path" of the saved TorchScript detector, or "error"
+    """
+    if not HAS_TORCH:
+        return {"error": "torch / easyocr not installed"}
+    if not calibration_images:
+        return {"error": "Calibration needs at least one screenshot"}
+
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    fp32_detector = reader.detector
+    fp32_detector.eval()
+    example = (torch.randn(1, 3, 256, 256),)
+
+    try:
+        prepared = prepare_fx(fp32_detector, _qconfig_mapping(), example)
+
+        # Calibrate through the normal EasyOCR preprocessing path
+        reader.detector = prepared
+        with torch.no_grad():
+            for image in calibration_images:
+                reader.detect(image)
+
+        quantized = convert_fx(prepared)
+        scripted = torch.jit.script(quantized)
+    except Exception as e:
+        return {"error": f"Detector quantization failed: {e}"}
+    finally:
+        reader.detector = fp32_detector
+
+    path = detector_path(quant_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.jit.save(scripted, tmp_path)
+    os.replace(tmp_path, path)
+
+    return {
+        "path": path,
+        "calibration_images": len(calibration_images),
+        "size_mb": round(os.path.getsize(path) / 1e6, 1)
+    }
+
+def synthetic_text_frames(count=4, width=1280, height=720, seed=0):
+    """
+    Generated UI-like frames (labels, buttons, dark and light themes) for
+    calibrating without real screenshots
+    """
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    fonts = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_PLAIN, cv2.FONT_HERSHEY_COMPLEX)
+    words = ("Play", "Solo", "Settings", "Quit", "Options", "Save changes", "Cancel", "Loading...", "Level 12", "OK")
+
+    frames = []
+    for i in range(count):
+        dark = i % 2 == 1
+        background = 30 if dark else 235
+        frame = np.full((height, width, 3), background, dtype=np.uint8)
+        for _ in range(60):
+            x, y = int(rng.integers(0, width - 200)), int(rng.integers(30, height - 10))
+            scale = float(rng.uniform(0.4, 1.6))
+            if rng.random() < 0.3:
+                # Button: filled box behind the label
+                fill = tuple(int(c) for c in rng.integers(0, 255, 3))
+                cv2.rectangle(frame, (x - 8, y - int(30 * scale)), (x + int(140 * scale), y + 10), fill, -1)
+                ink = (0, 0, 0) if sum(fill) > 380 else (255, 255, 255)
+            else:
+                ink = (220, 220, 220) if dark else (20, 20, 20)
+            cv2.putText(frame, str(rng.choice(words)), (x, y), fonts[int(rng.integers(len(fonts)))], scale, ink, 1 + int(scale > 1), cv2.LINE_AA)
+        frames.append(frame)
+    return frames
+
+def calibration_frames(calibration_dir=CALIBRATION_DIR):
+    """
+    Calibration images: screenshots in calibration_dir if it has any,
+    otherwise synthetic_text_frames()
+
+    Returns:
+        (list of paths / BGR arrays, source description)
+    """
+    if calibration_dir and os.path.isdir(calibration_dir):
+        images = sorted(
+            os.path.join(calibration_dir, name)
+            for name in os.listdir(calibration_dir)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if images:
+            return images, calibration_dir
+    return synthetic_text_frames(), "synthetic"
+
+def load_quantized_detector(quant_dir=QUANT_DIR):
+    """Cached int8 detector, or None if it hasn't been built for this torch/easyocr"""
+    if not HAS_TORCH:
+        return None
+    path = detector_path(quant_dir)
+    if not os.path.exists(path):
+        return None
+    _qconfig_mapping()
+    detector = torch.jit.load(path, map_location="cpu")
+    detector.eval()
+    return detector
+
+def load_or_build_detector(reader, quant_dir=QUANT_DIR, calibration_dir=CALIBRATION_DIR):
+    """
+    int8 detector from the cache, quantizing and saving it first if it isn't
+    built yet for this torch / easyocr (like grounding_optimize.load_optimized_model)
+
+    Args:
+        reader: dynamic easyocr.Reader used for calibration on a cache miss
+
+    Returns:
+        (detector or None, status dict) - status has "error" when the
+        detector stays fp32
+    """
+    if not HAS_TORCH:
+        return None, {"detector": "fp32", "error": "torch / easyocr not installed"}
+
+    path = detector_path(quant_dir)
+    status = {"detector": "int8", "path": path}
+
+    if not os.path.exists(path):
+        images, source = calibration_frames(calibration_dir)
+        print(f"Building int8 EasyOCR detector from {source} frames (first time only)...", file=sys.stderr)
+        built = build_quantized_detector(reader, images, quant_dir)
+        if "error" in built:
+            return None, {"detector": "fp32", "error": built["error"]}
+        status.update(built=True, calibration=source)
+
+    try:
+        return load_quantized_detector(quant_dir), status
+    except (OSError, RuntimeError) as e:
+        return None, {"detector": "fp32", "error": f"Int8 detector unusable: {e}"}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "build": "py ocr_quantize.py build SCREENSHOT [SCREENSHOT...]",
+                "info": "py ocr_quantize.py info"
+            },
+            "use": "set CLAUDE_OCR_PRECISION=int8 (or fp32 / dynamic)",
+            "compare": "py benchmark.py ocr-precision SCREENSHOT [SCREENSHOT...]"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if not HAS_TORCH:
+        result = {"error": "torch / easyocr not installed"}
+
+    elif command == "build":
+        from easy_ocr_vision import build_reader
+        result = build_quantized_detector(build_reader("dynamic"), sys.argv[2:])
+
+    elif command == "info":
+        path = detector_path()
+        result = {
+            "path": path,
+            "built": os.path.exists(path),
+            "engines": list(torch.backends.quantized.supported_engines),
+            "precision": os.environ.get("CLAUDE_OCR_PRECISION", "dynamic"),
+            "calibration": CALIBRATION_DIR or "synthetic"
+        }
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
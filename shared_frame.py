@@ -0,0 +1,234 @@
+"""
+Shared-Memory Frame Transport
+Capture process publishes raw frames into a named shared-memory block;
+detector processes attach to the latest frame by name as a zero-copy numpy view
+No PNG encode, no filesystem write, no decode per consumer
+
+Layout: 64-byte header + two frame slots (double buffered)
+    header: magic, version, width, height, stride, channels, format,
+            slot, slot_size, seq, timestamp
+The writer fills the slot readers aren't looking at, then bumps seq
+"""
+import sys
+import json
+import struct
+import time
+
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+MAGIC = b"CVFR"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIIIIQQd")
+HEADER_SIZE = 64
+SLOTS = 2
+
+FORMATS = {1: "BGR", 2: "BGRA", 3: "GRAY"}
+FORMAT_CODES = {name: code for code, name in FORMATS.items()}
+CHANNELS = {"BGR": 3, "BGRA": 4, "GRAY": 1}
+
+# Attached blocks stay open for the life of the process so views stay valid
+_attached = {}
+# Blocks created by a publisher in this process (their tracking is left alone)
+_published = set()
+
+def _untrack(shm):
+    """
+    Stop Python's resource tracker from unlinking a block we only attached to
+    (POSIX trackers otherwise destroy it when the reader exits)
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+class SharedFramePublisher:
+    """
+    Owns a named shared-memory frame buffer and publishes frames into it
+
+    Args:
+        name: Block name readers attach with (e.g. "claude_screen")
+        max_width, max_height: Largest frame this buffer will hold
+        fmt: "BGR", "BGRA" or "GRAY"
+    """
+
+    def __init__(self, name, max_width, max_height, fmt="BGR"):
+        self.name = name
+        self.fmt = fmt
+        self.channels = CHANNELS[fmt]
+        self.slot_size = max_width * max_height * self.channels
+        self.seq = 0
+        self.slot = SLOTS - 1
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + SLOTS * self.slot_size)
+        except FileExistsError:
+            # Leftover from a crashed publisher - take it over if it's big enough
+            self.shm = shared_memory.SharedMemory(name=name)
+            if self.shm.size < HEADER_SIZE + SLOTS * self.slot_size:
+                self.shm.close()
+                raise ValueError(f"Shared frame '{name}' exists and is too small")
+
+        _published.add(name)
+        self._write_header(0, 0, 0)
+
+    def _slot_view(self, slot, width, height):
+        stride = width * self.channels
+        shape = (height, width) if self.channels == 1 else (height, width, self.channels)
+        return np.ndarray(
+            shape,
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=HEADER_SIZE + slot * self.slot_size
+        ), stride
+
+    def _write_header(self, width, height, stride, timestamp=0.0):
+        HEADER.pack_into(
+            self.shm.buf, 0,
+            MAGIC, VERSION, width, height, stride, self.channels,
+            FORMAT_CODES[self.fmt], self.slot, self.slot_size, self.seq, timestamp
+        )
+
+    def publish(self, frame, convert=None):
+        """
+        Write a frame into the back slot and make it the latest
+
+        Args:
+            frame: uint8 numpy image
+            convert: Optional cv2 color conversion code applied while copying
+                     (e.g. cv2.COLOR_RGB2BGR for a PIL/pyautogui capture)
+
+        Returns:
+            New sequence number
+        """
+        height, width = frame.shape[:2]
+        if width * height * self.channels > self.slot_size:
+            raise ValueError(f"Frame {width}x{height} exceeds shared buffer capacity")
+
+        slot = (self.slot + 1) % SLOTS
+        view, stride = self._slot_view(slot, width, height)
+
+        if convert is not None:
+            cv2.cvtColor(frame, convert, dst=view)
+        else:
+            view[...] = frame
+
+        self.slot = slot
+        self.seq += 1
+        self._write_header(width, height, stride, time.time())
+        return self.seq
+
+    def close(self, unlink=True):
+        _published.discard(self.name)
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+def read_header(shm):
+    """Decode the header of an attached block into a dict"""
+    magic, version, width, height, stride, channels, fmt, slot, slot_size, seq, timestamp = HEADER.unpack_from(shm.buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a shared frame buffer")
+    return {
+        "version": version,
+        "width": width,
+        "height": height,
+        "stride": stride,
+        "channels": channels,
+        "format": FORMATS.get(fmt, "unknown"),
+        "slot": slot,
+        "slot_size": slot_size,
+        "seq": seq,
+        "timestamp": timestamp
+    }
+
+def _open(name):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:
+            _untrack(shm)
+        _attached[name] = shm
+    return shm
+
+def attach_frame(name):
+    """
+    Get the latest published frame by name without copying
+
+    The view stays valid until the publisher has written two more frames;
+    compare frame_seq(name) with info["seq"] afterwards if that matters, or use
+    copy_frame() for anything that holds the frame longer than a frame interval
+
+    Returns:
+        (numpy view of the frame, header dict)
+    """
+    shm = _open(name)
+    info = read_header(shm)
+    if info["seq"] == 0:
+        raise ValueError(f"No frame published on '{name}' yet")
+
+    shape = (info["height"], info["width"])
+    if info["channels"] > 1:
+        shape += (info["channels"],)
+
+    frame = np.ndarray(
+        shape,
+        dtype=np.uint8,
+        buffer=shm.buf,
+        offset=HEADER_SIZE + info["slot"] * info["slot_size"],
+        strides=(info["stride"], info["channels"], 1)[:len(shape)]
+    )
+    frame.flags.writeable = False
+    return frame, info
+
+def copy_frame(name, retries=3):
+    """
+    Copy of the latest published frame, safe to hold for any length of time
+
+    The sequence number is checked before and after the copy; if the publisher
+    moved on meanwhile it may have started overwriting the slot, so the copy
+    is retried
+
+    Returns:
+        (frame copy, header dict) - raises ValueError if no stable frame was read
+    """
+    for _ in range(retries):
+        view, info = attach_frame(name)
+        frame = view.copy()
+        if frame_seq(name) == info["seq"]:
+            return frame, info
+    raise ValueError(f"Shared frame '{name}' changed during every copy attempt")
+
+def frame_seq(name):
+    """Latest sequence number on a shared frame buffer (cheap change check)"""
+    return read_header(_open(name))["seq"]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "info": "py shared_frame.py info NAME"
+            },
+            "publish": "py claude_vision.py publish NAME [fps] [frames]",
+            "consume": "Pass 'shm://NAME' as IMAGE to any detector CLI"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if command == "info":
+        try:
+            result = read_header(_open(sys.argv[2]))
+        except (FileNotFoundError, ValueError) as e:
+            result = {"error": str(e)}
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,164 @@
+"""
+Fuzzy Text Index
+Built once per OCR result; answers many typo-tolerant queries without
+rescanning every box:
+- normalized forms (case, accents, common OCR digit/letter confusions)
+- bigram postings to pick candidate boxes (bigrams rather than trigrams so
+  pruning still works at ~1 edit per 3 characters)
+- edit-distance ranking (best matching substring, so "Solo" finds "Solo Mode")
+"""
+import sys
+import json
+import unicodedata
+from collections import defaultdict
+
+# Characters EasyOCR commonly confuses, folded onto one canonical letter
+OCR_CONFUSIONS = str.maketrans({
+    "0": "o",
+    "1": "l", "i": "l", "|": "l", "!": "l",
+    "5": "s", "$": "s",
+    "8": "b",
+    "2": "z",
+    "6": "g",
+})
+OCR_DIGRAPHS = (("rn", "m"), ("vv", "w"))
+
+# Default tolerance: edits allowed per query character
+MAX_DISTANCE_RATIO = 0.34
+GRAM = 2
+
+def normalize(text):
+    """Lowercase, strip accents, fold OCR confusions and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.translate(OCR_CONFUSIONS)
+    for digraph, letter in OCR_DIGRAPHS:
+        text = text.replace(digraph, letter)
+    return " ".join(text.split())
+
+def ngrams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+def substring_distance(query, text):
+    """
+    Edit distance between query and its best matching substring of text
+    (free start and end in text - Sellers' algorithm)
+    """
+    previous = [0] * (len(text) + 1)
+    for i, qc in enumerate(query, 1):
+        current = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (qc != tc)
+            )
+        previous = current
+    return min(previous)
+
+class TextIndex:
+    """
+    Args:
+        entries: OCR boxes - dicts with at least "text" (find_all_text "texts" format)
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.normalized = [normalize(entry["text"]) for entry in self.entries]
+        self.postings = defaultdict(set)
+        for entry_id, text in enumerate(self.normalized):
+            for gram in ngrams(text):
+                self.postings[gram].add(entry_id)
+
+    @classmethod
+    def from_ocr(cls, result):
+        """Index a find_all_text / IncrementalOCR.update result"""
+        return cls(result.get("texts", []))
+
+    def candidates(self, query, max_distance):
+        """
+        Entry ids that can be within max_distance edits of query
+        (q-gram lemma: each edit destroys at most GRAM n-grams)
+        """
+        grams = ngrams(query)
+        needed = len(grams) - GRAM * max_distance
+        if needed <= 0:
+            # Query too short / tolerance too loose for n-grams to prune
+            return range(len(self.entries))
+
+        counts = defaultdict(int)
+        for gram in grams:
+            for entry_id in self.postings.get(gram, ()):
+                counts[entry_id] += 1
+        return [entry_id for entry_id, count in counts.items() if count >= needed]
+
+    def search(self, query, max_distance=None, limit=None):
+        """
+        Typo-tolerant lookup
+
+        Args:
+            query: Text to find (e.g., "Solo" also matches OCR'd "So1o")
+            max_distance: Allowed edits (default: MAX_DISTANCE_RATIO * query length)
+            limit: Optional maximum number of matches
+
+        Returns:
+            Matching entries (copies) with "distance" and "score", best first
+        """
+        needle = normalize(query)
+        if not needle:
+            return []
+        if max_distance is None:
+            max_distance = int(len(needle) * MAX_DISTANCE_RATIO)
+
+        matches = []
+        for entry_id in self.candidates(needle, max_distance):
+            distance = substring_distance(needle, self.normalized[entry_id])
+            if distance <= max_distance:
+                matches.append({
+                    **self.entries[entry_id],
+                    "distance": distance,
+                    "score": round(1 - distance / len(needle), 3)
+                })
+
+        matches.sort(key=lambda m: (m["distance"], -m.get("confidence", 0)))
+        return matches[:limit] if limit else matches
+
+    def search_many(self, queries, max_distance=None, limit=None):
+        """Run several queries against the same index"""
+        return {query: self.search(query, max_distance, limit) for query in queries}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "search": "py text_index.py search IMAGE 'So1o,Play' [max_distance] [conf]"
+            },
+            "note": "One OCR pass, then typo-tolerant lookups (case, accents, 0/o 1/l 5/s ...)"
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if command == "search":
+        from easy_ocr_vision import find_all_text
+
+        image = sys.argv[2]
+        queries = [t for t in sys.argv[3].split(",") if t]
+        max_distance = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        conf = float(sys.argv[5]) if len(sys.argv) > 5 else 0.3
+
+        ocr = find_all_text(image, conf)
+        if "error" in ocr:
+            result = ocr
+        else:
+            index = TextIndex.from_ocr(ocr)
+            result = {
+                "indexed": len(index.entries),
+                "results": index.search_many(queries, max_distance)
+            }
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
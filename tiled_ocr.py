@@ -0,0 +1,229 @@
+"""
+Tiled Parallel OCR
+Splits large / multi-monitor frames into overlapping tiles and runs them
+across a pool of worker processes, each holding a warm EasyOCR reader
+Boxes cut by a tile seam or duplicated in the overlap are merged, and the
+result has the same shape as find_all_text
+"""
+import sys
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from easy_ocr_vision import HAS_EASYOCR
+from vision_frame import load_bgr, roi_view
+
+DEFAULT_TILE = 1024
+DEFAULT_OVERLAP = 96
+
+# Worker pool stays up between calls so readers stay warm
+_pool = None
+_pool_workers = 0
+
+def _init_worker():
+    """Pool initializer: one torch thread per process, reader loaded once"""
+    # First call wins - get_reader() would otherwise apply the tuned
+    # single-process thread count and every worker would use all cores
+    from tuning import apply_torch_threads
+    apply_torch_threads({"torch_threads": 1, "interop_threads": 1})
+
+    from easy_ocr_vision import get_reader
+    get_reader()
+
+def _ocr_tile(tile, offset_x, offset_y):
+    """Worker: OCR one tile, return (text, [x1, y1, x2, y2], conf) shifted by the tile offset"""
+    from easy_ocr_vision import readtext_cached
+
+    boxes = []
+    for (bbox, text, conf) in readtext_cached(tile):
+        x_coords = [point[0] for point in bbox]
+        y_coords = [point[1] for point in bbox]
+        boxes.append((
+            text,
+            [int(min(x_coords)) + offset_x, int(min(y_coords)) + offset_y,
+             int(max(x_coords)) + offset_x, int(max(y_coords)) + offset_y],
+            float(conf)
+        ))
+    return boxes
+
+def get_pool(workers=None):
+    """Process pool of warm OCR workers (created on first use)"""
+    global _pool, _pool_workers
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        _pool_workers = workers
+    return _pool
+
+def plan_tiles(width, height, tile_size=DEFAULT_TILE, overlap=DEFAULT_OVERLAP):
+    """
+    Overlapping tile rectangles covering the frame
+
+    Returns:
+        List of [x1, y1, x2, y2]
+
+    Raises:
+        ValueError if overlap isn't smaller than tile_size (tiles would never advance)
+    """
+    if overlap < 0 or overlap >= tile_size:
+        raise ValueError(f"Tile overlap ({overlap}) must be between 0 and tile_size ({tile_size})")
+
+    def spans(length):
+        if length <= tile_size:
+            return [(0, length)]
+        step = tile_size - overlap
+        starts = list(range(0, length - tile_size, step)) + [length - tile_size]
+        return [(start, start + tile_size) for start in starts]
+
+    return [
+        [x1, y1, x2, y2]
+        for (y1, y2) in spans(height)
+        for (x1, x2) in spans(width)
+    ]
+
+def _area(box):
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+def _intersection(a, b):
+    return _area([max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])])
+
+def merge_tile_boxes(tile_boxes, tiles, width, height, edge=2):
+    """
+    Merge per-tile OCR boxes into one full-frame list
+
+    - Boxes touching an inner tile border are probably cut by the seam; they are
+      dropped when a neighbor tile saw an uncut box there
+    - Duplicates from the overlap band (mostly overlapping boxes) keep the most confident
+
+    Args:
+        tile_boxes: Per-tile lists of (text, bbox, conf)
+        tiles: Tile rectangles matching tile_boxes
+        width, height: Frame size (frame borders aren't seams)
+    """
+    whole, cut = [], []
+
+    for boxes, (tx1, ty1, tx2, ty2) in zip(tile_boxes, tiles):
+        for text, bbox, conf in boxes:
+            at_seam = (
+                (tx1 > 0 and bbox[0] - tx1 <= edge) or
+                (ty1 > 0 and bbox[1] - ty1 <= edge) or
+                (tx2 < width and tx2 - bbox[2] <= edge) or
+                (ty2 < height and ty2 - bbox[3] <= edge)
+            )
+            (cut if at_seam else whole).append((text, bbox, conf))
+
+    merged = []
+    for candidates in (whole, cut):
+        for text, bbox, conf in sorted(candidates, key=lambda b: -b[2]):
+            duplicate = any(
+                _intersection(bbox, kept[1]) > 0.5 * min(_area(bbox), _area(kept[1]))
+                for kept in merged
+            )
+            if not duplicate:
+                merged.append((text, bbox, conf))
+
+    merged.sort(key=lambda b: (b[1][1], b[1][0]))
+    return merged
+
+def find_all_text_tiled(image_path, min_confidence=0.5, tile_size=DEFAULT_TILE,
+                        overlap=DEFAULT_OVERLAP, workers=None, roi=None):
+    """
+    Extract ALL text like find_all_text, with tiles OCR'd in parallel processes
+
+    Args:
+        image_path: Path to screenshot, numpy BGR frame or PIL image
+        min_confidence: Minimum OCR confidence
+        tile_size: Tile edge in pixels
+        overlap: Pixels shared by neighboring tiles (should exceed typical word width)
+        workers: Worker processes (default: cores - 1)
+        roi: Optional [x1, y1, x2, y2] - only OCR this rectangle
+
+    Returns:
+        Dict with "count" and "texts" (find_all_text format) plus tiling stats
+    """
+    if not HAS_EASYOCR:
+        return {"error": "easyocr not installed"}
+
+    try:
+        img = load_bgr(image_path)
+        if img is None:
+            return {"error": "Could not load image"}
+
+        view, offset_x, offset_y, roi = roi_view(img, roi)
+        height, width = view.shape[:2]
+        tiles = plan_tiles(width, height, tile_size, overlap)
+
+        # Tiles and merging work in ROI coordinates; screen offset is added at the end
+        if len(tiles) == 1:
+            # Nothing to parallelize
+            tile_boxes = [_ocr_tile(view, 0, 0)]
+        else:
+            pool = get_pool(workers)
+            futures = [
+                pool.submit(_ocr_tile, view[y1:y2, x1:x2].copy(), x1, y1)
+                for (x1, y1, x2, y2) in tiles
+            ]
+            tile_boxes = [future.result() for future in futures]
+
+        boxes = merge_tile_boxes(tile_boxes, tiles, width, height)
+
+        texts = []
+        for text, (x1, y1, x2, y2), conf in boxes:
+            x1, x2 = x1 + offset_x, x2 + offset_x
+            y1, y2 = y1 + offset_y, y2 + offset_y
+            if conf >= min_confidence:
+                texts.append({
+                    "text": text,
+                    "bbox": [x1, y1, x2, y2],
+                    "center": [(x1 + x2) // 2, (y1 + y2) // 2],
+                    "confidence": round(conf, 3)
+                })
+
+        return {
+            "count": len(texts),
+            "texts": texts,
+            "roi": roi,
+            "tiles": len(tiles),
+            "workers": _pool_workers if len(tiles) > 1 else 1
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "all": "py tiled_ocr.py all IMAGE [conf] [--workers N] [--tile PX] [--overlap PX]"
+            },
+            "note": "Parallel OCR for 4K / multi-monitor captures - same output as easy_ocr_vision.py all"
+        }, indent=2))
+        sys.exit(1)
+
+    options = {"--workers": None, "--tile": DEFAULT_TILE, "--overlap": DEFAULT_OVERLAP}
+    for flag in list(options):
+        if flag in sys.argv:
+            i = sys.argv.index(flag)
+            options[flag] = int(sys.argv[i + 1])
+            del sys.argv[i:i + 2]
+
+    command = sys.argv[1].lower()
+
+    if command == "all":
+        image = sys.argv[2]
+        conf = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+        result = find_all_text_tiled(
+            image, conf,
+            tile_size=options["--tile"],
+            overlap=options["--overlap"],
+            workers=options["--workers"]
+        )
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,119 @@
+"""
+Host Tuning
+Per-machine settings picked by 'py benchmark.py tune' and loaded automatically
+by easy_ocr_vision.get_reader and detect_ui_grounding.get_model:
+- torch intra-op / inter-op threads
+- EasyOCR recognition batch size
+- OCR input scale (frames are resized before OCR, boxes mapped back)
+
+File: vision_tuning.json next to the scripts (override with CLAUDE_VISION_TUNING)
+"""
+import sys
+import json
+import os
+import platform
+import time
+
+TUNING_FILE = os.environ.get(
+    "CLAUDE_VISION_TUNING",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vision_tuning.json")
+)
+
+DEFAULT_TUNING = {
+    "torch_threads": None,      # None = torch default
+    "interop_threads": None,
+    "ocr_batch_size": 1,
+    "ocr_scale": 1.0
+}
+
+_threads_applied = False
+
+def load_tuning(path=TUNING_FILE):
+    """
+    Tuned settings merged over the defaults
+    Thread counts are ignored when the file was tuned on a machine with a
+    different core count (e.g. copied from a workstation to a VM)
+    """
+    tuning = dict(DEFAULT_TUNING)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return tuning
+
+    for key in DEFAULT_TUNING:
+        if key in saved.get("settings", {}):
+            tuning[key] = saved["settings"][key]
+
+    if saved.get("host", {}).get("cpus") != os.cpu_count():
+        print(f"Tuning file {path} is from another machine - keeping default threads", file=sys.stderr)
+        tuning["torch_threads"] = tuning["interop_threads"] = None
+
+    return tuning
+
+def save_tuning(settings, report=None, path=TUNING_FILE):
+    """Persist tuned settings with the host they were measured on"""
+    data = {
+        "settings": {key: settings.get(key, DEFAULT_TUNING[key]) for key in DEFAULT_TUNING},
+        "host": {"name": platform.node(), "cpus": os.cpu_count(), "machine": platform.machine()},
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "report": report
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return data
+
+def apply_torch_threads(tuning=None):
+    """
+    Set torch thread pools from the tuning (first call wins - inter-op
+    threads can't change once torch has started parallel work)
+    """
+    global _threads_applied
+    if _threads_applied:
+        return
+    _threads_applied = True
+
+    tuning = tuning or load_tuning()
+    try:
+        import torch
+    except ImportError:
+        return
+
+    if tuning.get("torch_threads"):
+        torch.set_num_threads(int(tuning["torch_threads"]))
+    if tuning.get("interop_threads"):
+        try:
+            torch.set_num_interop_threads(int(tuning["interop_threads"]))
+        except RuntimeError:
+            # Parallel work already ran in this process
+            pass
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "show": "py tuning.py show",
+                "reset": "py tuning.py reset"
+            },
+            "tune": "py benchmark.py tune IMAGE [IMAGE...] [--max-loss 0.02]",
+            "file": TUNING_FILE
+        }, indent=2))
+        sys.exit(1)
+
+    command = sys.argv[1].lower()
+
+    if command == "show":
+        result = {"file": TUNING_FILE, "exists": os.path.exists(TUNING_FILE), "active": load_tuning()}
+
+    elif command == "reset":
+        if os.path.exists(TUNING_FILE):
+            os.remove(TUNING_FILE)
+        result = {"file": TUNING_FILE, "active": load_tuning()}
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
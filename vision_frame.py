@@ -0,0 +1,302 @@
+"""
+Frame Input Helpers
+Lets every detector take a file path, a numpy frame or a PIL image
+so captures can be handed over in memory instead of via temp_screen.png
+
+Frame wraps one decoded image and memoizes derived planes (gray, blurs, edges,
+HSV, color labels, pyramids) so detectors handed the same Frame never decode or
+convert the screenshot twice
+"""
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# Images named "shm://NAME" are read from a shared-memory frame buffer,
+# "ring://FILE" from the latest frame of a capture ring file
+SHARED_PREFIX = "shm://"
+RING_PREFIX = "ring://"
+
+def is_shared(image):
+    """True if image names a shared frame ("shm://NAME" or "ring://FILE")"""
+    return isinstance(image, str) and image.startswith((SHARED_PREFIX, RING_PREFIX))
+
+def is_path(image):
+    """True if image is a file path rather than in-memory pixels"""
+    return isinstance(image, (str, os.PathLike)) and not is_shared(image)
+
+def load_bgr(image):
+    """
+    Normalize any supported image input to an OpenCV BGR array
+
+    Args:
+        image: File path, "shm://NAME" shared frame, "ring://FILE" latest ring frame,
+               numpy array (BGR/BGRA/gray, OpenCV convention) or PIL image (RGB)
+
+    Returns:
+        uint8 HxWx3 BGR numpy array, or None if the image can't be loaded
+    """
+    if image is None:
+        return None
+
+    if isinstance(image, Frame):
+        return image.bgr
+
+    if is_shared(image) and image.startswith(SHARED_PREFIX):
+        # Detectors hold frames for seconds (OCR, GroundingDINO) - take a
+        # sequence-checked copy, the publisher reuses the slot two frames later
+        from shared_frame import copy_frame
+        try:
+            image = copy_frame(image[len(SHARED_PREFIX):])[0]
+        except (FileNotFoundError, ValueError):
+            return None
+
+    elif is_shared(image):
+        from frame_ring import FrameRing
+        try:
+            ring = FrameRing.open(image[len(RING_PREFIX):])
+        except (OSError, ValueError):
+            return None
+        entry = ring.latest(copy=True)
+        ring.close()
+        if entry is None:
+            return None
+        image = entry[0]
+
+    elif is_path(image):
+        return cv2.imread(os.fspath(image))
+
+    if HAS_PIL and isinstance(image, Image.Image):
+        rgb = np.asarray(image.convert("RGB"))
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if image.ndim == 3 and image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        if image.ndim == 3 and image.shape[2] == 3:
+            return image
+
+    return None
+
+def to_rgb(image):
+    """Image input → RGB numpy array (or None)"""
+    bgr = load_bgr(image)
+    if bgr is None:
+        return None
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+def to_pil(image):
+    """Image input → PIL RGB image (or None)"""
+    if HAS_PIL and isinstance(image, Image.Image):
+        return image.convert("RGB")
+
+    rgb = to_rgb(image)
+    if rgb is None:
+        return None
+    return Image.fromarray(rgb)
+
+def frame_hash(pixels, config=None):
+    """Content hash of a frame's pixels, shape and an optional settings dict (cache keys)"""
+    digest = hashlib.blake2b(digest_size=16)
+    if config is not None:
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    digest.update(f"{pixels.shape}|{pixels.dtype}".encode("utf-8"))
+    digest.update(np.ascontiguousarray(pixels).data)
+    return digest.hexdigest()
+
+# Extra rows kept above/below a target_y band so elements whose center is in
+# the band aren't clipped (detectors with a known size pass their own margin)
+ROI_MARGIN = 32
+
+def resolve_roi(shape, roi=None, target_y=None, tolerance=20, margin=ROI_MARGIN):
+    """
+    Turn an ROI request into a clipped pixel rectangle
+
+    Args:
+        shape: Image shape (height, width, ...)
+        roi: None (full frame), "band" (rows around target_y) or [x1, y1, x2, y2]
+        target_y: Band center for "band" mode
+        tolerance: Band half-height (same meaning as the post-filter tolerance)
+        margin: Extra rows so elements centered in the band stay whole
+
+    Returns:
+        [x1, y1, x2, y2] in screen coordinates, or None for the full frame
+
+    Raises:
+        ValueError for an unknown mode, "band" without target_y or an ROI outside the image
+    """
+    if roi is None:
+        return None
+
+    height, width = shape[:2]
+
+    if isinstance(roi, str):
+        if roi != "band":
+            raise ValueError(f"Unknown ROI mode: {roi}")
+        if target_y is None:
+            raise ValueError("band ROI needs target_y")
+        x1, x2 = 0, width
+        y1 = target_y - tolerance - margin
+        y2 = target_y + tolerance + margin + 1
+    else:
+        x1, y1, x2, y2 = [int(v) for v in roi]
+
+    x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+    y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+
+    if x2 <= x1 or y2 <= y1:
+        raise ValueError(f"ROI {roi} is outside the image")
+
+    return [x1, y1, x2, y2]
+
+def roi_view(img, roi=None, target_y=None, tolerance=20, margin=ROI_MARGIN):
+    """
+    Crop an image to its ROI without copying
+
+    Returns:
+        (view, offset_x, offset_y, rect) - add the offsets to map view
+        coordinates back to screen space; rect is None for the full frame
+    """
+    rect = resolve_roi(img.shape, roi, target_y, tolerance, margin)
+    if rect is None:
+        return img, 0, 0, None
+
+    x1, y1, x2, y2 = rect
+    return img[y1:y2, x1:x2], x1, y1, rect
+
+class Frame:
+    """
+    A decoded BGR image plus derived planes, each computed on first use
+
+    Pass the same Frame to several detectors (anything that accepts an image
+    input accepts a Frame) and gray / blur / Canny / HSV / color labels are
+    computed once for all of them
+
+    Args:
+        bgr: uint8 HxWx3 BGR array
+        offset: Screen position of this image's top-left pixel (ROI views)
+        rect: [x1, y1, x2, y2] of the view in screen coordinates, None for a full frame
+    """
+
+    # Per-pixel planes - a view can slice them from its parent instead of recomputing
+    POINTWISE = ("gray", "hsv", "labels")
+
+    def __init__(self, bgr, offset=(0, 0), rect=None):
+        self.bgr = bgr
+        self.offset = offset
+        self.rect = rect
+        self._planes = {}
+        self._views = {}
+
+    @classmethod
+    def load(cls, image):
+        """Frame for any image input (a Frame is returned as is), or None if it can't be loaded"""
+        if isinstance(image, Frame):
+            return image
+        bgr = load_bgr(image)
+        return cls(bgr) if bgr is not None else None
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    def _plane(self, key, build):
+        plane = self._planes.get(key)
+        if plane is None:
+            plane = self._planes[key] = build()
+        return plane
+
+    @property
+    def gray(self):
+        return self._plane("gray", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self):
+        return self._plane("hsv", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV))
+
+    def blurred(self, ksize, sigma=0):
+        """Gaussian blur of the gray plane with a ksize x ksize kernel"""
+        return self._plane(("blur", ksize, sigma), lambda: cv2.GaussianBlur(self.gray, (ksize, ksize), sigma))
+
+    def edges(self, low=50, high=150, blur=5):
+        """Canny edges of the blurred gray plane"""
+        return self._plane(("edges", low, high, blur), lambda: cv2.Canny(self.blurred(blur), low, high))
+
+    def pyramid(self, levels, blur=None):
+        """
+        Gaussian pyramid of the gray plane, level 0 = full resolution (up to levels + 1 levels)
+        blur=(ksize, sigma) builds it from that blurred plane instead
+        """
+        base = (lambda: [self.blurred(*blur)]) if blur else (lambda: [self.gray])
+        pyramid = self._plane(("pyramid", blur) if blur else "pyramid", base)
+        while len(pyramid) <= levels and min(pyramid[-1].shape[:2]) >= 2:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid[:levels + 1]
+
+    @property
+    def labels(self):
+        """Palette color index per pixel (color_segment.classify)"""
+        from color_segment import classify
+        return self._plane("labels", lambda: classify(self.bgr))
+
+    @property
+    def segmentation(self):
+        """color_segment.ColorSegmentation over this frame (regions in screen coordinates)"""
+        from color_segment import ColorSegmentation
+        return self._plane("segmentation", lambda: ColorSegmentation(offset=self.offset, labels=self.labels))
+
+    def crop(self, roi=None, target_y=None, tolerance=20, margin=ROI_MARGIN):
+        """
+        Frame for a region of interest (a view sharing pixels and per-pixel planes)
+
+        Returns:
+            (view Frame, rect) - rect is None and the view is this frame for the full frame
+        """
+        rect = resolve_roi(self.shape, roi, target_y, tolerance, margin)
+        if rect is None:
+            return self, None
+
+        key = tuple(rect)
+        view = self._views.get(key)
+        if view is None:
+            x1, y1, x2, y2 = rect
+            view = Frame(self.bgr[y1:y2, x1:x2], (self.offset[0] + x1, self.offset[1] + y1), rect)
+            for name in self.POINTWISE:
+                if name in self._planes:
+                    view._planes[name] = self._planes[name][y1:y2, x1:x2]
+            self._views[key] = view
+        return view, rect
+
+def pop_roi_arg(argv):
+    """
+    Strip ROI flags from a CLI argv list (in place) so positional parsing is unchanged
+
+    Flags:
+        --band                 Only process rows around target_y
+        --roi X1,Y1,X2,Y2      Only process this rectangle
+
+    Returns:
+        roi value for the detector functions (None, "band" or [x1, y1, x2, y2])
+    """
+    roi = None
+
+    if "--band" in argv:
+        argv.remove("--band")
+        roi = "band"
+
+    if "--roi" in argv:
+        i = argv.index("--roi")
+        roi = [int(v) for v in argv[i + 1].split(",")]
+        del argv[i:i + 2]
+
+    return roi
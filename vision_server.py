@@ -0,0 +1,330 @@
+"""
+Warm Vision Server
+Keeps EasyOCR and GroundingDINO loaded in one long-running process
+Thin clients forward text/all/detect/click/smart commands as JSON over a local socket
+Per-request cost becomes inference only - no Python/torch/model cold start
+"""
+import sys
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+# Unix socket path (override with CLAUDE_VISION_SOCKET)
+SOCKET_PATH = os.environ.get(
+    "CLAUDE_VISION_SOCKET",
+    os.path.join(tempfile.gettempdir(), "claude_vision.sock")
+)
+
+# Windows Python has no AF_UNIX - fall back to loopback TCP there
+HAS_UNIX_SOCKET = hasattr(socket, "AF_UNIX")
+TCP_ADDRESS = ("127.0.0.1", int(os.environ.get("CLAUDE_VISION_PORT", "47613")))
+
+# Models are not safe to run concurrently - one inference at a time
+_inference_lock = threading.Lock()
+
+def _handle_text(args):
+    from easy_ocr_vision import find_text
+    return find_text(args["image"], args["search"], args.get("confidence", 0.5), roi=args.get("roi"), fast=args.get("fast", False))
+
+def _handle_texts(args):
+    from easy_ocr_vision import find_texts
+    return find_texts(args["image"], args["searches"], args.get("confidence", 0.5), roi=args.get("roi"), fast=args.get("fast", False))
+
+def _handle_all(args):
+    from easy_ocr_vision import find_all_text
+    return find_all_text(args["image"], args.get("confidence", 0.5), roi=args.get("roi"))
+
+def _handle_detect(args):
+    from detect_unified import unified_detect
+    return unified_detect(
+        args["image"],
+        args["description"],
+        args.get("target_y"),
+        args.get("tolerance", 20),
+        args.get("confidence", 0.5),
+        roi=args.get("roi")
+    )
+
+def _handle_smart(args):
+    from detect_ui_advanced import smart_detect
+    return smart_detect(
+        args["image"],
+        args["description"],
+        args.get("target_y"),
+        args.get("tolerance", 20),
+        roi=args.get("roi")
+    )
+
+# Server-side commands never move the mouse: "click" is resolved as "text"
+# on the server and the client performs the click locally
+HANDLERS = {
+    "text": _handle_text,
+    "texts": _handle_texts,
+    "all": _handle_all,
+    "detect": _handle_detect,
+    "smart": _handle_smart,
+}
+
+def warm_up(grounding=True):
+    """Load model singletons so the first request doesn't pay for them"""
+    loaded = {}
+
+    try:
+        from easy_ocr_vision import get_reader, HAS_EASYOCR
+        if HAS_EASYOCR:
+            get_reader()
+        loaded["EasyOCR"] = HAS_EASYOCR
+    except Exception as e:
+        print(f"EasyOCR warm-up failed: {e}", file=sys.stderr)
+        loaded["EasyOCR"] = False
+
+    if grounding:
+        try:
+            from detect_ui_grounding import get_model, HAS_GROUNDING_DINO
+            model = get_model()[0] if HAS_GROUNDING_DINO else None
+            loaded["GroundingDINO"] = model is not None
+        except Exception as e:
+            print(f"GroundingDINO warm-up failed: {e}", file=sys.stderr)
+            loaded["GroundingDINO"] = False
+
+    return loaded
+
+def dispatch(request):
+    """Run one decoded request and return the JSON-serializable response"""
+    command = request.get("command")
+    args = request.get("args", {})
+
+    if command == "ping":
+        return {"status": "ok", "pid": os.getpid()}
+
+    handler = HANDLERS.get(command)
+    if handler is None:
+        return {"error": f"Unknown command: {command}"}
+
+    start = time.perf_counter()
+    try:
+        with _inference_lock:
+            result = handler(args)
+    except KeyError as e:
+        return {"error": f"Missing argument: {e.args[0]}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+    result["server_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line"""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"error": f"Invalid JSON: {e}"}
+            else:
+                if request.get("command") == "shutdown":
+                    self._send({"status": "stopping"})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                response = dispatch(request)
+
+            self._send(response)
+
+    def _send(self, response):
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+if HAS_UNIX_SOCKET:
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+def serve(grounding=True):
+    """Start the server (blocks until a shutdown request arrives)"""
+    if HAS_UNIX_SOCKET:
+        if os.path.exists(SOCKET_PATH):
+            # Stale socket from a crashed server
+            if ping().get("status") == "ok":
+                print(f"Server already running on {SOCKET_PATH}", file=sys.stderr)
+                return
+            os.remove(SOCKET_PATH)
+        address = SOCKET_PATH
+    else:
+        address = TCP_ADDRESS
+
+    print("Warming up models...", file=sys.stderr)
+    loaded = warm_up(grounding)
+    print(f"Models ready: {json.dumps(loaded)}", file=sys.stderr)
+
+    server = _Server(address, _RequestHandler)
+    print(f"Listening on {address}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if HAS_UNIX_SOCKET and os.path.exists(SOCKET_PATH):
+            os.remove(SOCKET_PATH)
+
+def send_request(command, args=None, timeout=120.0):
+    """
+    Send a single request to the running server
+
+    Returns:
+        Response dict, or None if no server is reachable
+    """
+    try:
+        if HAS_UNIX_SOCKET:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(SOCKET_PATH)
+        else:
+            sock = socket.create_connection(TCP_ADDRESS, timeout=timeout)
+    except OSError:
+        return None
+
+    with sock:
+        payload = json.dumps({"command": command, "args": args or {}}) + "\n"
+        sock.sendall(payload.encode("utf-8"))
+
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+
+    if not line:
+        return {"error": "Server closed connection"}
+    return json.loads(line)
+
+def ping():
+    """Check whether a server is running"""
+    response = send_request("ping", timeout=2.0)
+    return response if response is not None else {"status": "not running"}
+
+def forward(command, args):
+    """
+    Forward a command to the server, falling back to in-process detection
+    so the thin client still works when no server is running
+    """
+    from vision_frame import is_shared
+
+    if args.get("image") and not is_shared(args["image"]):
+        # Server may have a different working directory (shm:// / ring:// names aren't paths)
+        args["image"] = os.path.abspath(args["image"])
+
+    result = send_request(command, args)
+    if result is not None:
+        return result
+
+    print("Vision server not running - detecting in-process (cold start)", file=sys.stderr)
+    return HANDLERS[command](args)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "commands": {
+                "serve": "py vision_server.py serve [--no-grounding]",
+                "status": "py vision_server.py status",
+                "stop": "py vision_server.py stop",
+                "text": "py vision_server.py text IMAGE 'Search Text' [conf]",
+                "texts": "py vision_server.py texts IMAGE 'Solo,Play,Quit' [conf]",
+                "all": "py vision_server.py all IMAGE [conf]",
+                "click": "py vision_server.py click IMAGE 'Text' [conf]",
+                "detect": "py vision_server.py detect IMAGE 'description' [target_y] [tolerance] [conf]",
+                "smart": "py vision_server.py smart IMAGE 'description' [target_y] [tolerance]"
+            },
+            "roi": "Add --band or --roi X1,Y1,X2,Y2 (forwarded to the server)",
+            "fast": "Add --fast to text/texts/click for coarse-to-fine OCR search",
+            "socket": SOCKET_PATH if HAS_UNIX_SOCKET else f"{TCP_ADDRESS[0]}:{TCP_ADDRESS[1]}",
+            "note": "Start 'serve' once; other commands reuse its warm models"
+        }, indent=2))
+        sys.exit(1)
+
+    from vision_frame import pop_roi_arg
+    roi = pop_roi_arg(sys.argv)
+    fast = "--fast" in sys.argv
+    if fast:
+        sys.argv.remove("--fast")
+    command = sys.argv[1].lower()
+
+    if command == "serve":
+        serve(grounding="--no-grounding" not in sys.argv)
+        sys.exit(0)
+
+    elif command == "status":
+        result = ping()
+
+    elif command == "stop":
+        result = send_request("shutdown", timeout=5.0) or {"status": "not running"}
+
+    elif command == "text":
+        result = forward("text", {
+            "image": sys.argv[2],
+            "search": sys.argv[3],
+            "confidence": float(sys.argv[4]) if len(sys.argv) > 4 else 0.5,
+            "roi": roi,
+            "fast": fast
+        })
+
+    elif command == "texts":
+        result = forward("texts", {
+            "image": sys.argv[2],
+            "searches": [t for t in sys.argv[3].split(",") if t],
+            "confidence": float(sys.argv[4]) if len(sys.argv) > 4 else 0.5,
+            "roi": roi,
+            "fast": fast
+        })
+
+    elif command == "all":
+        result = forward("all", {
+            "image": sys.argv[2],
+            "confidence": float(sys.argv[3]) if len(sys.argv) > 3 else 0.5,
+            "roi": roi
+        })
+
+    elif command == "click":
+        # mouse_control only needs pyautogui - no easyocr / torch import in the client
+        from mouse_control import click_result
+        result = forward("text", {
+            "image": sys.argv[2],
+            "search": sys.argv[3],
+            "confidence": float(sys.argv[4]) if len(sys.argv) > 4 else 0.5,
+            "roi": roi,
+            "fast": fast
+        })
+        result = click_result(result)
+
+    elif command == "detect":
+        result = forward("detect", {
+            "image": sys.argv[2],
+            "description": sys.argv[3],
+            "target_y": int(sys.argv[4]) if len(sys.argv) > 4 else None,
+            "tolerance": int(sys.argv[5]) if len(sys.argv) > 5 else 20,
+            "confidence": float(sys.argv[6]) if len(sys.argv) > 6 else 0.5,
+            "roi": roi
+        })
+
+    elif command == "smart":
+        result = forward("smart", {
+            "image": sys.argv[2],
+            "description": sys.argv[3],
+            "target_y": int(sys.argv[4]) if len(sys.argv) > 4 else None,
+            "tolerance": int(sys.argv[5]) if len(sys.argv) > 5 else 20,
+            "roi": roi
+        })
+
+    else:
+        result = {"error": f"Unknown command: {command}"}
+
+    print(json.dumps(result, indent=2))
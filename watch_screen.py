@@ -0,0 +1,434 @@
+"""
+Screen Watch Engine
+Wait for UI states instead of fixed sleeps ("timeout /t 2")
+Many conditions share one capture loop:
+- cheap thumbnail diff every poll; OCR / shape detection only when pixels changed
+- adaptive polling: fast right after a change, backing off while the screen is idle
+- one incremental OCR pass per changed frame serves every text condition
+Each condition resolves to a Future and/or a JSONL event with the detection result
+"""
+import sys
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+
+from vision_frame import Frame, resolve_roi
+
+# Thumbnail scale and gray-level delta used for change detection
+THUMB_SCALE = 8
+CHANGE_THRESHOLD = 10
+
+class Condition:
+    """
+    Base class for watch conditions
+
+    Args:
+        roi: Optional [x1, y1, x2, y2] - only changes inside it trigger re-evaluation
+        timeout: Seconds before the condition resolves as timed out (None = never)
+    """
+    kind = "condition"
+
+    def __init__(self, roi=None, timeout=None):
+        self.roi = roi
+        self.timeout = timeout
+        self.future = Future()
+        self.started = None
+        self._evaluated = False
+
+    def describe(self):
+        return {"kind": self.kind, "roi": self.roi}
+
+    def evaluate(self, frame, context):
+        """Return (met, detail dict)"""
+        raise NotImplementedError
+
+class TextAppears(Condition):
+    """Text containing `text` is visible (same matching as find_text)"""
+    kind = "text_appears"
+
+    def __init__(self, text, confidence=0.5, roi=None, timeout=None):
+        super().__init__(roi, timeout)
+        self.text = text
+        self.confidence = confidence
+
+    def describe(self):
+        return {**super().describe(), "text": self.text}
+
+    def _matches(self, context):
+        return [
+            t for t in context.texts()
+            if self.text.lower() in t["text"].lower()
+            and t["confidence"] >= self.confidence
+            and _inside(t["center"], self.roi)
+        ]
+
+    def evaluate(self, frame, context):
+        matches = self._matches(context)
+        return len(matches) > 0, {"matches": matches}
+
+class TextDisappears(TextAppears):
+    """No visible text contains `text` any more"""
+    kind = "text_disappears"
+
+    def evaluate(self, frame, context):
+        matches = self._matches(context)
+        return len(matches) == 0, {"matches": matches}
+
+class ElementAppears(Condition):
+    """smart_detect finds `description` (optionally near target_y)"""
+    kind = "element_appears"
+
+    def __init__(self, description, target_y=None, tolerance=20, roi=None, timeout=None):
+        super().__init__(roi, timeout)
+        self.description = description
+        self.target_y = target_y
+        self.tolerance = tolerance
+
+    def describe(self):
+        return {**super().describe(), "description": self.description, "target_y": self.target_y}
+
+    def _matches(self, context):
+        result = context.smart(self.description, self.target_y, self.tolerance)
+        return [m for m in result.get("matches", []) if _inside(m["center"], self.roi)]
+
+    def evaluate(self, frame, context):
+        matches = self._matches(context)
+        return len(matches) > 0, {"matches": matches}
+
+class ElementDisappears(ElementAppears):
+    """smart_detect no longer finds `description`"""
+    kind = "element_disappears"
+
+    def evaluate(self, frame, context):
+        matches = self._matches(context)
+        return len(matches) == 0, {"matches": matches}
+
+class RegionChanges(Condition):
+    """
+    Pixels inside roi differ from when watching started
+    Cheap - evaluated on thumbnails only, never runs a detector
+    """
+    kind = "region_changes"
+
+    def __init__(self, roi=None, min_changed=0.02, timeout=None):
+        super().__init__(roi, timeout)
+        self.min_changed = min_changed
+        self._baseline = None
+
+    def evaluate(self, frame, context):
+        thumb = context.thumbnail
+        if self._baseline is None:
+            self._baseline = thumb
+            return False, {}
+
+        x1, y1, x2, y2 = context.thumb_rect(self.roi)
+        diff = cv2.absdiff(thumb[y1:y2, x1:x2], self._baseline[y1:y2, x1:x2])
+        changed = float((diff > CHANGE_THRESHOLD).mean()) if diff.size else 0.0
+        return changed >= self.min_changed, {"changed_ratio": round(changed, 4)}
+
+class FrameContext:
+    """Per-frame lazy detection results shared by every condition"""
+
+    def __init__(self, frame, thumbnail, ocr_engine, min_confidence):
+        self.frame = frame
+        self.thumbnail = thumbnail
+        self._ocr_engine = ocr_engine
+        self._min_confidence = min_confidence
+        self._texts = None
+        self._smart = {}
+
+    def texts(self):
+        if self._texts is None:
+            result = self._ocr_engine.update(self.frame, self._min_confidence)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            self._texts = result["texts"]
+        return self._texts
+
+    def smart(self, description, target_y, tolerance):
+        key = (description, target_y, tolerance)
+        if key not in self._smart:
+            from detect_ui_advanced import smart_detect
+            roi = "band" if target_y is not None else None
+            self._smart[key] = smart_detect(self.frame, description, target_y, tolerance, roi=roi)
+        return self._smart[key]
+
+    def thumb_rect(self, roi):
+        height, width = self.thumbnail.shape[:2]
+        if roi is None:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = resolve_roi(self.frame.shape, roi)
+        return (
+            x1 // THUMB_SCALE,
+            y1 // THUMB_SCALE,
+            max(x1 // THUMB_SCALE + 1, -(-x2 // THUMB_SCALE)),
+            max(y1 // THUMB_SCALE + 1, -(-y2 // THUMB_SCALE))
+        )
+
+def _inside(point, roi):
+    if roi is None:
+        return True
+    x1, y1, x2, y2 = roi
+    return x1 <= point[0] < x2 and y1 <= point[1] < y2
+
+def _grab_screen():
+    from claude_vision import capture_frame
+    return capture_frame()
+
+class ScreenWatcher:
+    """
+    Shared capture loop evaluating many conditions
+
+    Args:
+        grab: Callable returning the current frame (defaults to a screen capture)
+        min_interval: Poll interval right after a change (seconds)
+        max_interval: Poll interval ceiling while nothing changes
+        on_event: Optional callback(event dict) for every resolved condition
+    """
+
+    def __init__(self, grab=None, min_interval=0.05, max_interval=0.5, on_event=None):
+        from incremental_ocr import IncrementalOCR
+
+        self.grab = grab or _grab_screen
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_event = on_event
+
+        self._conditions = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._ocr = IncrementalOCR()
+        self._prev_thumb = None
+        self.stats = {"polls": 0, "evaluations": 0, "grab_errors": 0}
+        self.last_error = None
+
+    def add(self, condition):
+        """Register a condition; returns its Future"""
+        condition.started = time.time()
+        with self._lock:
+            self._conditions.append(condition)
+        self._wakeup.set()
+        return condition.future
+
+    def pending(self):
+        with self._lock:
+            return len(self._conditions)
+
+    def start(self):
+        """Run the capture loop in a background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+
+    def run(self, until_idle=False):
+        """
+        Capture loop (blocking)
+
+        Args:
+            until_idle: Return once every registered condition has resolved
+        """
+        interval = self.min_interval
+
+        while not self._stop_event.is_set():
+            with self._lock:
+                conditions = list(self._conditions)
+
+            if not conditions:
+                if until_idle:
+                    return
+                self._wakeup.wait(self.max_interval)
+                self._wakeup.clear()
+                continue
+
+            changed = self.poll(conditions)
+
+            # Adaptive polling: stay fast while the screen is moving
+            interval = self.min_interval if changed else min(self.max_interval, interval * 1.5)
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+    def poll(self, conditions):
+        """
+        Capture once and evaluate the conditions affected by what changed
+
+        Returns:
+            True if any pixels changed since the previous poll
+            (False when the capture failed - the frame is skipped)
+        """
+        self.stats["polls"] += 1
+        # One Frame per poll: OCR and every smart_detect condition reuse its planes
+        try:
+            frame = Frame.load(self.grab())
+        except Exception as e:
+            frame = None
+            self.last_error = str(e)
+        else:
+            if frame is None:
+                self.last_error = "Capture returned no frame"
+
+        if frame is None:
+            # Skip this frame (run() backs off as for an unchanged screen);
+            # timeouts still fire so no future waits forever on a broken capture
+            self.stats["grab_errors"] += 1
+            now = time.time()
+            for condition in conditions:
+                if condition.timeout is not None and now - condition.started > condition.timeout:
+                    self._resolve(condition, False, {"timeout": True, "capture_error": self.last_error})
+            return False
+
+        gray = frame.gray
+        thumb = cv2.resize(
+            gray,
+            (max(1, gray.shape[1] // THUMB_SCALE), max(1, gray.shape[0] // THUMB_SCALE)),
+            interpolation=cv2.INTER_AREA
+        )
+
+        if self._prev_thumb is None or self._prev_thumb.shape != thumb.shape:
+            change_mask = None
+        else:
+            change_mask = cv2.absdiff(thumb, self._prev_thumb) > CHANGE_THRESHOLD
+        self._prev_thumb = thumb
+
+        min_confidence = min(
+            [c.confidence for c in conditions if isinstance(c, TextAppears)] or [0.5]
+        )
+        context = FrameContext(frame, thumb, self._ocr, min_confidence)
+        now = time.time()
+
+        for condition in conditions:
+            if condition.timeout is not None and now - condition.started > condition.timeout:
+                self._resolve(condition, False, {"timeout": True})
+                continue
+
+            # Expensive conditions only re-run when their region changed
+            if not isinstance(condition, RegionChanges) and condition._evaluated:
+                if change_mask is not None:
+                    x1, y1, x2, y2 = context.thumb_rect(condition.roi)
+                    if not change_mask[y1:y2, x1:x2].any():
+                        continue
+
+            self.stats["evaluations"] += 1
+            condition._evaluated = True
+            try:
+                met, detail = condition.evaluate(frame, context)
+            except Exception as e:
+                self._resolve(condition, False, {"error": str(e)})
+                continue
+
+            if met:
+                self._resolve(condition, True, detail)
+
+        return change_mask is None or bool(change_mask.any())
+
+    def _resolve(self, condition, met, detail):
+        with self._lock:
+            if condition not in self._conditions:
+                return
+            self._conditions.remove(condition)
+
+        event = {
+            "event": "met" if met else ("timeout" if detail.get("timeout") else "error"),
+            "condition": condition.describe(),
+            "met": met,
+            "elapsed_s": round(time.time() - condition.started, 3),
+            **detail
+        }
+        condition.future.set_result(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+def wait_for(condition, timeout=None, grab=None):
+    """
+    Block until a single condition resolves
+
+    Example:
+        wait_for(TextAppears("Solo"), timeout=10)
+    """
+    if timeout is not None and condition.timeout is None:
+        condition.timeout = timeout
+    watcher = ScreenWatcher(grab)
+    watcher.add(condition)
+    watcher.run(until_idle=True)
+    return condition.future.result()
+
+def parse_condition(spec, timeout=None):
+    """
+    Parse a CLI condition spec:
+        text:Solo                  text appears
+        gone:Loading               text disappears
+        element:'green circle'[@Y] element appears (optionally near Y)
+        element-gone:'...'[@Y]     element disappears
+        change:X1,Y1,X2,Y2         region changes
+    """
+    kind, _, value = spec.partition(":")
+    kind = kind.lower()
+
+    if kind == "text":
+        return TextAppears(value, timeout=timeout)
+    if kind == "gone":
+        return TextDisappears(value, timeout=timeout)
+    if kind in ("element", "element-gone"):
+        description, _, target_y = value.partition("@")
+        cls = ElementAppears if kind == "element" else ElementDisappears
+        return cls(description, int(target_y) if target_y else None, timeout=timeout)
+    if kind == "change":
+        return RegionChanges([int(v) for v in value.split(",")], timeout=timeout)
+
+    raise ValueError(f"Unknown condition: {spec}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage:",
+            "command": "py watch_screen.py [--timeout S] [--any] CONDITION [CONDITION ...]",
+            "conditions": {
+                "text:Solo": "text 'Solo' appears",
+                "gone:Loading": "text 'Loading' disappears",
+                "element:green circle@556": "green circle near y=556 appears",
+                "element-gone:green circle@556": "green circle near y=556 disappears",
+                "change:X1,Y1,X2,Y2": "pixels in the region change"
+            },
+            "output": "One JSON line per resolved condition; exit code 0 if all met",
+            "example": "py -3 -X utf8 watch_screen.py --timeout 10 text:Solo"
+        }, indent=2))
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    timeout = None
+    stop_on_first = False
+
+    if "--timeout" in args:
+        i = args.index("--timeout")
+        timeout = float(args[i + 1])
+        del args[i:i + 2]
+    if "--any" in args:
+        args.remove("--any")
+        stop_on_first = True
+
+    events = []
+
+    def print_event(event):
+        events.append(event)
+        print(json.dumps(event), flush=True)
+        if stop_on_first and event["met"]:
+            watcher.stop()
+
+    watcher = ScreenWatcher(on_event=print_event)
+    for spec in args:
+        watcher.add(parse_condition(spec, timeout))
+
+    watcher.run(until_idle=True)
+    sys.exit(0 if events and all(e["met"] for e in events) else 1)